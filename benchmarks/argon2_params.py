@@ -0,0 +1,54 @@
+"""Measure Argon2 hash/verify latency for candidate parameter sets.
+
+    poetry run python benchmarks/argon2_params.py --time-cost 1 2 3 \
+        --memory-cost 19456 65536 --parallelism 1 4
+
+Pick the cheapest set whose verify latency is acceptable on the target
+container and put it into ARGON2_TIME_COST / ARGON2_MEMORY_COST /
+ARGON2_PARALLELISM; stored hashes are upgraded on the next sign-in.
+"""
+
+import argparse
+import itertools
+import statistics
+import time
+
+from argon2 import PasswordHasher
+
+
+def bench(ph: PasswordHasher, rounds: int) -> tuple[list[float], list[float]]:
+    hashes, verifies = [], []
+    for i in range(rounds):
+        password = f"password-{i}"
+        start = time.perf_counter()
+        encoded = ph.hash(password)
+        hashes.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        ph.verify(encoded, password)
+        verifies.append(time.perf_counter() - start)
+    return hashes, verifies
+
+
+def fmt(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"{statistics.mean(samples) * 1000:8.1f} {p95 * 1000:8.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--time-cost", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--memory-cost", type=int, nargs="+", default=[19456, 65536])
+    parser.add_argument("--parallelism", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'t':>3} {'m (KiB)':>8} {'p':>3} {'hash ms':>8} {'p95':>8} {'verify ms':>10} {'p95':>8}")
+    for t, m, p in itertools.product(args.time_cost, args.memory_cost, args.parallelism):
+        ph = PasswordHasher(time_cost=t, memory_cost=m, parallelism=p)
+        hashes, verifies = bench(ph, args.rounds)
+        print(f"{t:>3} {m:>8} {p:>3} {fmt(hashes)} {fmt(verifies):>19}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Compare per-request point awards with coalesced ones on a few hot rows.
+
+    PYTHONPATH=src poetry run python benchmarks/points_contention.py \
+        --users 5 --concurrency 200 --requests 5000 --coalesce-ms 0 5 20
+
+Runs against the database from the usual DB_* settings: creates `--users`
+throwaway clients, awards 1 point per request to a random one of them
+from `--concurrency` concurrent tasks, and prints throughput, latency and
+pool checkout wait for each `--coalesce-ms` value. 0 awards through
+points.award, one upsert per request; any other value submits to a
+Coalescer flushing every that many ms. The strategy is passed in, so
+POINTS_COALESCE_MS does not affect the run. The clients and their points
+are deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+import sqlalchemy
+
+from internal.cases import points
+from internal.config import settings
+from internal.infra import db
+from internal.infra.coalescer import Coalescer
+
+
+async def create_users(n: int) -> list[uuid.UUID]:
+    async with db.SessionLocal() as session, session.begin():
+        result = await session.execute(
+            sqlalchemy.text(
+                "insert into client (email, password_hash, name, surname, image_url, tg_username) "
+                "select 'bench-' || gen_random_uuid() || '@example.com', '', 'bench', 'bench', '', '' "
+                "from generate_series(1, :n) returning id"
+            ),
+            {"n": n},
+        )
+        return [row[0] for row in result]
+
+
+async def drop_users(user_ids: list[uuid.UUID]) -> None:
+    async with db.SessionLocal() as session, session.begin():
+        for table in ("points_ledger", "points"):
+            await session.execute(
+                sqlalchemy.text(f"delete from {table} where user_id = any(:ids)"),
+                {"ids": user_ids},
+            )
+        await session.execute(
+            sqlalchemy.text("delete from client where id = any(:ids)"), {"ids": user_ids}
+        )
+
+
+async def run(
+    user_ids: list[uuid.UUID], concurrency: int, requests: int, coalescer: Coalescer | None
+) -> list[float]:
+    latencies: list[float] = []
+    remaining = requests
+
+    async def award():
+        user_id = random.choice(user_ids)
+        if coalescer is not None:
+            await coalescer.submit((user_id, 1, "bench", None))
+            return
+        async with db.SessionLocal() as session:
+            await points.award(session, user_id, 1, reason="bench")
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            await award()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    if coalescer is not None:
+        await coalescer.stop()
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--coalesce-ms", type=int, nargs="+", default=[0, 5, 20])
+    args = parser.parse_args()
+
+    user_ids = await create_users(args.users)
+    try:
+        print(f"{'users':>6} {'coalesce ms':>11} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'pool wait avg':>14} {'max':>8}")
+        for ms in args.coalesce_ms:
+            coalescer = None
+            if ms > 0:
+                coalescer = Coalescer(
+                    points.flush_awards, interval=ms / 1000, max_batch=settings.points_batch_max
+                )
+            db.reset_stats()
+            start = time.perf_counter()
+            latencies = sorted(await run(user_ids, args.concurrency, args.requests, coalescer))
+            elapsed = time.perf_counter() - start
+            pool = db.stats()
+            q = statistics.quantiles(latencies, n=100)
+            print(
+                f"{args.users:>6} {ms:>11} {len(latencies) / elapsed:>8.0f} {q[49] * 1000:>8.1f} {q[94] * 1000:>8.1f} "
+                f"{q[98] * 1000:>8.1f} {pool['checkout_wait_avg_ms']:>14.1f} {pool['checkout_wait_max_ms']:>8.1f}"
+            )
+    finally:
+        await drop_users(user_ids)
+        await db.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,12 @@
+-- +goose Up
+CREATE TABLE analytics_hourly (
+    bucket TIMESTAMP NOT NULL,
+    stand_id uuid,
+    count BIGINT NOT NULL,
+    UNIQUE NULLS NOT DISTINCT (bucket, stand_id)
+);
+
+INSERT INTO analytics_hourly (bucket, stand_id, count)
+SELECT date_trunc('hour', time), stand_id, COUNT(*)
+FROM analytics
+GROUP BY 1, 2;
@@ -0,0 +1,6 @@
+-- +goose NO TRANSACTION
+-- +goose Up
+CREATE INDEX CONCURRENTLY IF NOT EXISTS analytics_stand_id_time_idx ON analytics (stand_id, time);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS analytics_user_id_time_idx ON analytics (user_id, time);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS analytics_time_brin_idx ON analytics USING brin (time);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS analytics_hourly_stand_id_bucket_idx ON analytics_hourly (stand_id, bucket);
@@ -0,0 +1,95 @@
+-- +goose Up
+ALTER TABLE analytics RENAME TO analytics_legacy;
+ALTER INDEX analytics_pkey RENAME TO analytics_legacy_pkey;
+DROP INDEX IF EXISTS analytics_stand_id_time_idx;
+DROP INDEX IF EXISTS analytics_user_id_time_idx;
+DROP INDEX IF EXISTS analytics_time_brin_idx;
+
+CREATE TABLE analytics (
+    id uuid NOT NULL DEFAULT uuid_generate_v4(),
+    user_id uuid REFERENCES client(id),
+    stand_id uuid REFERENCES stand(id),
+    time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, time)
+) PARTITION BY RANGE (time);
+
+CREATE TABLE analytics_default PARTITION OF analytics DEFAULT;
+
+CREATE INDEX analytics_stand_id_time_idx ON analytics (stand_id, time);
+CREATE INDEX analytics_user_id_time_idx ON analytics (user_id, time);
+CREATE INDEX analytics_time_brin_idx ON analytics USING brin (time);
+
+-- Rows that landed in the default partition are moved into the new daily
+-- partition before it is attached, otherwise ATTACH would fail.
+-- +goose StatementBegin
+CREATE FUNCTION analytics_create_partition(day date) RETURNS boolean AS $$
+DECLARE
+    name text := 'analytics_p' || to_char(day, 'YYYYMMDD');
+BEGIN
+    IF to_regclass(name) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE analytics INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', name);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM analytics_default WHERE time >= %L AND time < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM moved',
+        day, day + 1, name
+    );
+    EXECUTE format(
+        'ALTER TABLE analytics ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        name, day, day + 1
+    );
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+-- +goose StatementEnd
+
+-- +goose StatementBegin
+CREATE FUNCTION analytics_ensure_partitions(from_day date, to_day date) RETURNS integer AS $$
+DECLARE
+    created integer := 0;
+    day date;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('analytics_partitions'));
+    FOR day IN SELECT generate_series(from_day, to_day, interval '1 day')::date LOOP
+        IF analytics_create_partition(day) THEN
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+-- +goose StatementEnd
+
+-- +goose StatementBegin
+CREATE FUNCTION analytics_drop_partitions(keep_days integer) RETURNS SETOF text AS $$
+DECLARE
+    cutoff date := current_date - keep_days;
+    name text;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('analytics_partitions'));
+    FOR name IN
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'analytics'::regclass
+            AND c.relname ~ '^analytics_p[0-9]{8}$'
+            AND to_date(substr(c.relname, 12), 'YYYYMMDD') < cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('DROP TABLE %I', name);
+        RETURN NEXT name;
+    END LOOP;
+    DELETE FROM analytics_default WHERE time < cutoff;
+END;
+$$ LANGUAGE plpgsql;
+-- +goose StatementEnd
+
+SELECT analytics_ensure_partitions(
+    COALESCE((SELECT CAST(min(time) AS date) FROM analytics_legacy), current_date),
+    current_date + 7
+);
+
+INSERT INTO analytics (id, user_id, stand_id, time)
+SELECT id, user_id, stand_id, time FROM analytics_legacy;
+
+DROP TABLE analytics_legacy;
@@ -0,0 +1,52 @@
+-- +goose Up
+-- HyperLogLog sketches of distinct user_id per rollup row: 4096 registers
+-- (precision 12), relative standard error 1.04 / sqrt(4096) ~ 1.6%.
+ALTER TABLE analytics_hourly ADD COLUMN visitors smallint[];
+
+-- +goose StatementBegin
+CREATE FUNCTION hll_registers(user_ids uuid[]) RETURNS TABLE (i integer, rank smallint) AS $$
+    SELECT
+        CAST(((h >> 52) & 4095) + 1 AS integer),
+        CAST(CASE WHEN w = 0 THEN 53
+            ELSE position('1' IN CAST(CAST(w AS bit(64)) AS text)) - 12 END AS smallint)
+    FROM (
+        SELECT h, h & 4503599627370495 AS w
+        FROM (
+            SELECT hashtextextended(CAST(u AS text), 0) AS h
+            FROM unnest(user_ids) AS u
+            WHERE u IS NOT NULL
+        ) hashed
+    ) split
+$$ LANGUAGE sql IMMUTABLE;
+-- +goose StatementEnd
+
+-- +goose StatementBegin
+CREATE FUNCTION hll_add(regs smallint[], user_ids uuid[]) RETURNS smallint[] AS $$
+    SELECT array_agg(GREATEST(r.v, u.rank) ORDER BY r.i)
+    FROM unnest(COALESCE(regs, array_fill(CAST(0 AS smallint), ARRAY[4096]))) WITH ORDINALITY AS r(v, i)
+    LEFT JOIN (
+        SELECT i, max(rank) AS rank FROM hll_registers(user_ids) GROUP BY i
+    ) u ON u.i = r.i
+$$ LANGUAGE sql IMMUTABLE;
+-- +goose StatementEnd
+
+-- +goose StatementBegin
+CREATE FUNCTION hll_merge(a smallint[], b smallint[]) RETURNS smallint[] AS $$
+    SELECT CASE
+        WHEN a IS NULL THEN b
+        WHEN b IS NULL THEN a
+        ELSE (SELECT array_agg(GREATEST(x, y) ORDER BY i) FROM unnest(a, b) WITH ORDINALITY AS t(x, y, i))
+    END
+$$ LANGUAGE sql IMMUTABLE;
+-- +goose StatementEnd
+
+CREATE AGGREGATE hll_union(smallint[]) (SFUNC = hll_merge, STYPE = smallint[]);
+
+UPDATE analytics_hourly h
+SET visitors = v.visitors
+FROM (
+    SELECT date_trunc('hour', time) AS bucket, stand_id, hll_add(NULL, array_agg(user_id)) AS visitors
+    FROM analytics
+    GROUP BY 1, 2
+) v
+WHERE h.bucket = v.bucket AND h.stand_id IS NOT DISTINCT FROM v.stand_id;
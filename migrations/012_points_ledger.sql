@@ -0,0 +1,16 @@
+-- +goose Up
+CREATE TABLE points_ledger (
+    id BIGSERIAL PRIMARY KEY,
+    user_id uuid NOT NULL REFERENCES client(id),
+    delta INT NOT NULL,
+    reason TEXT NOT NULL,
+    event_id uuid REFERENCES event(id) ON DELETE SET NULL,
+    idempotency_key TEXT UNIQUE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX points_ledger_user_id_id_idx ON points_ledger (user_id, id);
+
+INSERT INTO points_ledger (user_id, delta, reason)
+SELECT user_id, total_points, 'opening balance'
+FROM points;
@@ -0,0 +1,10 @@
+-- +goose Up
+CREATE TABLE idempotency (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    response TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (scope, key)
+);
+
+CREATE INDEX idempotency_created_at_idx ON idempotency (created_at);
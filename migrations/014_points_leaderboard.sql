@@ -0,0 +1,2 @@
+-- +goose Up
+CREATE INDEX points_total_points_user_id_idx ON points (total_points DESC, user_id);
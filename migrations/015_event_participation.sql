@@ -0,0 +1,8 @@
+-- +goose Up
+CREATE TABLE event_participation (
+    event_id uuid NOT NULL REFERENCES event(id) ON DELETE CASCADE,
+    user_id uuid NOT NULL REFERENCES client(id),
+    points INT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (event_id, user_id)
+);
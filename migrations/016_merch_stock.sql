@@ -0,0 +1,12 @@
+-- +goose Up
+ALTER TABLE merch ADD COLUMN stock INT NOT NULL DEFAULT 0 CHECK (stock >= 0);
+
+CREATE TABLE merch_redemption (
+    id BIGSERIAL PRIMARY KEY,
+    merch_id uuid REFERENCES merch(id) ON DELETE SET NULL,
+    user_id uuid NOT NULL REFERENCES client(id),
+    points INT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX merch_redemption_user_id_idx ON merch_redemption (user_id);
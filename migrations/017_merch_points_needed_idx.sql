@@ -0,0 +1,2 @@
+-- +goose Up
+CREATE INDEX merch_points_needed_idx ON merch (points_needed);
@@ -0,0 +1,41 @@
+-- +goose Up
+-- A partitioned table can only enforce keys that include the partition
+-- column, so analytics is unique on (id, time) only. Visit ids are claimed
+-- here instead, so a retry with the same id and a later time is not stored
+-- twice. Claims are pruned together with their partitions.
+CREATE TABLE analytics_visit (
+    id uuid PRIMARY KEY,
+    time TIMESTAMP NOT NULL
+);
+
+CREATE INDEX analytics_visit_time_idx ON analytics_visit (time);
+
+INSERT INTO analytics_visit (id, time)
+SELECT id, min(time) FROM analytics GROUP BY id;
+
+-- The retention cutoff is now passed in by the application, which also
+-- computes the hourly rollup's boundary, so both use the same UTC day.
+DROP FUNCTION analytics_drop_partitions(integer);
+
+-- +goose StatementBegin
+CREATE FUNCTION analytics_drop_partitions(cutoff date) RETURNS SETOF text AS $$
+DECLARE
+    name text;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('analytics_partitions'));
+    FOR name IN
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'analytics'::regclass
+            AND c.relname ~ '^analytics_p[0-9]{8}$'
+            AND to_date(substr(c.relname, 12), 'YYYYMMDD') < cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('DROP TABLE %I', name);
+        RETURN NEXT name;
+    END LOOP;
+    DELETE FROM analytics_default WHERE time < cutoff;
+    DELETE FROM analytics_visit WHERE time < cutoff;
+END;
+$$ LANGUAGE plpgsql;
+-- +goose StatementEnd
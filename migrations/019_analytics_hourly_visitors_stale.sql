@@ -0,0 +1,8 @@
+-- +goose Up
+-- Merging a visit into the 4096-register sketch rewrites the whole array,
+-- which was done for every single direct insert on the hottest rollup row.
+-- Direct inserts now only bump count and mark the sketch stale; stale
+-- sketches are rebuilt from the raw visits in the background.
+ALTER TABLE analytics_hourly ADD COLUMN visitors_stale boolean NOT NULL DEFAULT false;
+
+CREATE INDEX analytics_hourly_visitors_stale_idx ON analytics_hourly (bucket) WHERE visitors_stale;
@@ -1,8 +1,189 @@
 -- name: CreateAnalytics :one
-INSERT INTO analytics (user_id, stand_id) VALUES ($1, $2) RETURNING *;
+WITH claimed AS (
+    INSERT INTO analytics_visit (id, time)
+    VALUES (COALESCE(sqlc.narg(id), uuid_generate_v4()), sqlc.arg(time))
+    ON CONFLICT DO NOTHING
+    RETURNING id, time
+)
+INSERT INTO analytics (id, user_id, stand_id, time)
+SELECT id, sqlc.arg(user_id), sqlc.arg(stand_id), time FROM claimed
+RETURNING *;
 
--- name: GetAnalyticsGrouped :many
-SELECT DATE(time) as date, EXTRACT(hour from time) as hour, COUNT(*) as count
+-- name: GetAnalytic :one
+SELECT a.id, a.user_id, a.stand_id, a.time FROM analytics a
+JOIN analytics_visit v ON v.id = a.id AND v.time = a.time
+WHERE v.id = sqlc.arg(id);
+
+-- name: CreateAnalyticsBatch :many
+WITH batch AS (
+    SELECT DISTINCT ON (v.id) v.id, v.user_id, v.stand_id, v.time FROM unnest(
+        CAST(sqlc.arg(ids) AS uuid[]),
+        CAST(sqlc.arg(user_ids) AS uuid[]),
+        CAST(sqlc.arg(stand_ids) AS uuid[]),
+        CAST(sqlc.arg(times) AS timestamp[])
+    ) AS v(id, user_id, stand_id, time)
+    WHERE (v.user_id IS NULL OR EXISTS (SELECT 1 FROM client c WHERE c.id = v.user_id))
+        AND (v.stand_id IS NULL OR EXISTS (SELECT 1 FROM stand s WHERE s.id = v.stand_id))
+        AND NOT EXISTS (
+            SELECT 1 FROM analytics e
+            WHERE e.user_id = v.user_id AND e.stand_id = v.stand_id
+                AND e.time > v.time - make_interval(secs => CAST(sqlc.arg(dedup_seconds) AS double precision))
+                AND e.time <= v.time
+        )
+    ORDER BY v.id, v.time
+), claimed AS (
+    INSERT INTO analytics_visit (id, time)
+    SELECT id, time FROM batch
+    ON CONFLICT DO NOTHING
+    RETURNING id
+)
+INSERT INTO analytics (id, user_id, stand_id, time)
+SELECT b.id, b.user_id, b.stand_id, b.time FROM batch b JOIN claimed ON claimed.id = b.id
+RETURNING *;
+
+-- name: LockAnalyticsVisits :exec
+SELECT pg_advisory_xact_lock(k) FROM (
+    SELECT DISTINCT hashtextextended(CAST(v.user_id AS text) || CAST(v.stand_id AS text), 0) AS k
+    FROM unnest(CAST(sqlc.arg(user_ids) AS uuid[]), CAST(sqlc.arg(stand_ids) AS uuid[])) AS v(user_id, stand_id)
+    ORDER BY k
+) keys;
+
+-- name: GetRecentAnalytic :one
+SELECT * FROM analytics
+WHERE user_id = sqlc.arg(user_id) AND stand_id = sqlc.arg(stand_id) AND time > sqlc.arg(since)
+ORDER BY time DESC
+LIMIT 1;
+
+-- name: IncrementAnalyticsHourly :exec
+INSERT INTO analytics_hourly (bucket, stand_id, count, visitors)
+VALUES (sqlc.arg(bucket), sqlc.narg(stand_id), sqlc.arg(count), hll_add(NULL, CAST(sqlc.arg(user_ids) AS uuid[])))
+ON CONFLICT (bucket, stand_id) DO UPDATE SET
+    count = analytics_hourly.count + EXCLUDED.count,
+    visitors = hll_merge(analytics_hourly.visitors, EXCLUDED.visitors);
+
+-- name: IncrementAnalyticsHourlyCount :exec
+INSERT INTO analytics_hourly (bucket, stand_id, count, visitors_stale)
+VALUES (sqlc.arg(bucket), sqlc.narg(stand_id), sqlc.arg(count), true)
+ON CONFLICT (bucket, stand_id) DO UPDATE SET
+    count = analytics_hourly.count + EXCLUDED.count,
+    visitors_stale = true;
+
+-- name: RefreshAnalyticsSketches :execrows
+-- A row counted again after the snapshot fails the count check and stays
+-- stale for the next run. Rows whose raw visits are gone keep their sketch.
+UPDATE analytics_hourly h
+SET visitors = COALESCE(s.visitors, h.visitors), visitors_stale = false
+FROM (
+    SELECT d.bucket, d.stand_id, d.count,
+        CASE WHEN COUNT(a.time) > 0 THEN hll_add(NULL, array_agg(a.user_id)) END AS visitors
+    FROM analytics_hourly d
+    LEFT JOIN analytics a ON a.time >= d.bucket AND a.time < d.bucket + interval '1 hour'
+        AND a.stand_id IS NOT DISTINCT FROM d.stand_id
+    WHERE d.visitors_stale
+    GROUP BY d.bucket, d.stand_id, d.count
+) s
+WHERE h.bucket = s.bucket AND h.stand_id IS NOT DISTINCT FROM s.stand_id AND h.count = s.count;
+
+-- name: GetAnalyticsHourlyRange :many
+SELECT date_trunc(sqlc.arg(bucket_size), bucket) AS bucket, CAST(SUM(count) AS bigint) AS count
+FROM analytics_hourly
+WHERE bucket >= sqlc.arg(time_from) AND bucket < sqlc.arg(time_to)
+    AND (CAST(sqlc.narg(stand_id) AS uuid) IS NULL OR stand_id = sqlc.narg(stand_id))
+GROUP BY 1
+ORDER BY 1;
+
+-- name: GetAnalyticsBucketed :many
+SELECT date_trunc(sqlc.arg(bucket_size), time) AS bucket, COUNT(*) AS count
+FROM analytics
+WHERE time >= sqlc.arg(time_from) AND time < sqlc.arg(time_to)
+GROUP BY 1
+ORDER BY 1;
+
+-- name: GetAnalyticsBucketedByStand :many
+SELECT date_trunc(sqlc.arg(bucket_size), time) AS bucket, COUNT(*) AS count
+FROM analytics
+WHERE stand_id = sqlc.arg(stand_id)
+    AND time >= sqlc.arg(time_from) AND time < sqlc.arg(time_to)
+    AND (CAST(sqlc.narg(user_id) AS uuid) IS NULL OR user_id = sqlc.narg(user_id))
+GROUP BY 1
+ORDER BY 1;
+
+-- name: GetAnalyticsBucketedByUser :many
+SELECT date_trunc(sqlc.arg(bucket_size), time) AS bucket, COUNT(*) AS count
+FROM analytics
+WHERE user_id = sqlc.arg(user_id)
+    AND time >= sqlc.arg(time_from) AND time < sqlc.arg(time_to)
+GROUP BY 1
+ORDER BY 1;
+
+-- name: LockAnalyticsHourly :exec
+LOCK TABLE analytics_hourly IN SHARE ROW EXCLUSIVE MODE;
+
+-- name: DeleteAnalyticsHourly :exec
+DELETE FROM analytics_hourly
+WHERE bucket >= sqlc.arg(since);
+
+-- name: RebuildAnalyticsHourly :execrows
+INSERT INTO analytics_hourly (bucket, stand_id, count, visitors)
+SELECT date_trunc('hour', time), stand_id, COUNT(*), hll_add(NULL, array_agg(user_id))
+FROM analytics
+WHERE time >= sqlc.arg(since)
+GROUP BY 1, 2;
+
+-- name: CheckAnalyticsHourly :many
+SELECT bucket, stand_id, CAST(SUM(raw_count) AS bigint) AS raw_count, CAST(SUM(rollup_count) AS bigint) AS rollup_count
+FROM (
+    SELECT date_trunc('hour', time) AS bucket, stand_id, COUNT(*) AS raw_count, 0 AS rollup_count
+    FROM analytics
+    WHERE time >= sqlc.arg(since)
+    GROUP BY 1, 2
+    UNION ALL
+    SELECT bucket, stand_id, 0, count
+    FROM analytics_hourly
+    WHERE bucket >= sqlc.arg(since)
+) t
+GROUP BY bucket, stand_id
+HAVING SUM(raw_count) <> SUM(rollup_count)
+ORDER BY bucket, stand_id;
+
+-- name: ExportAnalytics :many
+SELECT id, user_id, stand_id, time
+FROM analytics
+WHERE time >= sqlc.arg(time_from) AND time < sqlc.arg(time_to);
+
+-- name: ExportAnalyticsWithStands :many
+SELECT a.id, a.user_id, a.stand_id, s.name AS stand_name, a.time
+FROM analytics a
+LEFT JOIN stand s ON s.id = a.stand_id
+WHERE a.time >= sqlc.arg(time_from) AND a.time < sqlc.arg(time_to);
+
+-- name: EnsureAnalyticsPartitions :one
+SELECT analytics_ensure_partitions(CAST(sqlc.arg(today) AS date), CAST(sqlc.arg(today) AS date) + CAST(sqlc.arg(days_ahead) AS integer));
+
+-- name: DropAnalyticsPartitions :many
+SELECT analytics_drop_partitions(CAST(sqlc.arg(cutoff) AS date));
+
+-- name: GetUniqueVisitorsSketch :many
+SELECT date_trunc(sqlc.arg(bucket_size), bucket) AS bucket, hll_union(visitors) AS visitors
+FROM analytics_hourly
+WHERE bucket >= sqlc.arg(time_from) AND bucket < sqlc.arg(time_to)
+    AND (CAST(sqlc.narg(stand_id) AS uuid) IS NULL OR stand_id = sqlc.narg(stand_id))
+GROUP BY 1
+ORDER BY 1;
+
+-- name: GetUniqueVisitorsExact :many
+SELECT date_trunc(sqlc.arg(bucket_size), time) AS bucket, COUNT(DISTINCT user_id) AS visitors
 FROM analytics
-GROUP BY DATE(time), EXTRACT(hour from time)
-ORDER BY DATE(time), EXTRACT(hour from time);
\ No newline at end of file
+WHERE time >= sqlc.arg(time_from) AND time < sqlc.arg(time_to)
+    AND (CAST(sqlc.narg(stand_id) AS uuid) IS NULL OR stand_id = sqlc.narg(stand_id))
+GROUP BY 1
+ORDER BY 1;
+
+-- name: GetRecentVisits :many
+SELECT stand_id, user_id, max(time) AS time
+FROM analytics
+WHERE time >= sqlc.arg(since) AND stand_id IS NOT NULL AND user_id IS NOT NULL
+GROUP BY stand_id, user_id;
+
+-- name: NotifyAnalyticsVisits :exec
+SELECT pg_notify('analytics_visits', sqlc.arg(payload));
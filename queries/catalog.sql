@@ -0,0 +1,2 @@
+-- name: NotifyCatalog :exec
+SELECT pg_notify('catalog', sqlc.arg(payload));
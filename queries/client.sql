@@ -22,6 +22,11 @@ where
     id = $1
 returning *;
 
+-- name: UpdateClientPasswordHash :execrows
+update client
+set password_hash = sqlc.arg(new_hash)
+where id = sqlc.arg(id) and password_hash = sqlc.arg(old_hash);
+
 -- name: DeleteClient :one
 delete from client
 where id = $1
@@ -0,0 +1,19 @@
+-- name: ClaimIdempotencyKeys :many
+INSERT INTO idempotency (scope, key)
+SELECT sqlc.arg(scope), k FROM unnest(CAST(sqlc.arg(keys) AS text[])) AS k
+ON CONFLICT DO NOTHING
+RETURNING key;
+
+-- name: GetIdempotencyResponse :one
+SELECT response FROM idempotency
+WHERE scope = sqlc.arg(scope) AND key = sqlc.arg(key);
+
+-- name: SaveIdempotencyResponses :exec
+UPDATE idempotency SET response = v.response
+FROM unnest(CAST(sqlc.arg(keys) AS text[]), CAST(sqlc.arg(responses) AS text[])) AS v(key, response)
+WHERE idempotency.scope = sqlc.arg(scope) AND idempotency.key = v.key;
+
+-- name: DeleteExpiredIdempotencyKeys :execrows
+-- created_at is filled in by the database, so expiry uses the same clock
+DELETE FROM idempotency
+WHERE created_at < LOCALTIMESTAMP - make_interval(secs => CAST(sqlc.arg(ttl_seconds) AS double precision));
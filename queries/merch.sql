@@ -1,6 +1,6 @@
 -- name: CreateMerch :one
-insert into merch (name, info, image_url, points_needed)
-values ($1, $2, $3, $4)
+insert into merch (name, info, image_url, points_needed, stock)
+values ($1, $2, $3, $4, $5)
 returning *;
 
 -- name: GetMerchByID :one
@@ -17,12 +17,58 @@ set
     name   = coalesce(sqlc.narg('name'), name),
     info  = coalesce(sqlc.narg('info'), info),
     image_url  = coalesce(sqlc.narg('image_url'), image_url),
-    points_needed  = coalesce(sqlc.narg('points_needed'), points_needed)
+    points_needed  = coalesce(sqlc.narg('points_needed'), points_needed),
+    stock  = coalesce(sqlc.narg('stock'), stock)
 where
     id = $1
 returning *;
 
+-- name: SpendPointsOnMerch :one
+WITH spent AS (
+    UPDATE points SET total_points = points.total_points - merch.points_needed
+    FROM merch
+    WHERE points.user_id = sqlc.arg(user_id)
+        AND merch.id = sqlc.arg(merch_id)
+        AND merch.stock > 0
+        AND points.total_points >= merch.points_needed
+    RETURNING points.user_id, points.total_points, merch.id AS merch_id, merch.points_needed
+), entry AS (
+    INSERT INTO points_ledger (user_id, delta, reason)
+    SELECT user_id, -points_needed, 'merch' FROM spent
+), redemption AS (
+    INSERT INTO merch_redemption (merch_id, user_id, points)
+    SELECT merch_id, user_id, points_needed FROM spent
+    RETURNING id, created_at
+)
+SELECT redemption.id, spent.merch_id, spent.user_id, spent.points_needed AS points, spent.total_points, redemption.created_at
+FROM spent, redemption;
+
+-- name: TakeMerchStock :one
+UPDATE merch SET stock = stock - 1
+WHERE id = sqlc.arg(id) AND stock > 0
+RETURNING stock;
+
 -- name: DeleteMerch :exec
 delete from merch
 where id = $1
 returning id;
+
+-- name: GetAffordableMerch :many
+WITH balance AS (
+    SELECT COALESCE(
+        (SELECT total_points FROM points WHERE user_id = sqlc.arg(user_id)), 0
+    ) AS total_points
+)
+SELECT item.id, item.name, item.info, item.image_url, item.points_needed, item.stock,
+    balance.total_points, item.points_needed <= balance.total_points AS affordable
+FROM balance
+LEFT JOIN LATERAL (
+    (SELECT * FROM merch
+    WHERE stock > 0 AND points_needed <= balance.total_points)
+    UNION ALL
+    (SELECT * FROM merch
+    WHERE stock > 0 AND points_needed > balance.total_points
+    ORDER BY points_needed
+    LIMIT 1)
+) AS item ON true
+ORDER BY item.points_needed, item.name;
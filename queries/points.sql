@@ -1,10 +1,117 @@
--- name: UpsertPoints :one
+-- name: AwardPoints :one
+WITH entry AS (
+    INSERT INTO points_ledger (user_id, delta, reason, event_id, idempotency_key)
+    VALUES (sqlc.arg(user_id), sqlc.arg(delta), sqlc.arg(reason), sqlc.narg(event_id), sqlc.narg(idempotency_key))
+    ON CONFLICT (idempotency_key) DO NOTHING
+    RETURNING user_id, delta
+)
 INSERT INTO points (user_id, total_points)
-VALUES ($1, $2)
+SELECT user_id, delta FROM entry
+ON CONFLICT (user_id) DO UPDATE SET
+    total_points = points.total_points + EXCLUDED.total_points
+RETURNING *;
+
+-- name: AwardPointsBatch :many
+WITH entries AS (
+    INSERT INTO points_ledger (user_id, delta, reason, event_id)
+    SELECT v.user_id, v.delta, sqlc.arg(reason), sqlc.narg(event_id) FROM unnest(
+        CAST(sqlc.arg(user_ids) AS uuid[]),
+        CAST(sqlc.arg(deltas) AS integer[])
+    ) AS v(user_id, delta)
+    RETURNING user_id, delta
+)
+INSERT INTO points (user_id, total_points)
+SELECT user_id, SUM(delta) FROM entries
+GROUP BY user_id
+ORDER BY user_id
 ON CONFLICT (user_id) DO UPDATE SET
     total_points = points.total_points + EXCLUDED.total_points
 RETURNING *;
 
 -- name: GetPointsByUserID :one
 SELECT * FROM points
-WHERE user_id = sqlc.arg(user_id);
\ No newline at end of file
+WHERE user_id = sqlc.arg(user_id);
+
+-- name: GetPointsHistory :many
+SELECT * FROM points_ledger
+WHERE user_id = sqlc.arg(user_id) AND id < sqlc.arg(before)
+ORDER BY id DESC
+LIMIT sqlc.arg(page_size);
+
+-- name: ListPointsUserIDs :many
+SELECT user_id FROM points
+WHERE user_id > sqlc.arg(after)
+ORDER BY user_id
+LIMIT sqlc.arg(batch_size);
+
+-- name: LockPoints :exec
+SELECT 1 FROM points
+WHERE user_id = ANY(CAST(sqlc.arg(user_ids) AS uuid[]))
+ORDER BY user_id
+FOR UPDATE;
+
+-- name: ReconcilePoints :many
+WITH computed AS (
+    SELECT p.user_id, p.total_points AS old_total, CAST(COALESCE(SUM(l.delta), 0) AS integer) AS total
+    FROM points p
+    LEFT JOIN points_ledger l ON l.user_id = p.user_id
+    WHERE p.user_id = ANY(CAST(sqlc.arg(user_ids) AS uuid[]))
+    GROUP BY p.user_id
+)
+UPDATE points SET total_points = computed.total
+FROM computed
+WHERE points.user_id = computed.user_id AND points.total_points <> computed.total
+RETURNING points.user_id, computed.old_total, points.total_points;
+
+-- name: ListPointsRanked :many
+SELECT * FROM points
+ORDER BY total_points DESC, user_id
+LIMIT sqlc.narg(page_size);
+
+-- name: NotifyPoints :exec
+SELECT pg_notify('points', sqlc.arg(payload));
+
+-- name: CompleteEvent :one
+WITH participation AS (
+    INSERT INTO event_participation (event_id, user_id, points)
+    SELECT id, sqlc.arg(user_id), points FROM event
+    WHERE id = sqlc.arg(event_id)
+    ON CONFLICT (event_id, user_id) DO NOTHING
+    RETURNING event_id, user_id, points
+), entry AS (
+    INSERT INTO points_ledger (user_id, delta, reason, event_id)
+    SELECT user_id, points, 'event', event_id FROM participation
+    RETURNING user_id, delta
+)
+INSERT INTO points (user_id, total_points)
+SELECT user_id, delta FROM entry
+ON CONFLICT (user_id) DO UPDATE SET
+    total_points = points.total_points + EXCLUDED.total_points
+RETURNING *;
+
+-- name: CompleteEventBatch :many
+WITH participation AS (
+    INSERT INTO event_participation (event_id, user_id, points)
+    SELECT e.id, u.user_id, e.points
+    FROM event e
+    CROSS JOIN (
+        SELECT DISTINCT user_id FROM unnest(CAST(sqlc.arg(user_ids) AS uuid[])) AS v(user_id)
+    ) AS u
+    WHERE e.id = sqlc.arg(event_id)
+    ORDER BY u.user_id
+    ON CONFLICT (event_id, user_id) DO NOTHING
+    RETURNING event_id, user_id, points
+), entries AS (
+    INSERT INTO points_ledger (user_id, delta, reason, event_id)
+    SELECT user_id, points, 'event', event_id FROM participation
+    RETURNING user_id, delta
+)
+INSERT INTO points (user_id, total_points)
+SELECT user_id, delta FROM entries
+ORDER BY user_id
+ON CONFLICT (user_id) DO UPDATE SET
+    total_points = points.total_points + EXCLUDED.total_points
+RETURNING *;
+
+-- name: EventExists :one
+SELECT EXISTS (SELECT 1 FROM event WHERE id = sqlc.arg(event_id));
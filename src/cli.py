@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+
+from internal.cases import analytics, points
+from internal.config import settings
+from internal.infra import db
+
+
+async def rollup_rebuild(args: argparse.Namespace) -> int:
+    async with db.SessionLocal() as session:
+        buckets = await analytics.rebuild_hourly(session)
+    print(f"rebuilt {buckets} hourly buckets")
+    return 0
+
+
+async def rollup_check(args: argparse.Namespace) -> int:
+    async with db.SessionLocal() as session:
+        mismatches = await analytics.check_hourly(session)
+    for row in mismatches:
+        print(f"{row.bucket} {row.stand_id}: raw={row.raw_count} rollup={row.rollup_count}")
+    print(f"{len(mismatches)} mismatched buckets")
+    return 1 if mismatches else 0
+
+
+async def partitions(args: argparse.Namespace) -> int:
+    async with db.SessionLocal() as session:
+        created, dropped = await analytics.maintain_partitions(session)
+    print(f"created {created} partitions")
+    for name in dropped:
+        print(f"dropped {name}")
+    return 0
+
+
+async def points_reconcile(args: argparse.Namespace) -> int:
+    async with db.SessionLocal() as session:
+        checked, fixed = await points.reconcile(session, args.batch_size)
+    for row in fixed:
+        print(f"{row.user_id}: {row.old_total} -> {row.total_points}")
+    print(f"checked {checked} balances, fixed {len(fixed)}")
+    return 0
+
+
+COMMANDS = {
+    "rollup-rebuild": rollup_rebuild,
+    "rollup-check": rollup_check,
+    "partitions": partitions,
+    "points-reconcile": points_reconcile,
+}
+
+
+async def run(args: argparse.Namespace) -> int:
+    try:
+        return await COMMANDS[args.command](args)
+    finally:
+        await db.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rollup-rebuild", help="recompute analytics_hourly from analytics")
+    sub.add_parser("rollup-check", help="compare analytics_hourly with analytics")
+    sub.add_parser("partitions", help="create upcoming analytics partitions and drop expired ones")
+    reconcile = sub.add_parser("points-reconcile", help="recompute points balances from the ledger")
+    reconcile.add_argument("--batch-size", type=int, default=settings.points_reconcile_batch)
+    raise SystemExit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
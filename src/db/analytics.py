@@ -3,9 +3,8 @@
 #   sqlc v1.28.0
 # source: analytics.sql
 import datetime
-import decimal
 import pydantic
-from typing import AsyncIterator, Iterator, Optional
+from typing import AsyncIterator, Iterator, List, Optional
 import uuid
 
 import sqlalchemy
@@ -14,31 +13,392 @@ import sqlalchemy.ext.asyncio
 from db import models
 
 
+CHECK_ANALYTICS_HOURLY = """-- name: check_analytics_hourly \\:many
+SELECT bucket, stand_id, CAST(SUM(raw_count) AS bigint) AS raw_count, CAST(SUM(rollup_count) AS bigint) AS rollup_count
+FROM (
+    SELECT date_trunc('hour', time) AS bucket, stand_id, COUNT(*) AS raw_count, 0 AS rollup_count
+    FROM analytics
+    WHERE time >= :p1
+    GROUP BY 1, 2
+    UNION ALL
+    SELECT bucket, stand_id, 0, count
+    FROM analytics_hourly
+    WHERE bucket >= :p1
+) t
+GROUP BY bucket, stand_id
+HAVING SUM(raw_count) <> SUM(rollup_count)
+ORDER BY bucket, stand_id
+"""
+
+
+class CheckAnalyticsHourlyRow(pydantic.BaseModel):
+    bucket: datetime.datetime
+    stand_id: Optional[uuid.UUID]
+    raw_count: int
+    rollup_count: int
+
+
 CREATE_ANALYTICS = """-- name: create_analytics \\:one
-INSERT INTO analytics (user_id, stand_id) VALUES (:p1, :p2) RETURNING id, user_id, stand_id, time
+WITH claimed AS (
+    INSERT INTO analytics_visit (id, time)
+    VALUES (COALESCE(:p1, uuid_generate_v4()), :p2)
+    ON CONFLICT DO NOTHING
+    RETURNING id, time
+)
+INSERT INTO analytics (id, user_id, stand_id, time)
+SELECT id, :p3, :p4, time FROM claimed
+RETURNING id, user_id, stand_id, time
+"""
+
+
+CREATE_ANALYTICS_BATCH = """-- name: create_analytics_batch \\:many
+WITH batch AS (
+    SELECT DISTINCT ON (v.id) v.id, v.user_id, v.stand_id, v.time FROM unnest(
+        CAST(:p1 AS uuid[]),
+        CAST(:p2 AS uuid[]),
+        CAST(:p3 AS uuid[]),
+        CAST(:p4 AS timestamp[])
+    ) AS v(id, user_id, stand_id, time)
+    WHERE (v.user_id IS NULL OR EXISTS (SELECT 1 FROM client c WHERE c.id = v.user_id))
+        AND (v.stand_id IS NULL OR EXISTS (SELECT 1 FROM stand s WHERE s.id = v.stand_id))
+        AND NOT EXISTS (
+            SELECT 1 FROM analytics e
+            WHERE e.user_id = v.user_id AND e.stand_id = v.stand_id
+                AND e.time > v.time - make_interval(secs => CAST(:p5 AS double precision))
+                AND e.time <= v.time
+        )
+    ORDER BY v.id, v.time
+), claimed AS (
+    INSERT INTO analytics_visit (id, time)
+    SELECT id, time FROM batch
+    ON CONFLICT DO NOTHING
+    RETURNING id
+)
+INSERT INTO analytics (id, user_id, stand_id, time)
+SELECT b.id, b.user_id, b.stand_id, b.time FROM batch b JOIN claimed ON claimed.id = b.id
+RETURNING id, user_id, stand_id, time
+"""
+
+
+class CreateAnalyticsBatchParams(pydantic.BaseModel):
+    ids: List[uuid.UUID]
+    user_ids: List[uuid.UUID]
+    stand_ids: List[uuid.UUID]
+    times: List[datetime.datetime]
+    dedup_seconds: float
+
+
+DELETE_ANALYTICS_HOURLY = """-- name: delete_analytics_hourly \\:exec
+DELETE FROM analytics_hourly
+WHERE bucket >= :p1
 """
 
 
-GET_ANALYTICS_GROUPED = """-- name: get_analytics_grouped \\:many
-SELECT DATE(time) as date, EXTRACT(hour from time) as hour, COUNT(*) as count
+DROP_ANALYTICS_PARTITIONS = """-- name: drop_analytics_partitions \\:many
+SELECT analytics_drop_partitions(CAST(:p1 AS date))
+"""
+
+
+ENSURE_ANALYTICS_PARTITIONS = """-- name: ensure_analytics_partitions \\:one
+SELECT analytics_ensure_partitions(CAST(:p1 AS date), CAST(:p1 AS date) + CAST(:p2 AS integer))
+"""
+
+
+EXPORT_ANALYTICS = """-- name: export_analytics \\:many
+SELECT id, user_id, stand_id, time
 FROM analytics
-GROUP BY DATE(time), EXTRACT(hour from time)
-ORDER BY DATE(time), EXTRACT(hour from time)
+WHERE time >= :p1 AND time < :p2
+"""
+
+
+EXPORT_ANALYTICS_WITH_STANDS = """-- name: export_analytics_with_stands \\:many
+SELECT a.id, a.user_id, a.stand_id, s.name AS stand_name, a.time
+FROM analytics a
+LEFT JOIN stand s ON s.id = a.stand_id
+WHERE a.time >= :p1 AND a.time < :p2
+"""
+
+
+class ExportAnalyticsWithStandsRow(pydantic.BaseModel):
+    id: uuid.UUID
+    user_id: Optional[uuid.UUID]
+    stand_id: Optional[uuid.UUID]
+    stand_name: Optional[str]
+    time: datetime.datetime
+
+
+GET_ANALYTIC = """-- name: get_analytic \\:one
+SELECT a.id, a.user_id, a.stand_id, a.time FROM analytics a
+JOIN analytics_visit v ON v.id = a.id AND v.time = a.time
+WHERE v.id = :p1
 """
 
 
-class GetAnalyticsGroupedRow(pydantic.BaseModel):
-    date: datetime.date
-    hour: decimal.Decimal
+GET_ANALYTICS_BUCKETED = """-- name: get_analytics_bucketed \\:many
+SELECT date_trunc(:p1, time) AS bucket, COUNT(*) AS count
+FROM analytics
+WHERE time >= :p2 AND time < :p3
+GROUP BY 1
+ORDER BY 1
+"""
+
+
+class GetAnalyticsBucketedRow(pydantic.BaseModel):
+    bucket: datetime.datetime
+    count: int
+
+
+GET_ANALYTICS_BUCKETED_BY_STAND = """-- name: get_analytics_bucketed_by_stand \\:many
+SELECT date_trunc(:p1, time) AS bucket, COUNT(*) AS count
+FROM analytics
+WHERE stand_id = :p2
+    AND time >= :p3 AND time < :p4
+    AND (CAST(:p5 AS uuid) IS NULL OR user_id = :p5)
+GROUP BY 1
+ORDER BY 1
+"""
+
+
+class GetAnalyticsBucketedByStandParams(pydantic.BaseModel):
+    bucket_size: str
+    stand_id: Optional[uuid.UUID]
+    time_from: datetime.datetime
+    time_to: datetime.datetime
+    user_id: Optional[uuid.UUID]
+
+
+class GetAnalyticsBucketedByStandRow(pydantic.BaseModel):
+    bucket: datetime.datetime
     count: int
 
 
+GET_ANALYTICS_BUCKETED_BY_USER = """-- name: get_analytics_bucketed_by_user \\:many
+SELECT date_trunc(:p1, time) AS bucket, COUNT(*) AS count
+FROM analytics
+WHERE user_id = :p2
+    AND time >= :p3 AND time < :p4
+GROUP BY 1
+ORDER BY 1
+"""
+
+
+class GetAnalyticsBucketedByUserRow(pydantic.BaseModel):
+    bucket: datetime.datetime
+    count: int
+
+
+GET_ANALYTICS_HOURLY_RANGE = """-- name: get_analytics_hourly_range \\:many
+SELECT date_trunc(:p1, bucket) AS bucket, CAST(SUM(count) AS bigint) AS count
+FROM analytics_hourly
+WHERE bucket >= :p2 AND bucket < :p3
+    AND (CAST(:p4 AS uuid) IS NULL OR stand_id = :p4)
+GROUP BY 1
+ORDER BY 1
+"""
+
+
+class GetAnalyticsHourlyRangeRow(pydantic.BaseModel):
+    bucket: datetime.datetime
+    count: int
+
+
+GET_RECENT_ANALYTIC = """-- name: get_recent_analytic \\:one
+SELECT id, user_id, stand_id, time FROM analytics
+WHERE user_id = :p1 AND stand_id = :p2 AND time > :p3
+ORDER BY time DESC
+LIMIT 1
+"""
+
+
+GET_RECENT_VISITS = """-- name: get_recent_visits \\:many
+SELECT stand_id, user_id, max(time) AS time
+FROM analytics
+WHERE time >= :p1 AND stand_id IS NOT NULL AND user_id IS NOT NULL
+GROUP BY stand_id, user_id
+"""
+
+
+class GetRecentVisitsRow(pydantic.BaseModel):
+    stand_id: Optional[uuid.UUID]
+    user_id: Optional[uuid.UUID]
+    time: Optional[datetime.datetime]
+
+
+GET_UNIQUE_VISITORS_EXACT = """-- name: get_unique_visitors_exact \\:many
+SELECT date_trunc(:p1, time) AS bucket, COUNT(DISTINCT user_id) AS visitors
+FROM analytics
+WHERE time >= :p2 AND time < :p3
+    AND (CAST(:p4 AS uuid) IS NULL OR stand_id = :p4)
+GROUP BY 1
+ORDER BY 1
+"""
+
+
+class GetUniqueVisitorsExactRow(pydantic.BaseModel):
+    bucket: datetime.datetime
+    visitors: int
+
+
+GET_UNIQUE_VISITORS_SKETCH = """-- name: get_unique_visitors_sketch \\:many
+SELECT date_trunc(:p1, bucket) AS bucket, hll_union(visitors) AS visitors
+FROM analytics_hourly
+WHERE bucket >= :p2 AND bucket < :p3
+    AND (CAST(:p4 AS uuid) IS NULL OR stand_id = :p4)
+GROUP BY 1
+ORDER BY 1
+"""
+
+
+class GetUniqueVisitorsSketchRow(pydantic.BaseModel):
+    bucket: datetime.datetime
+    visitors: Optional[List[int]]
+
+
+INCREMENT_ANALYTICS_HOURLY = """-- name: increment_analytics_hourly \\:exec
+INSERT INTO analytics_hourly (bucket, stand_id, count, visitors)
+VALUES (:p1, :p2, :p3, hll_add(NULL, CAST(:p4 AS uuid[])))
+ON CONFLICT (bucket, stand_id) DO UPDATE SET
+    count = analytics_hourly.count + EXCLUDED.count,
+    visitors = hll_merge(analytics_hourly.visitors, EXCLUDED.visitors)
+"""
+
+
+INCREMENT_ANALYTICS_HOURLY_COUNT = """-- name: increment_analytics_hourly_count \\:exec
+INSERT INTO analytics_hourly (bucket, stand_id, count, visitors_stale)
+VALUES (:p1, :p2, :p3, true)
+ON CONFLICT (bucket, stand_id) DO UPDATE SET
+    count = analytics_hourly.count + EXCLUDED.count,
+    visitors_stale = true
+"""
+
+
+LOCK_ANALYTICS_HOURLY = """-- name: lock_analytics_hourly \\:exec
+LOCK TABLE analytics_hourly IN SHARE ROW EXCLUSIVE MODE
+"""
+
+
+LOCK_ANALYTICS_VISITS = """-- name: lock_analytics_visits \\:exec
+SELECT pg_advisory_xact_lock(k) FROM (
+    SELECT DISTINCT hashtextextended(CAST(v.user_id AS text) || CAST(v.stand_id AS text), 0) AS k
+    FROM unnest(CAST(:p1 AS uuid[]), CAST(:p2 AS uuid[])) AS v(user_id, stand_id)
+    ORDER BY k
+) keys
+"""
+
+
+NOTIFY_ANALYTICS_VISITS = """-- name: notify_analytics_visits \\:exec
+SELECT pg_notify('analytics_visits', :p1)
+"""
+
+
+REBUILD_ANALYTICS_HOURLY = """-- name: rebuild_analytics_hourly \\:execrows
+INSERT INTO analytics_hourly (bucket, stand_id, count, visitors)
+SELECT date_trunc('hour', time), stand_id, COUNT(*), hll_add(NULL, array_agg(user_id))
+FROM analytics
+WHERE time >= :p1
+GROUP BY 1, 2
+"""
+
+
+REFRESH_ANALYTICS_SKETCHES = """-- name: refresh_analytics_sketches \\:execrows
+UPDATE analytics_hourly h
+SET visitors = COALESCE(s.visitors, h.visitors), visitors_stale = false
+FROM (
+    SELECT d.bucket, d.stand_id, d.count,
+        CASE WHEN COUNT(a.time) > 0 THEN hll_add(NULL, array_agg(a.user_id)) END AS visitors
+    FROM analytics_hourly d
+    LEFT JOIN analytics a ON a.time >= d.bucket AND a.time < d.bucket + interval '1 hour'
+        AND a.stand_id IS NOT DISTINCT FROM d.stand_id
+    WHERE d.visitors_stale
+    GROUP BY d.bucket, d.stand_id, d.count
+) s
+WHERE h.bucket = s.bucket AND h.stand_id IS NOT DISTINCT FROM s.stand_id AND h.count = s.count
+"""
+
+
 class Querier:
     def __init__(self, conn: sqlalchemy.engine.Connection):
         self._conn = conn
 
-    def create_analytics(self, *, user_id: Optional[uuid.UUID], stand_id: Optional[uuid.UUID]) -> Optional[models.Analytic]:
-        row = self._conn.execute(sqlalchemy.text(CREATE_ANALYTICS), {"p1": user_id, "p2": stand_id}).first()
+    def check_analytics_hourly(self, *, since: datetime.datetime) -> Iterator[CheckAnalyticsHourlyRow]:
+        result = self._conn.execute(sqlalchemy.text(CHECK_ANALYTICS_HOURLY), {"p1": since})
+        for row in result:
+            yield CheckAnalyticsHourlyRow(
+                bucket=row[0],
+                stand_id=row[1],
+                raw_count=row[2],
+                rollup_count=row[3],
+            )
+
+    def create_analytics(self, *, id: Optional[uuid.UUID], time: datetime.datetime, user_id: Optional[uuid.UUID], stand_id: Optional[uuid.UUID]) -> Optional[models.Analytic]:
+        row = self._conn.execute(sqlalchemy.text(CREATE_ANALYTICS), {
+            "p1": id,
+            "p2": time,
+            "p3": user_id,
+            "p4": stand_id,
+        }).first()
+        if row is None:
+            return None
+        return models.Analytic(
+            id=row[0],
+            user_id=row[1],
+            stand_id=row[2],
+            time=row[3],
+        )
+
+    def create_analytics_batch(self, arg: CreateAnalyticsBatchParams) -> Iterator[models.Analytic]:
+        result = self._conn.execute(sqlalchemy.text(CREATE_ANALYTICS_BATCH), {
+            "p1": arg.ids,
+            "p2": arg.user_ids,
+            "p3": arg.stand_ids,
+            "p4": arg.times,
+            "p5": arg.dedup_seconds,
+        })
+        for row in result:
+            yield models.Analytic(
+                id=row[0],
+                user_id=row[1],
+                stand_id=row[2],
+                time=row[3],
+            )
+
+    def delete_analytics_hourly(self, *, since: datetime.datetime) -> None:
+        self._conn.execute(sqlalchemy.text(DELETE_ANALYTICS_HOURLY), {"p1": since})
+
+    def drop_analytics_partitions(self, *, cutoff: datetime.date) -> Iterator[Optional[str]]:
+        result = self._conn.execute(sqlalchemy.text(DROP_ANALYTICS_PARTITIONS), {"p1": cutoff})
+        for row in result:
+            yield row[0]
+
+    def ensure_analytics_partitions(self, *, today: datetime.date, days_ahead: int) -> Optional[int]:
+        row = self._conn.execute(sqlalchemy.text(ENSURE_ANALYTICS_PARTITIONS), {"p1": today, "p2": days_ahead}).first()
+        if row is None:
+            return None
+        return row[0]
+
+    def export_analytics(self, *, time_from: datetime.datetime, time_to: datetime.datetime) -> Iterator[models.Analytic]:
+        result = self._conn.execute(sqlalchemy.text(EXPORT_ANALYTICS), {"p1": time_from, "p2": time_to})
+        for row in result:
+            yield models.Analytic(
+                id=row[0],
+                user_id=row[1],
+                stand_id=row[2],
+                time=row[3],
+            )
+
+    def export_analytics_with_stands(self, *, time_from: datetime.datetime, time_to: datetime.datetime) -> Iterator[ExportAnalyticsWithStandsRow]:
+        result = self._conn.execute(sqlalchemy.text(EXPORT_ANALYTICS_WITH_STANDS), {"p1": time_from, "p2": time_to})
+        for row in result:
+            yield ExportAnalyticsWithStandsRow(
+                id=row[0],
+                user_id=row[1],
+                stand_id=row[2],
+                stand_name=row[3],
+                time=row[4],
+            )
+
+    def get_analytic(self, *, id: uuid.UUID) -> Optional[models.Analytic]:
+        row = self._conn.execute(sqlalchemy.text(GET_ANALYTIC), {"p1": id}).first()
         if row is None:
             return None
         return models.Analytic(
@@ -48,22 +408,150 @@ class Querier:
             time=row[3],
         )
 
-    def get_analytics_grouped(self) -> Iterator[GetAnalyticsGroupedRow]:
-        result = self._conn.execute(sqlalchemy.text(GET_ANALYTICS_GROUPED))
+    def get_analytics_bucketed(self, *, bucket_size: str, time_from: datetime.datetime, time_to: datetime.datetime) -> Iterator[GetAnalyticsBucketedRow]:
+        result = self._conn.execute(sqlalchemy.text(GET_ANALYTICS_BUCKETED), {"p1": bucket_size, "p2": time_from, "p3": time_to})
         for row in result:
-            yield GetAnalyticsGroupedRow(
-                date=row[0],
-                hour=row[1],
-                count=row[2],
+            yield GetAnalyticsBucketedRow(
+                bucket=row[0],
+                count=row[1],
             )
 
+    def get_analytics_bucketed_by_stand(self, arg: GetAnalyticsBucketedByStandParams) -> Iterator[GetAnalyticsBucketedByStandRow]:
+        result = self._conn.execute(sqlalchemy.text(GET_ANALYTICS_BUCKETED_BY_STAND), {
+            "p1": arg.bucket_size,
+            "p2": arg.stand_id,
+            "p3": arg.time_from,
+            "p4": arg.time_to,
+            "p5": arg.user_id,
+        })
+        for row in result:
+            yield GetAnalyticsBucketedByStandRow(
+                bucket=row[0],
+                count=row[1],
+            )
+
+    def get_analytics_bucketed_by_user(self, *, bucket_size: str, user_id: Optional[uuid.UUID], time_from: datetime.datetime, time_to: datetime.datetime) -> Iterator[GetAnalyticsBucketedByUserRow]:
+        result = self._conn.execute(sqlalchemy.text(GET_ANALYTICS_BUCKETED_BY_USER), {
+            "p1": bucket_size,
+            "p2": user_id,
+            "p3": time_from,
+            "p4": time_to,
+        })
+        for row in result:
+            yield GetAnalyticsBucketedByUserRow(
+                bucket=row[0],
+                count=row[1],
+            )
+
+    def get_analytics_hourly_range(self, *, bucket_size: str, time_from: datetime.datetime, time_to: datetime.datetime, stand_id: Optional[uuid.UUID]) -> Iterator[GetAnalyticsHourlyRangeRow]:
+        result = self._conn.execute(sqlalchemy.text(GET_ANALYTICS_HOURLY_RANGE), {
+            "p1": bucket_size,
+            "p2": time_from,
+            "p3": time_to,
+            "p4": stand_id,
+        })
+        for row in result:
+            yield GetAnalyticsHourlyRangeRow(
+                bucket=row[0],
+                count=row[1],
+            )
+
+    def get_recent_analytic(self, *, user_id: Optional[uuid.UUID], stand_id: Optional[uuid.UUID], since: datetime.datetime) -> Optional[models.Analytic]:
+        row = self._conn.execute(sqlalchemy.text(GET_RECENT_ANALYTIC), {"p1": user_id, "p2": stand_id, "p3": since}).first()
+        if row is None:
+            return None
+        return models.Analytic(
+            id=row[0],
+            user_id=row[1],
+            stand_id=row[2],
+            time=row[3],
+        )
+
+    def get_recent_visits(self, *, since: datetime.datetime) -> Iterator[GetRecentVisitsRow]:
+        result = self._conn.execute(sqlalchemy.text(GET_RECENT_VISITS), {"p1": since})
+        for row in result:
+            yield GetRecentVisitsRow(
+                stand_id=row[0],
+                user_id=row[1],
+                time=row[2],
+            )
+
+    def get_unique_visitors_exact(self, *, bucket_size: str, time_from: datetime.datetime, time_to: datetime.datetime, stand_id: Optional[uuid.UUID]) -> Iterator[GetUniqueVisitorsExactRow]:
+        result = self._conn.execute(sqlalchemy.text(GET_UNIQUE_VISITORS_EXACT), {
+            "p1": bucket_size,
+            "p2": time_from,
+            "p3": time_to,
+            "p4": stand_id,
+        })
+        for row in result:
+            yield GetUniqueVisitorsExactRow(
+                bucket=row[0],
+                visitors=row[1],
+            )
+
+    def get_unique_visitors_sketch(self, *, bucket_size: str, time_from: datetime.datetime, time_to: datetime.datetime, stand_id: Optional[uuid.UUID]) -> Iterator[GetUniqueVisitorsSketchRow]:
+        result = self._conn.execute(sqlalchemy.text(GET_UNIQUE_VISITORS_SKETCH), {
+            "p1": bucket_size,
+            "p2": time_from,
+            "p3": time_to,
+            "p4": stand_id,
+        })
+        for row in result:
+            yield GetUniqueVisitorsSketchRow(
+                bucket=row[0],
+                visitors=row[1],
+            )
+
+    def increment_analytics_hourly(self, *, bucket: datetime.datetime, stand_id: Optional[uuid.UUID], count: int, user_ids: List[uuid.UUID]) -> None:
+        self._conn.execute(sqlalchemy.text(INCREMENT_ANALYTICS_HOURLY), {
+            "p1": bucket,
+            "p2": stand_id,
+            "p3": count,
+            "p4": user_ids,
+        })
+
+    def increment_analytics_hourly_count(self, *, bucket: datetime.datetime, stand_id: Optional[uuid.UUID], count: int) -> None:
+        self._conn.execute(sqlalchemy.text(INCREMENT_ANALYTICS_HOURLY_COUNT), {"p1": bucket, "p2": stand_id, "p3": count})
+
+    def lock_analytics_hourly(self) -> None:
+        self._conn.execute(sqlalchemy.text(LOCK_ANALYTICS_HOURLY))
+
+    def lock_analytics_visits(self, *, user_ids: List[uuid.UUID], stand_ids: List[uuid.UUID]) -> None:
+        self._conn.execute(sqlalchemy.text(LOCK_ANALYTICS_VISITS), {"p1": user_ids, "p2": stand_ids})
+
+    def notify_analytics_visits(self, *, payload: str) -> None:
+        self._conn.execute(sqlalchemy.text(NOTIFY_ANALYTICS_VISITS), {"p1": payload})
+
+    def rebuild_analytics_hourly(self, *, since: datetime.datetime) -> int:
+        result = self._conn.execute(sqlalchemy.text(REBUILD_ANALYTICS_HOURLY), {"p1": since})
+        return result.rowcount
+
+    def refresh_analytics_sketches(self) -> int:
+        result = self._conn.execute(sqlalchemy.text(REFRESH_ANALYTICS_SKETCHES))
+        return result.rowcount
+
 
 class AsyncQuerier:
     def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
         self._conn = conn
 
-    async def create_analytics(self, *, user_id: Optional[uuid.UUID], stand_id: Optional[uuid.UUID]) -> Optional[models.Analytic]:
-        row = (await self._conn.execute(sqlalchemy.text(CREATE_ANALYTICS), {"p1": user_id, "p2": stand_id})).first()
+    async def check_analytics_hourly(self, *, since: datetime.datetime) -> AsyncIterator[CheckAnalyticsHourlyRow]:
+        result = await self._conn.stream(sqlalchemy.text(CHECK_ANALYTICS_HOURLY), {"p1": since})
+        async for row in result:
+            yield CheckAnalyticsHourlyRow(
+                bucket=row[0],
+                stand_id=row[1],
+                raw_count=row[2],
+                rollup_count=row[3],
+            )
+
+    async def create_analytics(self, *, id: Optional[uuid.UUID], time: datetime.datetime, user_id: Optional[uuid.UUID], stand_id: Optional[uuid.UUID]) -> Optional[models.Analytic]:
+        row = (await self._conn.execute(sqlalchemy.text(CREATE_ANALYTICS), {
+            "p1": id,
+            "p2": time,
+            "p3": user_id,
+            "p4": stand_id,
+        })).first()
         if row is None:
             return None
         return models.Analytic(
@@ -73,11 +561,186 @@ class AsyncQuerier:
             time=row[3],
         )
 
-    async def get_analytics_grouped(self) -> AsyncIterator[GetAnalyticsGroupedRow]:
-        result = await self._conn.stream(sqlalchemy.text(GET_ANALYTICS_GROUPED))
+    async def create_analytics_batch(self, arg: CreateAnalyticsBatchParams) -> AsyncIterator[models.Analytic]:
+        result = await self._conn.stream(sqlalchemy.text(CREATE_ANALYTICS_BATCH), {
+            "p1": arg.ids,
+            "p2": arg.user_ids,
+            "p3": arg.stand_ids,
+            "p4": arg.times,
+            "p5": arg.dedup_seconds,
+        })
         async for row in result:
-            yield GetAnalyticsGroupedRow(
-                date=row[0],
-                hour=row[1],
-                count=row[2],
+            yield models.Analytic(
+                id=row[0],
+                user_id=row[1],
+                stand_id=row[2],
+                time=row[3],
             )
+
+    async def delete_analytics_hourly(self, *, since: datetime.datetime) -> None:
+        await self._conn.execute(sqlalchemy.text(DELETE_ANALYTICS_HOURLY), {"p1": since})
+
+    async def drop_analytics_partitions(self, *, cutoff: datetime.date) -> AsyncIterator[Optional[str]]:
+        result = await self._conn.stream(sqlalchemy.text(DROP_ANALYTICS_PARTITIONS), {"p1": cutoff})
+        async for row in result:
+            yield row[0]
+
+    async def ensure_analytics_partitions(self, *, today: datetime.date, days_ahead: int) -> Optional[int]:
+        row = (await self._conn.execute(sqlalchemy.text(ENSURE_ANALYTICS_PARTITIONS), {"p1": today, "p2": days_ahead})).first()
+        if row is None:
+            return None
+        return row[0]
+
+    async def export_analytics(self, *, time_from: datetime.datetime, time_to: datetime.datetime) -> AsyncIterator[models.Analytic]:
+        result = await self._conn.stream(sqlalchemy.text(EXPORT_ANALYTICS), {"p1": time_from, "p2": time_to})
+        async for row in result:
+            yield models.Analytic(
+                id=row[0],
+                user_id=row[1],
+                stand_id=row[2],
+                time=row[3],
+            )
+
+    async def export_analytics_with_stands(self, *, time_from: datetime.datetime, time_to: datetime.datetime) -> AsyncIterator[ExportAnalyticsWithStandsRow]:
+        result = await self._conn.stream(sqlalchemy.text(EXPORT_ANALYTICS_WITH_STANDS), {"p1": time_from, "p2": time_to})
+        async for row in result:
+            yield ExportAnalyticsWithStandsRow(
+                id=row[0],
+                user_id=row[1],
+                stand_id=row[2],
+                stand_name=row[3],
+                time=row[4],
+            )
+
+    async def get_analytic(self, *, id: uuid.UUID) -> Optional[models.Analytic]:
+        row = (await self._conn.execute(sqlalchemy.text(GET_ANALYTIC), {"p1": id})).first()
+        if row is None:
+            return None
+        return models.Analytic(
+            id=row[0],
+            user_id=row[1],
+            stand_id=row[2],
+            time=row[3],
+        )
+
+    async def get_analytics_bucketed(self, *, bucket_size: str, time_from: datetime.datetime, time_to: datetime.datetime) -> AsyncIterator[GetAnalyticsBucketedRow]:
+        result = await self._conn.stream(sqlalchemy.text(GET_ANALYTICS_BUCKETED), {"p1": bucket_size, "p2": time_from, "p3": time_to})
+        async for row in result:
+            yield GetAnalyticsBucketedRow(
+                bucket=row[0],
+                count=row[1],
+            )
+
+    async def get_analytics_bucketed_by_stand(self, arg: GetAnalyticsBucketedByStandParams) -> AsyncIterator[GetAnalyticsBucketedByStandRow]:
+        result = await self._conn.stream(sqlalchemy.text(GET_ANALYTICS_BUCKETED_BY_STAND), {
+            "p1": arg.bucket_size,
+            "p2": arg.stand_id,
+            "p3": arg.time_from,
+            "p4": arg.time_to,
+            "p5": arg.user_id,
+        })
+        async for row in result:
+            yield GetAnalyticsBucketedByStandRow(
+                bucket=row[0],
+                count=row[1],
+            )
+
+    async def get_analytics_bucketed_by_user(self, *, bucket_size: str, user_id: Optional[uuid.UUID], time_from: datetime.datetime, time_to: datetime.datetime) -> AsyncIterator[GetAnalyticsBucketedByUserRow]:
+        result = await self._conn.stream(sqlalchemy.text(GET_ANALYTICS_BUCKETED_BY_USER), {
+            "p1": bucket_size,
+            "p2": user_id,
+            "p3": time_from,
+            "p4": time_to,
+        })
+        async for row in result:
+            yield GetAnalyticsBucketedByUserRow(
+                bucket=row[0],
+                count=row[1],
+            )
+
+    async def get_analytics_hourly_range(self, *, bucket_size: str, time_from: datetime.datetime, time_to: datetime.datetime, stand_id: Optional[uuid.UUID]) -> AsyncIterator[GetAnalyticsHourlyRangeRow]:
+        result = await self._conn.stream(sqlalchemy.text(GET_ANALYTICS_HOURLY_RANGE), {
+            "p1": bucket_size,
+            "p2": time_from,
+            "p3": time_to,
+            "p4": stand_id,
+        })
+        async for row in result:
+            yield GetAnalyticsHourlyRangeRow(
+                bucket=row[0],
+                count=row[1],
+            )
+
+    async def get_recent_analytic(self, *, user_id: Optional[uuid.UUID], stand_id: Optional[uuid.UUID], since: datetime.datetime) -> Optional[models.Analytic]:
+        row = (await self._conn.execute(sqlalchemy.text(GET_RECENT_ANALYTIC), {"p1": user_id, "p2": stand_id, "p3": since})).first()
+        if row is None:
+            return None
+        return models.Analytic(
+            id=row[0],
+            user_id=row[1],
+            stand_id=row[2],
+            time=row[3],
+        )
+
+    async def get_recent_visits(self, *, since: datetime.datetime) -> AsyncIterator[GetRecentVisitsRow]:
+        result = await self._conn.stream(sqlalchemy.text(GET_RECENT_VISITS), {"p1": since})
+        async for row in result:
+            yield GetRecentVisitsRow(
+                stand_id=row[0],
+                user_id=row[1],
+                time=row[2],
+            )
+
+    async def get_unique_visitors_exact(self, *, bucket_size: str, time_from: datetime.datetime, time_to: datetime.datetime, stand_id: Optional[uuid.UUID]) -> AsyncIterator[GetUniqueVisitorsExactRow]:
+        result = await self._conn.stream(sqlalchemy.text(GET_UNIQUE_VISITORS_EXACT), {
+            "p1": bucket_size,
+            "p2": time_from,
+            "p3": time_to,
+            "p4": stand_id,
+        })
+        async for row in result:
+            yield GetUniqueVisitorsExactRow(
+                bucket=row[0],
+                visitors=row[1],
+            )
+
+    async def get_unique_visitors_sketch(self, *, bucket_size: str, time_from: datetime.datetime, time_to: datetime.datetime, stand_id: Optional[uuid.UUID]) -> AsyncIterator[GetUniqueVisitorsSketchRow]:
+        result = await self._conn.stream(sqlalchemy.text(GET_UNIQUE_VISITORS_SKETCH), {
+            "p1": bucket_size,
+            "p2": time_from,
+            "p3": time_to,
+            "p4": stand_id,
+        })
+        async for row in result:
+            yield GetUniqueVisitorsSketchRow(
+                bucket=row[0],
+                visitors=row[1],
+            )
+
+    async def increment_analytics_hourly(self, *, bucket: datetime.datetime, stand_id: Optional[uuid.UUID], count: int, user_ids: List[uuid.UUID]) -> None:
+        await self._conn.execute(sqlalchemy.text(INCREMENT_ANALYTICS_HOURLY), {
+            "p1": bucket,
+            "p2": stand_id,
+            "p3": count,
+            "p4": user_ids,
+        })
+
+    async def increment_analytics_hourly_count(self, *, bucket: datetime.datetime, stand_id: Optional[uuid.UUID], count: int) -> None:
+        await self._conn.execute(sqlalchemy.text(INCREMENT_ANALYTICS_HOURLY_COUNT), {"p1": bucket, "p2": stand_id, "p3": count})
+
+    async def lock_analytics_hourly(self) -> None:
+        await self._conn.execute(sqlalchemy.text(LOCK_ANALYTICS_HOURLY))
+
+    async def lock_analytics_visits(self, *, user_ids: List[uuid.UUID], stand_ids: List[uuid.UUID]) -> None:
+        await self._conn.execute(sqlalchemy.text(LOCK_ANALYTICS_VISITS), {"p1": user_ids, "p2": stand_ids})
+
+    async def notify_analytics_visits(self, *, payload: str) -> None:
+        await self._conn.execute(sqlalchemy.text(NOTIFY_ANALYTICS_VISITS), {"p1": payload})
+
+    async def rebuild_analytics_hourly(self, *, since: datetime.datetime) -> int:
+        result = await self._conn.execute(sqlalchemy.text(REBUILD_ANALYTICS_HOURLY), {"p1": since})
+        return result.rowcount
+
+    async def refresh_analytics_sketches(self) -> int:
+        result = await self._conn.execute(sqlalchemy.text(REFRESH_ANALYTICS_SKETCHES))
+        return result.rowcount
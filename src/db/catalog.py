@@ -0,0 +1,27 @@
+# Code generated by sqlc. DO NOT EDIT.
+# versions:
+#   sqlc v1.28.0
+# source: catalog.sql
+import sqlalchemy
+import sqlalchemy.ext.asyncio
+
+
+NOTIFY_CATALOG = """-- name: notify_catalog \\:exec
+SELECT pg_notify('catalog', :p1)
+"""
+
+
+class Querier:
+    def __init__(self, conn: sqlalchemy.engine.Connection):
+        self._conn = conn
+
+    def notify_catalog(self, *, payload: str) -> None:
+        self._conn.execute(sqlalchemy.text(NOTIFY_CATALOG), {"p1": payload})
+
+
+class AsyncQuerier:
+    def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
+        self._conn = conn
+
+    async def notify_catalog(self, *, payload: str) -> None:
+        await self._conn.execute(sqlalchemy.text(NOTIFY_CATALOG), {"p1": payload})
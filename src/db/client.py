@@ -68,6 +68,13 @@ class UpdateClientParams(pydantic.BaseModel):
     tg_username: Optional[str]
 
 
+UPDATE_CLIENT_PASSWORD_HASH = """-- name: update_client_password_hash \\:execrows
+update client
+set password_hash = :p1
+where id = :p2 and password_hash = :p3
+"""
+
+
 class Querier:
     def __init__(self, conn: sqlalchemy.engine.Connection):
         self._conn = conn
@@ -147,6 +154,10 @@ class Querier:
             tg_username=row[6],
         )
 
+    def update_client_password_hash(self, *, new_hash: str, id: uuid.UUID, old_hash: str) -> int:
+        result = self._conn.execute(sqlalchemy.text(UPDATE_CLIENT_PASSWORD_HASH), {"p1": new_hash, "p2": id, "p3": old_hash})
+        return result.rowcount
+
 
 class AsyncQuerier:
     def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
@@ -226,3 +237,7 @@ class AsyncQuerier:
             image_url=row[5],
             tg_username=row[6],
         )
+
+    async def update_client_password_hash(self, *, new_hash: str, id: uuid.UUID, old_hash: str) -> int:
+        result = await self._conn.execute(sqlalchemy.text(UPDATE_CLIENT_PASSWORD_HASH), {"p1": new_hash, "p2": id, "p3": old_hash})
+        return result.rowcount
@@ -0,0 +1,81 @@
+# Code generated by sqlc. DO NOT EDIT.
+# versions:
+#   sqlc v1.28.0
+# source: idempotency.sql
+from typing import AsyncIterator, Iterator, List, Optional
+
+import sqlalchemy
+import sqlalchemy.ext.asyncio
+
+
+CLAIM_IDEMPOTENCY_KEYS = """-- name: claim_idempotency_keys \\:many
+INSERT INTO idempotency (scope, key)
+SELECT :p1, k FROM unnest(CAST(:p2 AS text[])) AS k
+ON CONFLICT DO NOTHING
+RETURNING key
+"""
+
+
+DELETE_EXPIRED_IDEMPOTENCY_KEYS = """-- name: delete_expired_idempotency_keys \\:execrows
+DELETE FROM idempotency
+WHERE created_at < LOCALTIMESTAMP - make_interval(secs => CAST(:p1 AS double precision))
+"""
+
+
+GET_IDEMPOTENCY_RESPONSE = """-- name: get_idempotency_response \\:one
+SELECT response FROM idempotency
+WHERE scope = :p1 AND key = :p2
+"""
+
+
+SAVE_IDEMPOTENCY_RESPONSES = """-- name: save_idempotency_responses \\:exec
+UPDATE idempotency SET response = v.response
+FROM unnest(CAST(:p1 AS text[]), CAST(:p2 AS text[])) AS v(key, response)
+WHERE idempotency.scope = :p3 AND idempotency.key = v.key
+"""
+
+
+class Querier:
+    def __init__(self, conn: sqlalchemy.engine.Connection):
+        self._conn = conn
+
+    def claim_idempotency_keys(self, *, scope: str, keys: List[str]) -> Iterator[str]:
+        result = self._conn.execute(sqlalchemy.text(CLAIM_IDEMPOTENCY_KEYS), {"p1": scope, "p2": keys})
+        for row in result:
+            yield row[0]
+
+    def delete_expired_idempotency_keys(self, *, ttl_seconds: float) -> int:
+        result = self._conn.execute(sqlalchemy.text(DELETE_EXPIRED_IDEMPOTENCY_KEYS), {"p1": ttl_seconds})
+        return result.rowcount
+
+    def get_idempotency_response(self, *, scope: str, key: str) -> Optional[str]:
+        row = self._conn.execute(sqlalchemy.text(GET_IDEMPOTENCY_RESPONSE), {"p1": scope, "p2": key}).first()
+        if row is None:
+            return None
+        return row[0]
+
+    def save_idempotency_responses(self, *, keys: List[str], responses: List[str], scope: str) -> None:
+        self._conn.execute(sqlalchemy.text(SAVE_IDEMPOTENCY_RESPONSES), {"p1": keys, "p2": responses, "p3": scope})
+
+
+class AsyncQuerier:
+    def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
+        self._conn = conn
+
+    async def claim_idempotency_keys(self, *, scope: str, keys: List[str]) -> AsyncIterator[str]:
+        result = await self._conn.stream(sqlalchemy.text(CLAIM_IDEMPOTENCY_KEYS), {"p1": scope, "p2": keys})
+        async for row in result:
+            yield row[0]
+
+    async def delete_expired_idempotency_keys(self, *, ttl_seconds: float) -> int:
+        result = await self._conn.execute(sqlalchemy.text(DELETE_EXPIRED_IDEMPOTENCY_KEYS), {"p1": ttl_seconds})
+        return result.rowcount
+
+    async def get_idempotency_response(self, *, scope: str, key: str) -> Optional[str]:
+        row = (await self._conn.execute(sqlalchemy.text(GET_IDEMPOTENCY_RESPONSE), {"p1": scope, "p2": key})).first()
+        if row is None:
+            return None
+        return row[0]
+
+    async def save_idempotency_responses(self, *, keys: List[str], responses: List[str], scope: str) -> None:
+        await self._conn.execute(sqlalchemy.text(SAVE_IDEMPOTENCY_RESPONSES), {"p1": keys, "p2": responses, "p3": scope})
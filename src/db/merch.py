@@ -2,6 +2,7 @@
 # versions:
 #   sqlc v1.28.0
 # source: merch.sql
+import datetime
 import pydantic
 from typing import AsyncIterator, Iterator, Optional
 import uuid
@@ -13,12 +14,20 @@ from db import models
 
 
 CREATE_MERCH = """-- name: create_merch \\:one
-insert into merch (name, info, image_url, points_needed)
-values (:p1, :p2, :p3, :p4)
-returning id, name, info, image_url, points_needed
+insert into merch (name, info, image_url, points_needed, stock)
+values (:p1, :p2, :p3, :p4, :p5)
+returning id, name, info, image_url, points_needed, stock
 """
 
 
+class CreateMerchParams(pydantic.BaseModel):
+    name: str
+    info: str
+    image_url: str
+    points_needed: int
+    stock: int
+
+
 DELETE_MERCH = """-- name: delete_merch \\:exec
 delete from merch
 where id = :p1
@@ -26,28 +35,100 @@ returning id
 """
 
 
+GET_AFFORDABLE_MERCH = """-- name: get_affordable_merch \\:many
+WITH balance AS (
+    SELECT COALESCE(
+        (SELECT total_points FROM points WHERE user_id = :p1), 0
+    ) AS total_points
+)
+SELECT item.id, item.name, item.info, item.image_url, item.points_needed, item.stock,
+    balance.total_points, item.points_needed <= balance.total_points AS affordable
+FROM balance
+LEFT JOIN LATERAL (
+    (SELECT id, name, info, image_url, points_needed, stock FROM merch
+    WHERE stock > 0 AND points_needed <= balance.total_points)
+    UNION ALL
+    (SELECT id, name, info, image_url, points_needed, stock FROM merch
+    WHERE stock > 0 AND points_needed > balance.total_points
+    ORDER BY points_needed
+    LIMIT 1)
+) AS item ON true
+ORDER BY item.points_needed, item.name
+"""
+
+
+class GetAffordableMerchRow(pydantic.BaseModel):
+    id: Optional[uuid.UUID]
+    name: Optional[str]
+    info: Optional[str]
+    image_url: Optional[str]
+    points_needed: Optional[int]
+    stock: Optional[int]
+    total_points: int
+    affordable: Optional[bool]
+
+
 GET_ALL_MERCH = """-- name: get_all_merch \\:many
-select id, name, info, image_url, points_needed from merch
+select id, name, info, image_url, points_needed, stock from merch
 ORDER BY name
 """
 
 
 GET_MERCH_BY_ID = """-- name: get_merch_by_id \\:one
-select id, name, info, image_url, points_needed from merch
+select id, name, info, image_url, points_needed, stock from merch
 where id = :p1
 """
 
 
+SPEND_POINTS_ON_MERCH = """-- name: spend_points_on_merch \\:one
+WITH spent AS (
+    UPDATE points SET total_points = points.total_points - merch.points_needed
+    FROM merch
+    WHERE points.user_id = :p1
+        AND merch.id = :p2
+        AND merch.stock > 0
+        AND points.total_points >= merch.points_needed
+    RETURNING points.user_id, points.total_points, merch.id AS merch_id, merch.points_needed
+), entry AS (
+    INSERT INTO points_ledger (user_id, delta, reason)
+    SELECT user_id, -points_needed, 'merch' FROM spent
+), redemption AS (
+    INSERT INTO merch_redemption (merch_id, user_id, points)
+    SELECT merch_id, user_id, points_needed FROM spent
+    RETURNING id, created_at
+)
+SELECT redemption.id, spent.merch_id, spent.user_id, spent.points_needed AS points, spent.total_points, redemption.created_at
+FROM spent, redemption
+"""
+
+
+class SpendPointsOnMerchRow(pydantic.BaseModel):
+    id: int
+    merch_id: uuid.UUID
+    user_id: uuid.UUID
+    points: int
+    total_points: int
+    created_at: datetime.datetime
+
+
+TAKE_MERCH_STOCK = """-- name: take_merch_stock \\:one
+UPDATE merch SET stock = stock - 1
+WHERE id = :p1 AND stock > 0
+RETURNING stock
+"""
+
+
 UPDATE_MERCH = """-- name: update_merch \\:one
 update merch
 set
     name   = coalesce(:p2, name),
     info  = coalesce(:p3, info),
     image_url  = coalesce(:p4, image_url),
-    points_needed  = coalesce(:p5, points_needed)
+    points_needed  = coalesce(:p5, points_needed),
+    stock  = coalesce(:p6, stock)
 where
     id = :p1
-returning id, name, info, image_url, points_needed
+returning id, name, info, image_url, points_needed, stock
 """
 
 
@@ -57,18 +138,20 @@ class UpdateMerchParams(pydantic.BaseModel):
     info: Optional[str]
     image_url: Optional[str]
     points_needed: Optional[int]
+    stock: Optional[int]
 
 
 class Querier:
     def __init__(self, conn: sqlalchemy.engine.Connection):
         self._conn = conn
 
-    def create_merch(self, *, name: str, info: str, image_url: str, points_needed: int) -> Optional[models.Merch]:
+    def create_merch(self, arg: CreateMerchParams) -> Optional[models.Merch]:
         row = self._conn.execute(sqlalchemy.text(CREATE_MERCH), {
-            "p1": name,
-            "p2": info,
-            "p3": image_url,
-            "p4": points_needed,
+            "p1": arg.name,
+            "p2": arg.info,
+            "p3": arg.image_url,
+            "p4": arg.points_needed,
+            "p5": arg.stock,
         }).first()
         if row is None:
             return None
@@ -78,11 +161,26 @@ class Querier:
             info=row[2],
             image_url=row[3],
             points_needed=row[4],
+            stock=row[5],
         )
 
     def delete_merch(self, *, id: uuid.UUID) -> None:
         self._conn.execute(sqlalchemy.text(DELETE_MERCH), {"p1": id})
 
+    def get_affordable_merch(self, *, user_id: uuid.UUID) -> Iterator[GetAffordableMerchRow]:
+        result = self._conn.execute(sqlalchemy.text(GET_AFFORDABLE_MERCH), {"p1": user_id})
+        for row in result:
+            yield GetAffordableMerchRow(
+                id=row[0],
+                name=row[1],
+                info=row[2],
+                image_url=row[3],
+                points_needed=row[4],
+                stock=row[5],
+                total_points=row[6],
+                affordable=row[7],
+            )
+
     def get_all_merch(self) -> Iterator[models.Merch]:
         result = self._conn.execute(sqlalchemy.text(GET_ALL_MERCH))
         for row in result:
@@ -92,6 +190,7 @@ class Querier:
                 info=row[2],
                 image_url=row[3],
                 points_needed=row[4],
+                stock=row[5],
             )
 
     def get_merch_by_id(self, *, id: uuid.UUID) -> Optional[models.Merch]:
@@ -104,8 +203,28 @@ class Querier:
             info=row[2],
             image_url=row[3],
             points_needed=row[4],
+            stock=row[5],
         )
 
+    def spend_points_on_merch(self, *, user_id: uuid.UUID, merch_id: uuid.UUID) -> Optional[SpendPointsOnMerchRow]:
+        row = self._conn.execute(sqlalchemy.text(SPEND_POINTS_ON_MERCH), {"p1": user_id, "p2": merch_id}).first()
+        if row is None:
+            return None
+        return SpendPointsOnMerchRow(
+            id=row[0],
+            merch_id=row[1],
+            user_id=row[2],
+            points=row[3],
+            total_points=row[4],
+            created_at=row[5],
+        )
+
+    def take_merch_stock(self, *, id: uuid.UUID) -> Optional[int]:
+        row = self._conn.execute(sqlalchemy.text(TAKE_MERCH_STOCK), {"p1": id}).first()
+        if row is None:
+            return None
+        return row[0]
+
     def update_merch(self, arg: UpdateMerchParams) -> Optional[models.Merch]:
         row = self._conn.execute(sqlalchemy.text(UPDATE_MERCH), {
             "p1": arg.id,
@@ -113,6 +232,7 @@ class Querier:
             "p3": arg.info,
             "p4": arg.image_url,
             "p5": arg.points_needed,
+            "p6": arg.stock,
         }).first()
         if row is None:
             return None
@@ -122,6 +242,7 @@ class Querier:
             info=row[2],
             image_url=row[3],
             points_needed=row[4],
+            stock=row[5],
         )
 
 
@@ -129,12 +250,13 @@ class AsyncQuerier:
     def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
         self._conn = conn
 
-    async def create_merch(self, *, name: str, info: str, image_url: str, points_needed: int) -> Optional[models.Merch]:
+    async def create_merch(self, arg: CreateMerchParams) -> Optional[models.Merch]:
         row = (await self._conn.execute(sqlalchemy.text(CREATE_MERCH), {
-            "p1": name,
-            "p2": info,
-            "p3": image_url,
-            "p4": points_needed,
+            "p1": arg.name,
+            "p2": arg.info,
+            "p3": arg.image_url,
+            "p4": arg.points_needed,
+            "p5": arg.stock,
         })).first()
         if row is None:
             return None
@@ -144,11 +266,26 @@ class AsyncQuerier:
             info=row[2],
             image_url=row[3],
             points_needed=row[4],
+            stock=row[5],
         )
 
     async def delete_merch(self, *, id: uuid.UUID) -> None:
         await self._conn.execute(sqlalchemy.text(DELETE_MERCH), {"p1": id})
 
+    async def get_affordable_merch(self, *, user_id: uuid.UUID) -> AsyncIterator[GetAffordableMerchRow]:
+        result = await self._conn.stream(sqlalchemy.text(GET_AFFORDABLE_MERCH), {"p1": user_id})
+        async for row in result:
+            yield GetAffordableMerchRow(
+                id=row[0],
+                name=row[1],
+                info=row[2],
+                image_url=row[3],
+                points_needed=row[4],
+                stock=row[5],
+                total_points=row[6],
+                affordable=row[7],
+            )
+
     async def get_all_merch(self) -> AsyncIterator[models.Merch]:
         result = await self._conn.stream(sqlalchemy.text(GET_ALL_MERCH))
         async for row in result:
@@ -158,6 +295,7 @@ class AsyncQuerier:
                 info=row[2],
                 image_url=row[3],
                 points_needed=row[4],
+                stock=row[5],
             )
 
     async def get_merch_by_id(self, *, id: uuid.UUID) -> Optional[models.Merch]:
@@ -170,8 +308,28 @@ class AsyncQuerier:
             info=row[2],
             image_url=row[3],
             points_needed=row[4],
+            stock=row[5],
+        )
+
+    async def spend_points_on_merch(self, *, user_id: uuid.UUID, merch_id: uuid.UUID) -> Optional[SpendPointsOnMerchRow]:
+        row = (await self._conn.execute(sqlalchemy.text(SPEND_POINTS_ON_MERCH), {"p1": user_id, "p2": merch_id})).first()
+        if row is None:
+            return None
+        return SpendPointsOnMerchRow(
+            id=row[0],
+            merch_id=row[1],
+            user_id=row[2],
+            points=row[3],
+            total_points=row[4],
+            created_at=row[5],
         )
 
+    async def take_merch_stock(self, *, id: uuid.UUID) -> Optional[int]:
+        row = (await self._conn.execute(sqlalchemy.text(TAKE_MERCH_STOCK), {"p1": id})).first()
+        if row is None:
+            return None
+        return row[0]
+
     async def update_merch(self, arg: UpdateMerchParams) -> Optional[models.Merch]:
         row = (await self._conn.execute(sqlalchemy.text(UPDATE_MERCH), {
             "p1": arg.id,
@@ -179,6 +337,7 @@ class AsyncQuerier:
             "p3": arg.info,
             "p4": arg.image_url,
             "p5": arg.points_needed,
+            "p6": arg.stock,
         })).first()
         if row is None:
             return None
@@ -188,4 +347,5 @@ class AsyncQuerier:
             info=row[2],
             image_url=row[3],
             points_needed=row[4],
+            stock=row[5],
         )
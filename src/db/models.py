@@ -3,7 +3,7 @@
 #   sqlc v1.28.0
 import datetime
 import pydantic
-from typing import Optional
+from typing import List, Optional
 import uuid
 
 
@@ -14,6 +14,19 @@ class Analytic(pydantic.BaseModel):
     time: datetime.datetime
 
 
+class AnalyticsHourly(pydantic.BaseModel):
+    bucket: datetime.datetime
+    stand_id: Optional[uuid.UUID]
+    count: int
+    visitors: Optional[List[int]]
+    visitors_stale: bool
+
+
+class AnalyticsVisit(pydantic.BaseModel):
+    id: uuid.UUID
+    time: datetime.datetime
+
+
 class Client(pydantic.BaseModel):
     id: uuid.UUID
     name: str
@@ -33,12 +46,35 @@ class Event(pydantic.BaseModel):
     stand_id: Optional[uuid.UUID]
 
 
+class EventParticipation(pydantic.BaseModel):
+    event_id: uuid.UUID
+    user_id: uuid.UUID
+    points: int
+    created_at: datetime.datetime
+
+
+class Idempotency(pydantic.BaseModel):
+    scope: str
+    key: str
+    response: Optional[str]
+    created_at: datetime.datetime
+
+
 class Merch(pydantic.BaseModel):
     id: uuid.UUID
     name: str
     info: str
     image_url: str
     points_needed: int
+    stock: int
+
+
+class MerchRedemption(pydantic.BaseModel):
+    id: int
+    merch_id: Optional[uuid.UUID]
+    user_id: uuid.UUID
+    points: int
+    created_at: datetime.datetime
 
 
 class Point(pydantic.BaseModel):
@@ -46,6 +82,16 @@ class Point(pydantic.BaseModel):
     total_points: int
 
 
+class PointsLedger(pydantic.BaseModel):
+    id: int
+    user_id: uuid.UUID
+    delta: int
+    reason: str
+    event_id: Optional[uuid.UUID]
+    idempotency_key: Optional[str]
+    created_at: datetime.datetime
+
+
 class Stand(pydantic.BaseModel):
     id: uuid.UUID
     name: str
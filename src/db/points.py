@@ -2,7 +2,8 @@
 # versions:
 #   sqlc v1.28.0
 # source: points.sql
-from typing import Optional
+import pydantic
+from typing import AsyncIterator, Iterator, List, Optional
 import uuid
 
 import sqlalchemy
@@ -11,27 +12,196 @@ import sqlalchemy.ext.asyncio
 from db import models
 
 
-GET_POINTS_BY_USER_ID = """-- name: get_points_by_user_id \\:one
-SELECT user_id, total_points FROM points
-WHERE user_id = :p1
+AWARD_POINTS = """-- name: award_points \\:one
+WITH entry AS (
+    INSERT INTO points_ledger (user_id, delta, reason, event_id, idempotency_key)
+    VALUES (:p1, :p2, :p3, :p4, :p5)
+    ON CONFLICT (idempotency_key) DO NOTHING
+    RETURNING user_id, delta
+)
+INSERT INTO points (user_id, total_points)
+SELECT user_id, delta FROM entry
+ON CONFLICT (user_id) DO UPDATE SET
+    total_points = points.total_points + EXCLUDED.total_points
+RETURNING user_id, total_points
 """
 
 
-UPSERT_POINTS = """-- name: upsert_points \\:one
+class AwardPointsParams(pydantic.BaseModel):
+    user_id: uuid.UUID
+    delta: int
+    reason: str
+    event_id: Optional[uuid.UUID]
+    idempotency_key: Optional[str]
+
+
+AWARD_POINTS_BATCH = """-- name: award_points_batch \\:many
+WITH entries AS (
+    INSERT INTO points_ledger (user_id, delta, reason, event_id)
+    SELECT v.user_id, v.delta, :p1, :p2 FROM unnest(
+        CAST(:p3 AS uuid[]),
+        CAST(:p4 AS integer[])
+    ) AS v(user_id, delta)
+    RETURNING user_id, delta
+)
 INSERT INTO points (user_id, total_points)
-VALUES (:p1, :p2)
+SELECT user_id, SUM(delta) FROM entries
+GROUP BY user_id
+ORDER BY user_id
 ON CONFLICT (user_id) DO UPDATE SET
     total_points = points.total_points + EXCLUDED.total_points
 RETURNING user_id, total_points
 """
 
 
+COMPLETE_EVENT = """-- name: complete_event \\:one
+WITH participation AS (
+    INSERT INTO event_participation (event_id, user_id, points)
+    SELECT id, :p1, points FROM event
+    WHERE id = :p2
+    ON CONFLICT (event_id, user_id) DO NOTHING
+    RETURNING event_id, user_id, points
+), entry AS (
+    INSERT INTO points_ledger (user_id, delta, reason, event_id)
+    SELECT user_id, points, 'event', event_id FROM participation
+    RETURNING user_id, delta
+)
+INSERT INTO points (user_id, total_points)
+SELECT user_id, delta FROM entry
+ON CONFLICT (user_id) DO UPDATE SET
+    total_points = points.total_points + EXCLUDED.total_points
+RETURNING user_id, total_points
+"""
+
+
+COMPLETE_EVENT_BATCH = """-- name: complete_event_batch \\:many
+WITH participation AS (
+    INSERT INTO event_participation (event_id, user_id, points)
+    SELECT e.id, u.user_id, e.points
+    FROM event e
+    CROSS JOIN (
+        SELECT DISTINCT user_id FROM unnest(CAST(:p1 AS uuid[])) AS v(user_id)
+    ) AS u
+    WHERE e.id = :p2
+    ORDER BY u.user_id
+    ON CONFLICT (event_id, user_id) DO NOTHING
+    RETURNING event_id, user_id, points
+), entries AS (
+    INSERT INTO points_ledger (user_id, delta, reason, event_id)
+    SELECT user_id, points, 'event', event_id FROM participation
+    RETURNING user_id, delta
+)
+INSERT INTO points (user_id, total_points)
+SELECT user_id, delta FROM entries
+ORDER BY user_id
+ON CONFLICT (user_id) DO UPDATE SET
+    total_points = points.total_points + EXCLUDED.total_points
+RETURNING user_id, total_points
+"""
+
+
+EVENT_EXISTS = """-- name: event_exists \\:one
+SELECT EXISTS (SELECT 1 FROM event WHERE id = :p1)
+"""
+
+
+GET_POINTS_BY_USER_ID = """-- name: get_points_by_user_id \\:one
+SELECT user_id, total_points FROM points
+WHERE user_id = :p1
+"""
+
+
+GET_POINTS_HISTORY = """-- name: get_points_history \\:many
+SELECT id, user_id, delta, reason, event_id, idempotency_key, created_at FROM points_ledger
+WHERE user_id = :p1 AND id < :p2
+ORDER BY id DESC
+LIMIT :p3
+"""
+
+
+LIST_POINTS_RANKED = """-- name: list_points_ranked \\:many
+SELECT user_id, total_points FROM points
+ORDER BY total_points DESC, user_id
+LIMIT :p1
+"""
+
+
+LIST_POINTS_USER_IDS = """-- name: list_points_user_ids \\:many
+SELECT user_id FROM points
+WHERE user_id > :p1
+ORDER BY user_id
+LIMIT :p2
+"""
+
+
+LOCK_POINTS = """-- name: lock_points \\:exec
+SELECT 1 FROM points
+WHERE user_id = ANY(CAST(:p1 AS uuid[]))
+ORDER BY user_id
+FOR UPDATE
+"""
+
+
+NOTIFY_POINTS = """-- name: notify_points \\:exec
+SELECT pg_notify('points', :p1)
+"""
+
+
+RECONCILE_POINTS = """-- name: reconcile_points \\:many
+WITH computed AS (
+    SELECT p.user_id, p.total_points AS old_total, CAST(COALESCE(SUM(l.delta), 0) AS integer) AS total
+    FROM points p
+    LEFT JOIN points_ledger l ON l.user_id = p.user_id
+    WHERE p.user_id = ANY(CAST(:p1 AS uuid[]))
+    GROUP BY p.user_id
+)
+UPDATE points SET total_points = computed.total
+FROM computed
+WHERE points.user_id = computed.user_id AND points.total_points <> computed.total
+RETURNING points.user_id, computed.old_total, points.total_points
+"""
+
+
+class ReconcilePointsRow(pydantic.BaseModel):
+    user_id: uuid.UUID
+    old_total: int
+    total_points: int
+
+
 class Querier:
     def __init__(self, conn: sqlalchemy.engine.Connection):
         self._conn = conn
 
-    def get_points_by_user_id(self, *, user_id: uuid.UUID) -> Optional[models.Point]:
-        row = self._conn.execute(sqlalchemy.text(GET_POINTS_BY_USER_ID), {"p1": user_id}).first()
+    def award_points(self, arg: AwardPointsParams) -> Optional[models.Point]:
+        row = self._conn.execute(sqlalchemy.text(AWARD_POINTS), {
+            "p1": arg.user_id,
+            "p2": arg.delta,
+            "p3": arg.reason,
+            "p4": arg.event_id,
+            "p5": arg.idempotency_key,
+        }).first()
+        if row is None:
+            return None
+        return models.Point(
+            user_id=row[0],
+            total_points=row[1],
+        )
+
+    def award_points_batch(self, *, reason: str, event_id: Optional[uuid.UUID], user_ids: List[uuid.UUID], deltas: List[int]) -> Iterator[models.Point]:
+        result = self._conn.execute(sqlalchemy.text(AWARD_POINTS_BATCH), {
+            "p1": reason,
+            "p2": event_id,
+            "p3": user_ids,
+            "p4": deltas,
+        })
+        for row in result:
+            yield models.Point(
+                user_id=row[0],
+                total_points=row[1],
+            )
+
+    def complete_event(self, *, user_id: uuid.UUID, event_id: uuid.UUID) -> Optional[models.Point]:
+        row = self._conn.execute(sqlalchemy.text(COMPLETE_EVENT), {"p1": user_id, "p2": event_id}).first()
         if row is None:
             return None
         return models.Point(
@@ -39,8 +209,22 @@ class Querier:
             total_points=row[1],
         )
 
-    def upsert_points(self, *, user_id: uuid.UUID, total_points: int) -> Optional[models.Point]:
-        row = self._conn.execute(sqlalchemy.text(UPSERT_POINTS), {"p1": user_id, "p2": total_points}).first()
+    def complete_event_batch(self, *, user_ids: List[uuid.UUID], event_id: uuid.UUID) -> Iterator[models.Point]:
+        result = self._conn.execute(sqlalchemy.text(COMPLETE_EVENT_BATCH), {"p1": user_ids, "p2": event_id})
+        for row in result:
+            yield models.Point(
+                user_id=row[0],
+                total_points=row[1],
+            )
+
+    def event_exists(self, *, event_id: uuid.UUID) -> Optional[bool]:
+        row = self._conn.execute(sqlalchemy.text(EVENT_EXISTS), {"p1": event_id}).first()
+        if row is None:
+            return None
+        return row[0]
+
+    def get_points_by_user_id(self, *, user_id: uuid.UUID) -> Optional[models.Point]:
+        row = self._conn.execute(sqlalchemy.text(GET_POINTS_BY_USER_ID), {"p1": user_id}).first()
         if row is None:
             return None
         return models.Point(
@@ -48,13 +232,82 @@ class Querier:
             total_points=row[1],
         )
 
+    def get_points_history(self, *, user_id: uuid.UUID, before: int, page_size: int) -> Iterator[models.PointsLedger]:
+        result = self._conn.execute(sqlalchemy.text(GET_POINTS_HISTORY), {"p1": user_id, "p2": before, "p3": page_size})
+        for row in result:
+            yield models.PointsLedger(
+                id=row[0],
+                user_id=row[1],
+                delta=row[2],
+                reason=row[3],
+                event_id=row[4],
+                idempotency_key=row[5],
+                created_at=row[6],
+            )
+
+    def list_points_ranked(self, *, page_size: Optional[int]) -> Iterator[models.Point]:
+        result = self._conn.execute(sqlalchemy.text(LIST_POINTS_RANKED), {"p1": page_size})
+        for row in result:
+            yield models.Point(
+                user_id=row[0],
+                total_points=row[1],
+            )
+
+    def list_points_user_ids(self, *, after: uuid.UUID, batch_size: int) -> Iterator[uuid.UUID]:
+        result = self._conn.execute(sqlalchemy.text(LIST_POINTS_USER_IDS), {"p1": after, "p2": batch_size})
+        for row in result:
+            yield row[0]
+
+    def lock_points(self, *, user_ids: List[uuid.UUID]) -> None:
+        self._conn.execute(sqlalchemy.text(LOCK_POINTS), {"p1": user_ids})
+
+    def notify_points(self, *, payload: str) -> None:
+        self._conn.execute(sqlalchemy.text(NOTIFY_POINTS), {"p1": payload})
+
+    def reconcile_points(self, *, user_ids: List[uuid.UUID]) -> Iterator[ReconcilePointsRow]:
+        result = self._conn.execute(sqlalchemy.text(RECONCILE_POINTS), {"p1": user_ids})
+        for row in result:
+            yield ReconcilePointsRow(
+                user_id=row[0],
+                old_total=row[1],
+                total_points=row[2],
+            )
+
 
 class AsyncQuerier:
     def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
         self._conn = conn
 
-    async def get_points_by_user_id(self, *, user_id: uuid.UUID) -> Optional[models.Point]:
-        row = (await self._conn.execute(sqlalchemy.text(GET_POINTS_BY_USER_ID), {"p1": user_id})).first()
+    async def award_points(self, arg: AwardPointsParams) -> Optional[models.Point]:
+        row = (await self._conn.execute(sqlalchemy.text(AWARD_POINTS), {
+            "p1": arg.user_id,
+            "p2": arg.delta,
+            "p3": arg.reason,
+            "p4": arg.event_id,
+            "p5": arg.idempotency_key,
+        })).first()
+        if row is None:
+            return None
+        return models.Point(
+            user_id=row[0],
+            total_points=row[1],
+        )
+
+    async def award_points_batch(self, *, reason: str, event_id: Optional[uuid.UUID], user_ids: List[uuid.UUID], deltas: List[int]) -> AsyncIterator[models.Point]:
+        result = await self._conn.stream(sqlalchemy.text(AWARD_POINTS_BATCH), {
+            "p1": reason,
+            "p2": event_id,
+            "p3": user_ids,
+            "p4": deltas,
+        })
+        async for row in result:
+            yield models.Point(
+                user_id=row[0],
+                total_points=row[1],
+            )
+
+    async def complete_event(self, *, user_id: uuid.UUID, event_id: uuid.UUID) -> Optional[models.Point]:
+        row = (await self._conn.execute(sqlalchemy.text(COMPLETE_EVENT), {"p1": user_id, "p2": event_id})).first()
         if row is None:
             return None
         return models.Point(
@@ -62,11 +315,66 @@ class AsyncQuerier:
             total_points=row[1],
         )
 
-    async def upsert_points(self, *, user_id: uuid.UUID, total_points: int) -> Optional[models.Point]:
-        row = (await self._conn.execute(sqlalchemy.text(UPSERT_POINTS), {"p1": user_id, "p2": total_points})).first()
+    async def complete_event_batch(self, *, user_ids: List[uuid.UUID], event_id: uuid.UUID) -> AsyncIterator[models.Point]:
+        result = await self._conn.stream(sqlalchemy.text(COMPLETE_EVENT_BATCH), {"p1": user_ids, "p2": event_id})
+        async for row in result:
+            yield models.Point(
+                user_id=row[0],
+                total_points=row[1],
+            )
+
+    async def event_exists(self, *, event_id: uuid.UUID) -> Optional[bool]:
+        row = (await self._conn.execute(sqlalchemy.text(EVENT_EXISTS), {"p1": event_id})).first()
+        if row is None:
+            return None
+        return row[0]
+
+    async def get_points_by_user_id(self, *, user_id: uuid.UUID) -> Optional[models.Point]:
+        row = (await self._conn.execute(sqlalchemy.text(GET_POINTS_BY_USER_ID), {"p1": user_id})).first()
         if row is None:
             return None
         return models.Point(
             user_id=row[0],
             total_points=row[1],
         )
+
+    async def get_points_history(self, *, user_id: uuid.UUID, before: int, page_size: int) -> AsyncIterator[models.PointsLedger]:
+        result = await self._conn.stream(sqlalchemy.text(GET_POINTS_HISTORY), {"p1": user_id, "p2": before, "p3": page_size})
+        async for row in result:
+            yield models.PointsLedger(
+                id=row[0],
+                user_id=row[1],
+                delta=row[2],
+                reason=row[3],
+                event_id=row[4],
+                idempotency_key=row[5],
+                created_at=row[6],
+            )
+
+    async def list_points_ranked(self, *, page_size: Optional[int]) -> AsyncIterator[models.Point]:
+        result = await self._conn.stream(sqlalchemy.text(LIST_POINTS_RANKED), {"p1": page_size})
+        async for row in result:
+            yield models.Point(
+                user_id=row[0],
+                total_points=row[1],
+            )
+
+    async def list_points_user_ids(self, *, after: uuid.UUID, batch_size: int) -> AsyncIterator[uuid.UUID]:
+        result = await self._conn.stream(sqlalchemy.text(LIST_POINTS_USER_IDS), {"p1": after, "p2": batch_size})
+        async for row in result:
+            yield row[0]
+
+    async def lock_points(self, *, user_ids: List[uuid.UUID]) -> None:
+        await self._conn.execute(sqlalchemy.text(LOCK_POINTS), {"p1": user_ids})
+
+    async def notify_points(self, *, payload: str) -> None:
+        await self._conn.execute(sqlalchemy.text(NOTIFY_POINTS), {"p1": payload})
+
+    async def reconcile_points(self, *, user_ids: List[uuid.UUID]) -> AsyncIterator[ReconcilePointsRow]:
+        result = await self._conn.stream(sqlalchemy.text(RECONCILE_POINTS), {"p1": user_ids})
+        async for row in result:
+            yield ReconcilePointsRow(
+                user_id=row[0],
+                old_total=row[1],
+                total_points=row[2],
+            )
@@ -1,20 +1,421 @@
+import collections
+import datetime
+import decimal
+import logging
+import uuid
+from collections.abc import AsyncIterator
+
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from internal.entities.analytics import CreateAnalytic, AnalyticGrouped
+from internal.cases import idempotency, live
+from internal.config import settings
+from internal.entities.analytics import (
+    CreateAnalytic, AnalyticGrouped, AnalyticsFilter, UniqueMode, UniqueVisitors
+)
+from internal.infra import hll
+from internal.infra.buffer import WriteBuffer
+from internal.infra.cache import TTLCache
+from internal.infra.db import SessionLocal
+from internal.infra.periodic import Periodic
 from db import analytics as a, models as m
 
+logger = logging.getLogger(__name__)
+
+SCOPE = "analytics"
+
+
+async def create(
+    conn: AsyncSession, ent: CreateAnalytic, idempotency_key: str | None = None
+) -> m.Analytic | None:
+    replay = idempotency.cached(SCOPE, idempotency_key)
+    if replay is not None:
+        return m.Analytic(**replay)
+    row = _recent(ent.user_id, ent.stand_id)
+    if row is not None:
+        return row
+    async with conn.begin():
+        connection = await conn.connection()
+        q = a.AsyncQuerier(connection)
+        if idempotency_key is not None and not await idempotency.claim(
+            connection, SCOPE, idempotency_key
+        ):
+            return m.Analytic(**await idempotency.stored(connection, SCOPE, idempotency_key))
+        row = await _existing(q, ent.user_id, ent.stand_id)
+        if row is None:
+            # stamped here rather than by the database, so both paths and
+            # the dedup window use the same UTC clock
+            row = await q.create_analytics(
+                id=ent.id, time=_now(), user_id=ent.user_id, stand_id=ent.stand_id
+            )
+            if row is not None:
+                await _increment_hourly(q, [row], sketch=False)
+                await live.publish(q, [row])
+            elif ent.id is not None:
+                # a retry of a visit already stored under this id
+                row = await q.get_analytic(id=ent.id)
+        if row is not None and idempotency_key is not None:
+            await idempotency.save(
+                connection, SCOPE, {idempotency_key: row.model_dump(mode="json")}
+            )
+    if row is not None:
+        if idempotency_key is not None:
+            idempotency.remember(SCOPE, idempotency_key, row.model_dump(mode="json"))
+        _remember(row)
+        live.record([row])
+    return row
+
+
+async def create_many(
+    conn: AsyncSession, rows: list[m.Analytic], keys: list[str | None] | None = None
+) -> int:
+    async with conn.begin():
+        connection = await conn.connection()
+        q = a.AsyncQuerier(connection)
+        responses = {}
+        if keys is not None:
+            # rows whose key another request already claimed were written
+            # (or are being written) by that request
+            # a key repeated within the batch is one request sent twice:
+            # only its first row is written and stored as the response
+            keyed: dict[str, m.Analytic] = {}
+            for row, key in zip(rows, keys):
+                if key is not None:
+                    keyed.setdefault(key, row)
+            claimed = await idempotency.claim_many(connection, SCOPE, list(keyed))
+            responses = {key: keyed[key].model_dump(mode="json") for key in claimed}
+            seen: set[str] = set()
+            kept = []
+            for row, key in zip(rows, keys):
+                if key is not None:
+                    if key not in claimed or key in seen:
+                        continue
+                    seen.add(key)
+                kept.append(row)
+            rows = kept
+        rows = _dedup_batch(rows)
+        if settings.analytics_dedup_seconds > 0:
+            keyed_rows = [row for row in rows if row.user_id is not None and row.stand_id is not None]
+            await q.lock_analytics_visits(
+                user_ids=[row.user_id for row in keyed_rows],
+                stand_ids=[row.stand_id for row in keyed_rows],
+            )
+        # rows already seen within the dedup window are skipped by the insert,
+        # so only the returned rows feed the rollup and live counters
+        created = [row async for row in q.create_analytics_batch(a.CreateAnalyticsBatchParams(
+            ids=[row.id for row in rows],
+            user_ids=[row.user_id for row in rows],
+            stand_ids=[row.stand_id for row in rows],
+            times=[row.time for row in rows],
+            dedup_seconds=settings.analytics_dedup_seconds,
+        ))]
+        await _increment_hourly(q, created)
+        await live.publish(q, created)
+        await idempotency.save(connection, SCOPE, responses)
+        return len(created)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+
+
+recent: TTLCache[tuple, m.Analytic] = TTLCache(
+    settings.analytics_dedup_cache_size, settings.analytics_dedup_seconds
+)
+
+
+def _recent(user_id: uuid.UUID | None, stand_id: uuid.UUID | None) -> m.Analytic | None:
+    if settings.analytics_dedup_seconds <= 0:
+        return None
+    return recent.get((user_id, stand_id))
+
+
+def _remember(row: m.Analytic) -> None:
+    if settings.analytics_dedup_seconds <= 0:
+        return
+    age = (_now() - row.time).total_seconds()
+    recent.set((row.user_id, row.stand_id), row, ttl=settings.analytics_dedup_seconds - age)
+
+
+async def _existing(
+    q: a.AsyncQuerier, user_id: uuid.UUID, stand_id: uuid.UUID
+) -> m.Analytic | None:
+    if settings.analytics_dedup_seconds <= 0:
+        return None
+    # serializes concurrent scans of the same badge across workers
+    await q.lock_analytics_visits(user_ids=[user_id], stand_ids=[stand_id])
+    return await q.get_recent_analytic(
+        user_id=user_id,
+        stand_id=stand_id,
+        since=_now() - datetime.timedelta(seconds=settings.analytics_dedup_seconds),
+    )
 
-async def create(conn: AsyncSession, ent: CreateAnalytic) -> m.Analytic | None:
+
+def _dedup_batch(rows: list[m.Analytic]) -> list[m.Analytic]:
+    window = datetime.timedelta(seconds=settings.analytics_dedup_seconds)
+    if not window:
+        return rows
+    kept: list[m.Analytic] = []
+    last: dict[tuple, datetime.datetime] = {}
+    for row in sorted(rows, key=lambda row: row.time):
+        key = (row.user_id, row.stand_id)
+        if key in last and row.time - last[key] < window:
+            continue
+        last[key] = row.time
+        kept.append(row)
+    return kept
+
+
+def _hour(time: datetime.datetime) -> datetime.datetime:
+    return time.replace(minute=0, second=0, microsecond=0)
+
+
+async def _increment_hourly(q: a.AsyncQuerier, rows: list[m.Analytic], sketch: bool = True) -> None:
+    groups: dict[tuple, list[m.Analytic]] = collections.defaultdict(list)
+    for row in rows:
+        groups[_hour(row.time), row.stand_id].append(row)
+    # a fixed order keeps concurrent flushes from deadlocking on rollup rows
+    for bucket, stand_id in sorted(groups, key=lambda k: (k[0], str(k[1]))):
+        group = groups[bucket, stand_id]
+        if not sketch:
+            # merging rewrites the whole register array, too much for one
+            # visit; the row is marked stale and refresh_sketches rebuilds it
+            await q.increment_analytics_hourly_count(
+                bucket=bucket, stand_id=stand_id, count=len(group)
+            )
+            continue
+        await q.increment_analytics_hourly(
+            bucket=bucket,
+            stand_id=stand_id,
+            count=len(group),
+            user_ids=[row.user_id for row in group if row.user_id is not None],
+        )
+
+
+async def refresh_sketches(conn: AsyncSession) -> int:
     async with conn.begin():
         q = a.AsyncQuerier(await conn.connection())
-        return await q.create_analytics(user_id=ent.user_id, stand_id=ent.stand_id)
+        return await q.refresh_analytics_sketches()
+
+
+async def _refresh_sketches() -> None:
+    async with SessionLocal() as session:
+        await refresh_sketches(session)
+
+
+sketcher = Periodic(_refresh_sketches, settings.analytics_sketch_interval)
+
+
+async def _flush(items: list[tuple[m.Analytic, str | None]]) -> None:
+    async with SessionLocal() as session:
+        try:
+            await create_many(session, [row for row, _ in items], [key for _, key in items])
+        except IntegrityError:
+            # the insert already skips unknown users and stands and repeated
+            # ids, so this is a row racing a delete; retry one by one so only
+            # that row is lost, not the whole acknowledged batch
+            for row, key in items:
+                try:
+                    await create_many(session, [row], [key])
+                except IntegrityError:
+                    logger.warning("dropped analytics row %s", row.id)
+                    buffer.dropped += 1
+
+
+buffer: WriteBuffer[tuple[m.Analytic, str | None]] = WriteBuffer(
+    _flush,
+    max_size=settings.analytics_buffer_size,
+    max_batch=settings.analytics_batch_size,
+    interval=settings.analytics_flush_interval,
+    put_timeout=settings.analytics_enqueue_timeout,
+)
+
+
+async def enqueue(
+    ent: CreateAnalytic, idempotency_key: str | None = None
+) -> tuple[m.Analytic, bool]:
+    replay = idempotency.cached(SCOPE, idempotency_key)
+    if replay is not None:
+        return m.Analytic(**replay), False
+    row = _recent(ent.user_id, ent.stand_id)
+    if row is not None:
+        return row, False
+    row = m.Analytic(
+        id=ent.id or uuid.uuid4(),
+        user_id=ent.user_id,
+        stand_id=ent.stand_id,
+        time=_now(),
+    )
+    await buffer.put((row, idempotency_key))
+    # retries reaching this worker are answered from memory; the flush
+    # drops keys another worker has already claimed
+    if idempotency_key is not None:
+        idempotency.remember(SCOPE, idempotency_key, row.model_dump(mode="json"))
+    _remember(row)
+    live.record([row])
+    return row, True
 
 
-async def get_grouped(conn: AsyncSession) -> list[AnalyticGrouped]:
+def _naive_utc(time: datetime.datetime | None, default: datetime.datetime) -> datetime.datetime:
+    if time is None:
+        return default
+    if time.tzinfo is not None:
+        time = time.astimezone(datetime.UTC).replace(tzinfo=None)
+    return time
+
+
+def _hour_aligned(f: AnalyticsFilter, time_from: datetime.datetime, time_to: datetime.datetime) -> bool:
+    return (
+        f.bucket != "minute"
+        and time_from in (datetime.datetime.min, _hour(time_from))
+        and time_to in (datetime.datetime.max, _hour(time_to))
+    )
+
+
+def _from_rollup(f: AnalyticsFilter, time_from: datetime.datetime, time_to: datetime.datetime) -> bool:
+    # the rollup has no user dimension and only hour resolution
+    return f.user_id is None and _hour_aligned(f, time_from, time_to)
+
+
+def _rows(f: AnalyticsFilter, q: a.AsyncQuerier, time_from: datetime.datetime, time_to: datetime.datetime):
+    if _from_rollup(f, time_from, time_to):
+        return q.get_analytics_hourly_range(
+            bucket_size=f.bucket, time_from=time_from, time_to=time_to, stand_id=f.stand_id
+        )
+    if f.stand_id is not None:
+        return q.get_analytics_bucketed_by_stand(a.GetAnalyticsBucketedByStandParams(
+            bucket_size=f.bucket, stand_id=f.stand_id,
+            time_from=time_from, time_to=time_to, user_id=f.user_id,
+        ))
+    if f.user_id is not None:
+        return q.get_analytics_bucketed_by_user(
+            bucket_size=f.bucket, user_id=f.user_id, time_from=time_from, time_to=time_to
+        )
+    return q.get_analytics_bucketed(
+        bucket_size=f.bucket, time_from=time_from, time_to=time_to
+    )
+
+
+async def get_grouped(conn: AsyncSession, f: AnalyticsFilter = AnalyticsFilter()) -> list[AnalyticGrouped]:
+    time_from = _naive_utc(f.time_from, datetime.datetime.min)
+    time_to = _naive_utc(f.time_to, datetime.datetime.max)
     async with conn.begin():
         q = a.AsyncQuerier(await conn.connection())
         rows = []
-        async for row in q.get_analytics_grouped():
-            rows.append(AnalyticGrouped(date=row.date, hour=row.hour, count=row.count))
+        async for row in _rows(f, q, time_from, time_to):
+            rows.append(AnalyticGrouped(
+                bucket=row.bucket,
+                date=row.bucket.date(),
+                hour=decimal.Decimal(row.bucket.hour),
+                count=row.count,
+            ))
         return rows
 
+
+def _exact_unique(
+    f: AnalyticsFilter, mode: UniqueMode, time_from: datetime.datetime, time_to: datetime.datetime
+) -> bool:
+    if mode == "exact" or not _hour_aligned(f, time_from, time_to):
+        return True
+    if mode == "approx" or time_from == datetime.datetime.min or time_to == datetime.datetime.max:
+        return False
+    return time_to - time_from <= datetime.timedelta(hours=settings.analytics_exact_unique_hours)
+
+
+async def get_unique(
+    conn: AsyncSession, f: AnalyticsFilter = AnalyticsFilter(), mode: UniqueMode = "auto"
+) -> list[UniqueVisitors]:
+    time_from = _naive_utc(f.time_from, datetime.datetime.min)
+    time_to = _naive_utc(f.time_to, datetime.datetime.max)
+    exact = _exact_unique(f, mode, time_from, time_to)
+    async with conn.begin():
+        q = a.AsyncQuerier(await conn.connection())
+        if exact:
+            return [
+                UniqueVisitors(bucket=row.bucket, visitors=row.visitors, exact=True, error=0.0)
+                async for row in q.get_unique_visitors_exact(
+                    bucket_size=f.bucket, time_from=time_from, time_to=time_to, stand_id=f.stand_id
+                )
+            ]
+        return [
+            UniqueVisitors(
+                bucket=row.bucket, visitors=hll.estimate(row.visitors), exact=False, error=hll.ERROR
+            )
+            async for row in q.get_unique_visitors_sketch(
+                bucket_size=f.bucket, time_from=time_from, time_to=time_to, stand_id=f.stand_id
+            )
+        ]
+
+
+def _today() -> datetime.date:
+    # visit times are naive UTC, so partitions cover UTC days
+    return _now().date()
+
+
+def _retained_since() -> datetime.datetime:
+    # the one retention boundary: the rollup rebuild and the partition drop
+    # both use it, so they cannot disagree about a day around midnight
+    if settings.analytics_retention_days <= 0:
+        return datetime.datetime.min
+    day = _today() - datetime.timedelta(days=settings.analytics_retention_days)
+    return datetime.datetime.combine(day, datetime.time())
+
+
+async def rebuild_hourly(conn: AsyncSession) -> int:
+    # buckets older than the retention window outlive their raw partitions
+    since = _retained_since()
+    async with conn.begin():
+        q = a.AsyncQuerier(await conn.connection())
+        await q.lock_analytics_hourly()
+        await q.delete_analytics_hourly(since=since)
+        return await q.rebuild_analytics_hourly(since=since)
+
+
+async def check_hourly(conn: AsyncSession) -> list[a.CheckAnalyticsHourlyRow]:
+    async with conn.begin():
+        q = a.AsyncQuerier(await conn.connection())
+        return [row async for row in q.check_analytics_hourly(since=_retained_since())]
+
+
+async def maintain_partitions(conn: AsyncSession) -> tuple[int, list[str]]:
+    async with conn.begin():
+        q = a.AsyncQuerier(await conn.connection())
+        created = await q.ensure_analytics_partitions(
+            today=_today(), days_ahead=settings.analytics_partitions_ahead
+        )
+        dropped = []
+        if settings.analytics_retention_days > 0:
+            async for name in q.drop_analytics_partitions(cutoff=_retained_since().date()):
+                if name is not None:
+                    dropped.append(name)
+        return created or 0, dropped
+
+
+async def _maintain() -> None:
+    async with SessionLocal() as session:
+        await maintain_partitions(session)
+
+
+maintenance = Periodic(_maintain, settings.analytics_maintenance_interval)
+
+
+async def export(
+    time_from: datetime.datetime | None,
+    time_to: datetime.datetime | None,
+    stand_names: bool,
+) -> AsyncIterator[m.Analytic | a.ExportAnalyticsWithStandsRow]:
+    time_from = _naive_utc(time_from, datetime.datetime.min)
+    time_to = _naive_utc(time_to, datetime.datetime.max)
+    # the response outlives the request scope, so the export holds its own
+    # session; yield_per keeps the asyncpg cursor fetching in fixed chunks
+    async with SessionLocal() as session, session.begin():
+        conn = await session.connection(
+            execution_options={"yield_per": settings.analytics_export_chunk}
+        )
+        q = a.AsyncQuerier(conn)
+        if stand_names:
+            rows = q.export_analytics_with_stands(time_from=time_from, time_to=time_to)
+        else:
+            rows = q.export_analytics(time_from=time_from, time_to=time_to)
+        async for row in rows:
+            yield row
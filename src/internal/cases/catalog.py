@@ -0,0 +1,94 @@
+import hashlib
+import uuid
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from internal.config import settings
+from internal.infra.cache import TTLCache
+from internal.infra.listener import listener
+from db import catalog as c
+
+# Read-through cache for events, stands and merch, keyed by (kind, id) and
+# (kind, ALL). Every invalidation bumps that kind's version before evicting,
+# so a read that started before a write cannot store what it fetched
+# afterwards.
+# Writes also NOTIFY the other workers, which evict the same entries.
+
+ALL = "all"
+# responses rendered to JSON, with their ETag, keyed by (RENDERED, id | ALL)
+RENDERED = "rendered"
+CHANNEL = "catalog"
+
+cache: TTLCache[tuple[str, Hashable], Any] = TTLCache(
+    settings.catalog_cache_size, settings.catalog_cache_ttl
+)
+_versions: dict[str, int] = {}
+
+
+def get(kind: str, key: Hashable) -> tuple[Any, int]:
+    return cache.get((kind, key)), _versions.setdefault(kind, 0)
+
+
+def put(kind: str, key: Hashable, value: Any, version: int) -> None:
+    # without a live listener other workers' writes go unnoticed, so only
+    # the TTL would bound staleness; cache nothing until it is back
+    if listener.running and not listener.connected:
+        return
+    if value is not None and _versions.get(kind) == version:
+        cache.set((kind, key), value)
+
+
+def invalidate(kind: str, key: Hashable | None = None) -> None:
+    _versions[kind] = _versions.get(kind, 0) + 1
+    cache.pop((kind, ALL))
+    cache.pop((kind, (RENDERED, ALL)))
+    if key is not None:
+        cache.pop((kind, key))
+        cache.pop((kind, (RENDERED, key)))
+
+
+async def rendered(
+    kind: str,
+    render: Callable[[], Awaitable[bytes | None]],
+    key: Hashable = ALL,
+    store: bool = True,
+) -> tuple[bytes, str] | None:
+    # with store off every call renders, but still gets a tag to revalidate
+    item, version = get(kind, (RENDERED, key)) if store else (None, 0)
+    if item is None:
+        body = await render()
+        if body is None:
+            return None
+        # derived from the content, so every worker hands out the same tag
+        item = (body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+        if store:
+            put(kind, (RENDERED, key), item, version)
+    return item
+
+
+def clear() -> None:
+    for kind in _versions:
+        _versions[kind] += 1
+    cache.clear()
+
+
+async def publish(conn: AsyncConnection, kind: str, key: uuid.UUID | None = None) -> None:
+    await listener.notify(
+        c.AsyncQuerier(conn).notify_catalog, [f"{kind},{'' if key is None else key}"]
+    )
+
+
+def _on_change(lines: list[str]) -> None:
+    for line in lines:
+        kind, key = line.split(",", 1)
+        invalidate(kind, uuid.UUID(key) if key else None)
+
+
+async def _resync() -> None:
+    # notifications sent while reconnecting were missed
+    clear()
+
+
+listener.subscribe(CHANNEL, _on_change, on_connect=_resync, on_disconnect=clear)
@@ -1,15 +1,20 @@
+import logging
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from db import client as c
 from db import models as m
 from ..entities.client import CreateClient, SignInClient, UpdateClient
 from ..infra import hash
+from ..infra.db import SessionLocal
+
+logger = logging.getLogger(__name__)
 
 
 async def create(conn: AsyncSession, ent: CreateClient) -> m.Client | None:
+    password_hash = await hash.hash_password_async(ent.password)
     async with conn.begin():
         q = c.AsyncQuerier(await conn.connection())
-        client = await q.create_client(ent.to_params())
+        client = await q.create_client(ent.to_params(password_hash))
         return client
 
 
@@ -17,10 +22,36 @@ async def signin(conn: AsyncSession, ent: SignInClient) -> m.Client | None:
     async with conn.begin():
         q = c.AsyncQuerier(await conn.connection())
         client = await q.get_client_by_email(email=ent.email)
-        if client == None:
-            return None
-        if hash.verify_password(ent.password, client.password_hash):
-            return client
+    if client == None:
+        return None
+    if await hash.verify_password_async(ent.password, client.password_hash):
+        return client
+
+
+def needs_rehash(client: m.Client) -> bool:
+    return hash.needs_rehash(client.password_hash)
+
+
+async def rehash(conn: AsyncSession, client: m.Client, password: str) -> bool:
+    password_hash = await hash.hash_password_async(password)
+    async with conn.begin():
+        q = c.AsyncQuerier(await conn.connection())
+        updated = await q.update_client_password_hash(
+            new_hash=password_hash, id=client.id, old_hash=client.password_hash
+        )
+        return updated > 0
+
+
+async def rehash_later(client: m.Client, password: str) -> None:
+    # runs after the response has gone out, so nothing may escape; the old
+    # hash stays valid and the next sign-in tries the upgrade again
+    try:
+        async with SessionLocal() as session:
+            await rehash(session, client, password)
+    except hash.HashQueueFull:
+        pass
+    except Exception:
+        logger.exception("rehashing the password of client %s failed", client.id)
 
 
 async def get(conn: AsyncSession, id: uuid.UUID) -> m.Client | None:
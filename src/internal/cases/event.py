@@ -2,44 +2,64 @@ import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from db import event as e
 from db import models as m
+from . import catalog
 from ..entities.event import (
     CreateEvent,
     UpdateEvent,
 )
 
+KIND = "event"
+
 
 async def create_event(conn: AsyncSession, ent: CreateEvent) -> m.Event | None:
     async with conn.begin():
-        q = e.AsyncQuerier(await conn.connection())
+        connection = await conn.connection()
+        q = e.AsyncQuerier(connection)
         event = await q.create_event(ent.to_params())
-        return event
+        await catalog.publish(connection, KIND)
+    catalog.invalidate(KIND)
+    return event
 
 
 async def get_event(conn: AsyncSession, id: uuid.UUID) -> m.Event | None:
+    event, version = catalog.get(KIND, id)
+    if event is not None:
+        return event
     async with conn.begin():
         q = e.AsyncQuerier(await conn.connection())
         event = await q.get_event_by_id(id=id)
-        return event
+    catalog.put(KIND, id, event, version)
+    return event
 
 
 async def get_all_events(conn: AsyncSession):
-    async with conn.begin():
-        q = e.AsyncQuerier(await conn.connection())
-        async for event in q.get_all_events():
-            yield event
+    events, version = catalog.get(KIND, catalog.ALL)
+    if events is None:
+        async with conn.begin():
+            q = e.AsyncQuerier(await conn.connection())
+            events = [event async for event in q.get_all_events()]
+        catalog.put(KIND, catalog.ALL, events, version)
+    for event in events:
+        yield event
 
 
 async def update_event(
     conn: AsyncSession, id: uuid.UUID, ent: UpdateEvent
 ) -> m.Event | None:
     async with conn.begin():
-        q = e.AsyncQuerier(await conn.connection())
+        connection = await conn.connection()
+        q = e.AsyncQuerier(connection)
         event = await q.update_event(ent.to_params(id))
-        return event
+        await catalog.publish(connection, KIND, id)
+    catalog.invalidate(KIND, id)
+    return event
 
 
 async def delete_event(conn: AsyncSession, id: uuid.UUID) -> bool:
     async with conn.begin():
-        q = e.AsyncQuerier(await conn.connection())
+        connection = await conn.connection()
+        q = e.AsyncQuerier(connection)
         await q.delete_event(id=id)
-        return True
+        await catalog.publish(connection, KIND, id)
+    catalog.invalidate(KIND, id)
+    return True
@@ -0,0 +1,75 @@
+import json
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from internal.config import settings
+from internal.infra.cache import TTLCache
+from internal.infra.db import SessionLocal
+from internal.infra.periodic import Periodic
+from db import idempotency as i
+
+# Keys are claimed inside the caller's write transaction before anything
+# else is written. A concurrent request with the same key blocks on the
+# claim until the first one commits, then finds its stored response.
+
+cache: TTLCache[tuple[str, str], dict] = TTLCache(
+    settings.idempotency_cache_size, settings.idempotency_ttl
+)
+
+
+class IdempotencyConflict(Exception):
+    pass
+
+
+def cached(scope: str, key: str | None) -> dict | None:
+    if key is None:
+        return None
+    return cache.get((scope, key))
+
+
+def remember(scope: str, key: str, response: dict) -> None:
+    cache.set((scope, key), response)
+
+
+async def claim_many(conn: AsyncConnection, scope: str, keys: list[str]) -> set[str]:
+    q = i.AsyncQuerier(conn)
+    return {key async for key in q.claim_idempotency_keys(scope=scope, keys=keys)}
+
+
+async def claim(conn: AsyncConnection, scope: str, key: str) -> bool:
+    return bool(await claim_many(conn, scope, [key]))
+
+
+async def stored(conn: AsyncConnection, scope: str, key: str) -> dict:
+    q = i.AsyncQuerier(conn)
+    response = await q.get_idempotency_response(scope=scope, key=key)
+    if response is None:
+        raise IdempotencyConflict()
+    data = json.loads(response)
+    remember(scope, key, data)
+    return data
+
+
+async def save(conn: AsyncConnection, scope: str, responses: dict[str, dict]) -> None:
+    if not responses:
+        return
+    q = i.AsyncQuerier(conn)
+    await q.save_idempotency_responses(
+        keys=list(responses),
+        responses=[json.dumps(r) for r in responses.values()],
+        scope=scope,
+    )
+
+
+async def delete_expired(conn: AsyncSession) -> int:
+    async with conn.begin():
+        q = i.AsyncQuerier(await conn.connection())
+        return await q.delete_expired_idempotency_keys(ttl_seconds=settings.idempotency_ttl)
+
+
+async def _cleanup() -> None:
+    async with SessionLocal() as session:
+        await delete_expired(session)
+
+
+cleanup = Periodic(_cleanup, settings.idempotency_cleanup_interval)
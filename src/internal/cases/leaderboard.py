@@ -0,0 +1,93 @@
+import asyncio
+import uuid
+from collections.abc import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from internal.config import settings
+from internal.infra.db import SessionLocal
+from internal.infra.listener import listener
+from internal.infra.periodic import Periodic
+from internal.infra.ranking import Ranking
+from db import models as m, points as p
+
+CHANNEL = "points"
+
+board = Ranking()
+_loaded = False
+_lock = asyncio.Lock()
+
+
+def record(points: Iterable[m.Point]) -> None:
+    for point in points:
+        board.set(point.user_id, point.total_points)
+
+
+async def publish(q: p.AsyncQuerier, points: Iterable[m.Point]) -> None:
+    if not settings.points_leaderboard_notify:
+        return
+    await listener.notify(
+        q.notify_points, (f"{point.user_id},{point.total_points}" for point in points)
+    )
+
+
+def _on_points(lines: list[str]) -> None:
+    for line in lines:
+        user_id, total_points = line.split(",")
+        board.set(uuid.UUID(user_id), int(total_points))
+
+
+async def resync(conn: AsyncSession) -> int:
+    global _loaded
+    async with conn.begin():
+        q = p.AsyncQuerier(await conn.connection())
+        rows = [
+            (point.user_id, point.total_points)
+            async for point in q.list_points_ranked(page_size=None)
+        ]
+    # an update landing while the snapshot loads can be overwritten by it;
+    # the next update or resync puts it back
+    board.replace(rows)
+    _loaded = True
+    return len(rows)
+
+
+async def _ensure_loaded(conn: AsyncSession) -> None:
+    if _loaded:
+        return
+    async with _lock:
+        if not _loaded:
+            await resync(conn)
+
+
+async def top(conn: AsyncSession, n: int) -> list[tuple[int, uuid.UUID, int]]:
+    await _ensure_loaded(conn)
+    return board.top(n)
+
+
+async def rank(conn: AsyncSession, user_id: uuid.UUID) -> tuple[int, int] | None:
+    await _ensure_loaded(conn)
+    position = board.rank(user_id)
+    if position is None:
+        return None
+    return position, board.score(user_id)
+
+
+async def _resync() -> None:
+    async with SessionLocal() as session:
+        await resync(session)
+
+
+resyncer = Periodic(_resync, settings.points_leaderboard_resync)
+
+
+def stats() -> dict:
+    return {
+        "participants": len(board),
+        "loaded": _loaded,
+        "resyncs": resyncer.runs,
+        "failures": resyncer.failures,
+    }
+
+
+listener.subscribe(CHANNEL, _on_points, on_connect=_resync)
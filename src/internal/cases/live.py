@@ -0,0 +1,84 @@
+import datetime
+import uuid
+from collections.abc import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from internal.config import settings
+from internal.infra.broadcast import Broadcaster
+from internal.infra.db import SessionLocal
+from internal.infra.listener import listener
+from internal.infra.periodic import Periodic
+from internal.infra.window import SlidingWindow
+from db import analytics as a, models as m
+
+CHANNEL = "analytics_visits"
+
+window = SlidingWindow(settings.analytics_live_window)
+broadcaster = Broadcaster(settings.analytics_stream_max_subscribers)
+
+
+def _epoch(time: datetime.datetime) -> float:
+    return time.replace(tzinfo=datetime.UTC).timestamp()
+
+
+def record(rows: Iterable[m.Analytic]) -> None:
+    for row in rows:
+        if row.stand_id is not None and row.user_id is not None:
+            window.add(row.stand_id, row.user_id, _epoch(row.time))
+
+
+async def publish(q: a.AsyncQuerier, rows: Iterable[m.Analytic]) -> None:
+    if not settings.analytics_live_notify:
+        return
+    await listener.notify(
+        q.notify_analytics_visits,
+        (
+            f"{row.stand_id},{row.user_id},{_epoch(row.time):.3f}"
+            for row in rows
+            if row.stand_id is not None and row.user_id is not None
+        ),
+    )
+
+
+def _on_visits(lines: list[str]) -> None:
+    for line in lines:
+        stand_id, user_id, at = line.split(",")
+        window.add(uuid.UUID(stand_id), uuid.UUID(user_id), float(at))
+
+
+async def seed(conn: AsyncSession) -> int:
+    # no reset: adds keep the latest sighting and everything ages out anyway
+    since = datetime.datetime.now(datetime.UTC).replace(tzinfo=None) - datetime.timedelta(
+        seconds=window.seconds
+    )
+    async with conn.begin():
+        q = a.AsyncQuerier(await conn.connection())
+        rows = [row async for row in q.get_recent_visits(since=since)]
+    for row in rows:
+        window.add(row.stand_id, row.user_id, _epoch(row.time))
+    return len(rows)
+
+
+def occupancy(stand_id: uuid.UUID) -> int:
+    return window.count(stand_id)
+
+
+def occupancy_all() -> dict[uuid.UUID, int]:
+    return {k: v for k, v in window.counts().items() if v}
+
+
+async def _tick() -> None:
+    # the single producer for every stream subscriber in this worker
+    broadcaster.publish({str(k): v for k, v in occupancy_all().items()}, default=0)
+
+
+ticker = Periodic(_tick, settings.analytics_stream_interval)
+
+
+async def _reseed() -> None:
+    async with SessionLocal() as session:
+        await seed(session)
+
+
+listener.subscribe(CHANNEL, _on_visits, on_connect=_reseed)
@@ -2,43 +2,132 @@ import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from db import merch as c
 from db import models as m
+from db import points as p
+from . import catalog, leaderboard
 from ..entities.merch import CreateMerch, UpdateMerch
 
 
+KIND = "merch"
+
+
+class OutOfStock(Exception):
+    pass
+
+
+class InsufficientPoints(Exception):
+    pass
+
+
 async def create(conn: AsyncSession, ent: CreateMerch) -> m.Merch | None:
     async with conn.begin():
-        q = c.AsyncQuerier(await conn.connection())
-        merch = await q.create_merch(**ent.to_params())
-        return merch
+        connection = await conn.connection()
+        q = c.AsyncQuerier(connection)
+        merch = await q.create_merch(ent.to_params())
+        await catalog.publish(connection, KIND)
+    catalog.invalidate(KIND)
+    return merch
 
 
 async def get(conn: AsyncSession, id: uuid.UUID) -> m.Merch | None:
+    merch, version = catalog.get(KIND, id)
+    if merch is not None:
+        return merch
     async with conn.begin():
         q = c.AsyncQuerier(await conn.connection())
         merch = await q.get_merch_by_id(id=id)
-        return merch
+    catalog.put(KIND, id, merch, version)
+    return merch
 
 
 async def get_all(conn: AsyncSession) -> list[m.Merch]:
+    merch_list, version = catalog.get(KIND, catalog.ALL)
+    if merch_list is not None:
+        return merch_list
     async with conn.begin():
         q = c.AsyncQuerier(await conn.connection())
         merch_list = []
         async for merch in q.get_all_merch():
             merch_list.append(merch)
-        return merch_list
+    catalog.put(KIND, catalog.ALL, merch_list, version)
+    return merch_list
+
+
+async def affordable(
+    conn: AsyncSession, user_id: uuid.UUID
+) -> tuple[int, list[m.Merch], m.Merch | None]:
+    # one row per affordable item plus the cheapest one out of reach; the
+    # balance comes back even when no item matches
+    async with conn.begin():
+        q = c.AsyncQuerier(await conn.connection())
+        total_points = 0
+        items: list[m.Merch] = []
+        next_reward = None
+        async for row in q.get_affordable_merch(user_id=user_id):
+            total_points = row.total_points
+            if row.id is None:
+                continue
+            merch = m.Merch(
+                id=row.id,
+                name=row.name,
+                info=row.info,
+                image_url=row.image_url,
+                points_needed=row.points_needed,
+                stock=row.stock,
+            )
+            if row.affordable:
+                items.append(merch)
+            else:
+                next_reward = merch
+        return total_points, items, next_reward
 
 
 async def update(
     conn: AsyncSession, id: uuid.UUID, ent: UpdateMerch
 ) -> m.Merch | None:
     async with conn.begin():
-        q = c.AsyncQuerier(await conn.connection())
+        connection = await conn.connection()
+        q = c.AsyncQuerier(connection)
         merch = await q.update_merch(ent.to_params(id))
-        return merch
+        await catalog.publish(connection, KIND, id)
+    catalog.invalidate(KIND, id)
+    return merch
 
 
 async def delete(conn: AsyncSession, id: uuid.UUID) -> bool:
     async with conn.begin():
-        q = c.AsyncQuerier(await conn.connection())
+        connection = await conn.connection()
+        q = c.AsyncQuerier(connection)
         await q.delete_merch(id=id)
-        return True
\ No newline at end of file
+        await catalog.publish(connection, KIND, id)
+    catalog.invalidate(KIND, id)
+    return True
+
+
+async def redeem(
+    conn: AsyncSession, id: uuid.UUID, user_id: uuid.UUID
+) -> c.SpendPointsOnMerchRow | None:
+    async with conn.begin():
+        connection = await conn.connection()
+        q = c.AsyncQuerier(connection)
+        # the user's own points row first: it is not contended, and it fails
+        # fast without locking anything once the snapshot shows no stock
+        spent = await q.spend_points_on_merch(user_id=user_id, merch_id=id)
+        if spent is None:
+            merch = await q.get_merch_by_id(id=id)
+            if merch is None:
+                return None
+            if merch.stock <= 0:
+                raise OutOfStock()
+            raise InsufficientPoints()
+        # the hot merch row last, so its lock is held only until commit;
+        # rushers queued on it re-check stock > 0 once it is released, and
+        # the ones that lose roll their points back
+        if await q.take_merch_stock(id=id) is None:
+            raise OutOfStock()
+        point = m.Point(user_id=user_id, total_points=spent.total_points)
+        await leaderboard.publish(p.AsyncQuerier(connection), [point])
+        # cached items carry their stock
+        await catalog.publish(connection, KIND, id)
+    catalog.invalidate(KIND, id)
+    leaderboard.record([point])
+    return spent
@@ -1,18 +1,246 @@
+import collections
 import uuid
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from internal.cases import idempotency, leaderboard
+from internal.config import settings
+from internal.infra.coalescer import Coalescer
+from internal.infra.db import SessionLocal
 from db import points as p
 from db import models as m
 
+SCOPE = "points"
+BATCH_SCOPE = "points.batch"
 
-async def upsert_points(conn: AsyncSession, user_id: uuid.UUID, points: int) -> m.Point | None:
+# ledger ids are bigserial, so this is above any real id
+_NEWEST = 2**63 - 1
+
+
+async def upsert_points(
+    conn: AsyncSession,
+    user_id: uuid.UUID,
+    points: int,
+    reason: str = "manual",
+    event_id: uuid.UUID | None = None,
+    idempotency_key: str | None = None,
+) -> m.Point | None:
+    if idempotency_key is None and settings.points_coalesce_ms > 0:
+        return await coalescer.submit((user_id, points, reason, event_id))
+    return await award(conn, user_id, points, reason, event_id, idempotency_key)
+
+
+async def award(
+    conn: AsyncSession,
+    user_id: uuid.UUID,
+    points: int,
+    reason: str = "manual",
+    event_id: uuid.UUID | None = None,
+    idempotency_key: str | None = None,
+) -> m.Point | None:
+    # one statement per award, never coalesced
+    replay = idempotency.cached(SCOPE, idempotency_key)
+    if replay is not None:
+        return m.Point(**replay)
+    async with conn.begin():
+        connection = await conn.connection()
+        q = p.AsyncQuerier(connection)
+        if idempotency_key is not None and not await idempotency.claim(
+            connection, SCOPE, idempotency_key
+        ):
+            return m.Point(**await idempotency.stored(connection, SCOPE, idempotency_key))
+        point = await q.award_points(p.AwardPointsParams(
+            user_id=user_id,
+            delta=points,
+            reason=reason,
+            event_id=event_id,
+            idempotency_key=idempotency_key,
+        ))
+        if point is None and idempotency_key is not None:
+            # the ledger already holds this key (its claim has expired):
+            # report the balance as it is
+            point = await q.get_points_by_user_id(user_id=user_id)
+        if point is not None:
+            await leaderboard.publish(q, [point])
+        if point is not None and idempotency_key is not None:
+            await idempotency.save(
+                connection, SCOPE, {idempotency_key: point.model_dump(mode="json")}
+            )
+    if point is not None:
+        leaderboard.record([point])
+        if idempotency_key is not None:
+            idempotency.remember(SCOPE, idempotency_key, point.model_dump(mode="json"))
+    return point
+
+
+async def upsert_points_batch(
+    conn: AsyncSession,
+    awards: list[tuple[uuid.UUID, int]],
+    reason: str = "batch",
+    event_id: uuid.UUID | None = None,
+    idempotency_key: str | None = None,
+) -> list[m.Point]:
+    replay = idempotency.cached(BATCH_SCOPE, idempotency_key)
+    if replay is not None:
+        return [m.Point(**item) for item in replay["items"]]
+    async with conn.begin():
+        connection = await conn.connection()
+        q = p.AsyncQuerier(connection)
+        if idempotency_key is not None and not await idempotency.claim(
+            connection, BATCH_SCOPE, idempotency_key
+        ):
+            stored = await idempotency.stored(connection, BATCH_SCOPE, idempotency_key)
+            return [m.Point(**item) for item in stored["items"]]
+        # every award gets its own ledger row; the statement sums them per
+        # user before touching points, since ON CONFLICT cannot hit a row twice
+        points = [
+            point
+            async for point in q.award_points_batch(
+                reason=reason,
+                event_id=event_id,
+                user_ids=[user_id for user_id, _ in awards],
+                deltas=[delta for _, delta in awards],
+            )
+        ]
+        await leaderboard.publish(q, points)
+        response = {"items": [point.model_dump(mode="json") for point in points]}
+        if idempotency_key is not None:
+            await idempotency.save(connection, BATCH_SCOPE, {idempotency_key: response})
+    leaderboard.record(points)
+    if idempotency_key is not None:
+        idempotency.remember(BATCH_SCOPE, idempotency_key, response)
+    return points
+
+
+Award = tuple[uuid.UUID, int, str, uuid.UUID | None]
+
+
+async def _award_alone(conn: AsyncSession, award: Award) -> m.Point | BaseException:
+    user_id, delta, reason, event_id = award
+    try:
+        return (await upsert_points_batch(conn, [(user_id, delta)], reason, event_id))[0]
+    except Exception as e:
+        return e
+
+
+async def flush_awards(awards: list[Award]) -> list[m.Point | BaseException]:
+    # concurrent awards to the same hot rows become one statement per tick,
+    # so they take each row lock once instead of queueing on it
+    groups: dict[tuple, list[int]] = collections.defaultdict(list)
+    for i, (_, _, reason, event_id) in enumerate(awards):
+        groups[reason, event_id].append(i)
+    results: dict[int, m.Point | BaseException] = {}
+    async with SessionLocal() as session:
+        for (reason, event_id), indices in groups.items():
+            try:
+                points = await upsert_points_batch(
+                    session, [awards[i][:2] for i in indices], reason, event_id
+                )
+            except IntegrityError:
+                # one unknown user fails the whole statement; retry one by one
+                # so only that caller sees the error
+                for i in indices:
+                    results[i] = await _award_alone(session, awards[i])
+                continue
+            except Exception as e:
+                # groups already committed keep their results, so their
+                # callers are not told to retry an award that went through
+                for i in indices:
+                    results[i] = e
+                continue
+            totals = {point.user_id: point for point in points}
+            for i in indices:
+                results[i] = totals[awards[i][0]]
+    return [results[i] for i in range(len(awards))]
+
+
+coalescer: Coalescer[Award, m.Point] = Coalescer(
+    flush_awards,
+    interval=settings.points_coalesce_ms / 1000,
+    max_batch=settings.points_batch_max,
+)
+
+
+async def complete_event(
+    conn: AsyncSession, event_id: uuid.UUID, user_id: uuid.UUID
+) -> tuple[m.Point, bool] | None:
+    # participation, ledger entry and balance are written by one statement
+    # that reads event.points itself, so an edit to the event cannot slip
+    # in between and the participation key caps it at one award per user
     async with conn.begin():
         q = p.AsyncQuerier(await conn.connection())
-        point = await q.upsert_points(user_id=user_id, total_points=points)
-        return point
+        point = await q.complete_event(user_id=user_id, event_id=event_id)
+        awarded = point is not None
+        if awarded:
+            await leaderboard.publish(q, [point])
+        elif await q.event_exists(event_id=event_id):
+            # already completed: report the balance as it is
+            point = await q.get_points_by_user_id(user_id=user_id)
+    if point is None:
+        return None
+    if awarded:
+        leaderboard.record([point])
+    return point, awarded
+
+
+async def complete_event_batch(
+    conn: AsyncSession, event_id: uuid.UUID, user_ids: list[uuid.UUID]
+) -> list[m.Point] | None:
+    async with conn.begin():
+        q = p.AsyncQuerier(await conn.connection())
+        points = [
+            point
+            async for point in q.complete_event_batch(user_ids=user_ids, event_id=event_id)
+        ]
+        if not points and not await q.event_exists(event_id=event_id):
+            return None
+        await leaderboard.publish(q, points)
+    leaderboard.record(points)
+    return points
 
 
 async def get_points(conn: AsyncSession, user_id: uuid.UUID) -> m.Point | None:
     async with conn.begin():
         q = p.AsyncQuerier(await conn.connection())
         point = await q.get_points_by_user_id(user_id=user_id)
-        return point
\ No newline at end of file
+        return point
+
+
+async def get_history(
+    conn: AsyncSession, user_id: uuid.UUID, before: int | None, page_size: int
+) -> list[m.PointsLedger]:
+    async with conn.begin():
+        q = p.AsyncQuerier(await conn.connection())
+        return [
+            entry
+            async for entry in q.get_points_history(
+                user_id=user_id, before=before or _NEWEST, page_size=page_size
+            )
+        ]
+
+
+async def reconcile(
+    conn: AsyncSession, batch_size: int
+) -> tuple[int, list[p.ReconcilePointsRow]]:
+    checked = 0
+    fixed: list[p.ReconcilePointsRow] = []
+    after = uuid.UUID(int=0)
+    while True:
+        async with conn.begin():
+            q = p.AsyncQuerier(await conn.connection())
+            user_ids = [
+                user_id
+                async for user_id in q.list_points_user_ids(after=after, batch_size=batch_size)
+            ]
+            if not user_ids:
+                break
+            # awards running concurrently wait on these rows, so their ledger
+            # entries are either in the sum or applied on top of it
+            await q.lock_points(user_ids=user_ids)
+            rows = [row async for row in q.reconcile_points(user_ids=user_ids)]
+            corrected = [m.Point(user_id=row.user_id, total_points=row.total_points) for row in rows]
+            await leaderboard.publish(q, corrected)
+        leaderboard.record(corrected)
+        fixed.extend(rows)
+        checked += len(user_ids)
+        after = user_ids[-1]
+    return checked, fixed
@@ -2,44 +2,64 @@ import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from db import stand as s
 from db import models as m
+from . import catalog
 from ..entities.stand import (
     CreateStand,
     UpdateStand,
 )
 
+KIND = "stand"
+
 
 async def create_stand(conn: AsyncSession, ent: CreateStand) -> m.Stand | None:
     async with conn.begin():
-        q = s.AsyncQuerier(await conn.connection())
+        connection = await conn.connection()
+        q = s.AsyncQuerier(connection)
         stand = await q.create_stand(**ent.to_params())
-        return stand
+        await catalog.publish(connection, KIND)
+    catalog.invalidate(KIND)
+    return stand
 
 
 async def get_stand(conn: AsyncSession, id: uuid.UUID) -> m.Stand | None:
+    stand, version = catalog.get(KIND, id)
+    if stand is not None:
+        return stand
     async with conn.begin():
         q = s.AsyncQuerier(await conn.connection())
         stand = await q.get_stand_by_id(id=id)
-        return stand
+    catalog.put(KIND, id, stand, version)
+    return stand
 
 
 async def get_all_stands(conn: AsyncSession):
-    async with conn.begin():
-        q = s.AsyncQuerier(await conn.connection())
-        async for stand in q.get_all_stands():
-            yield stand
+    stands, version = catalog.get(KIND, catalog.ALL)
+    if stands is None:
+        async with conn.begin():
+            q = s.AsyncQuerier(await conn.connection())
+            stands = [stand async for stand in q.get_all_stands()]
+        catalog.put(KIND, catalog.ALL, stands, version)
+    for stand in stands:
+        yield stand
 
 
 async def update_stand(
     conn: AsyncSession, id: uuid.UUID, ent: UpdateStand
 ) -> m.Stand | None:
     async with conn.begin():
-        q = s.AsyncQuerier(await conn.connection())
+        connection = await conn.connection()
+        q = s.AsyncQuerier(connection)
         stand = await q.update_stand(ent.to_params(id))
-        return stand
+        await catalog.publish(connection, KIND, id)
+    catalog.invalidate(KIND, id)
+    return stand
 
 
 async def delete_stand(conn: AsyncSession, id: uuid.UUID) -> bool:
     async with conn.begin():
-        q = s.AsyncQuerier(await conn.connection())
+        connection = await conn.connection()
+        q = s.AsyncQuerier(connection)
         await q.delete_stand(id=id)
-        return True
\ No newline at end of file
+        await catalog.publish(connection, KIND, id)
+    catalog.invalidate(KIND, id)
+    return True
\ No newline at end of file
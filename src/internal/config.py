@@ -1,19 +1,83 @@
+import os
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     app_host: str = ""
     app_port: int = 0
+    app_workers: int = 0
+    app_reload: bool = False
+    app_keepalive: int = 5
+    app_backlog: int = 2048
+    app_graceful_timeout: int = 30
     db_user: str = ""
     db_name: str = ""
     db_pass: str = ""
     db_host: str = ""
     db_port: int = 0
+    db_echo: bool = False
+    db_pool_size: int = 0
+    db_max_overflow: int = 10
+    db_connection_budget: int = 80
+    db_pool_timeout: float = 30.0
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+    db_statement_timeout_ms: int = 0
     jwt_secret: str = ""
+    hash_workers: int = 2
+    hash_queue_limit: int = 64
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536
+    argon2_parallelism: int = 4
+    analytics_buffered: bool = False
+    analytics_buffer_size: int = 10000
+    analytics_batch_size: int = 500
+    analytics_flush_interval: float = 1.0
+    analytics_enqueue_timeout: float = 0.5
+    analytics_export_chunk: int = 1000
+    analytics_dedup_seconds: int = 0
+    analytics_dedup_cache_size: int = 100000
+    analytics_partitions_ahead: int = 7
+    analytics_retention_days: int = 0
+    analytics_maintenance_interval: float = 3600.0
+    analytics_exact_unique_hours: int = 24
+    analytics_sketch_interval: float = 60.0
+    analytics_live_window: int = 600
+    analytics_live_notify: bool = True
+    analytics_stream_interval: float = 2.0
+    analytics_stream_heartbeat: float = 15.0
+    analytics_stream_max_subscribers: int = 1000
+    points_batch_max: int = 1000
+    points_reconcile_batch: int = 1000
+    points_coalesce_ms: int = 0
+    points_leaderboard_max: int = 100
+    points_leaderboard_resync: float = 60.0
+    points_leaderboard_notify: bool = True
+    idempotency_ttl: int = 86400
+    idempotency_cache_size: int = 10000
+    idempotency_cleanup_interval: float = 3600.0
+    catalog_cache_ttl: float = 60.0
+    catalog_cache_size: int = 1000
+    catalog_prerender: bool = False
+    catalog_cache_control: str = "public, max-age=60"
+    merch_cache_control: str = "no-cache"
+    listener_retry: float = 5.0
+    listener_ping: float = 30.0
+
+    @property
+    def WORKERS(self) -> int:
+        if self.app_reload:
+            return 1
+        return self.app_workers or os.cpu_count() or 1
 
     @property
     def DB_URL(self) -> str:
         return f"postgresql+asyncpg://{self.db_user}:{self.db_pass}@{self.db_host}:{self.db_port}/{self.db_name}"
 
+    @property
+    def PG_DSN(self) -> str:
+        return f"postgresql://{self.db_user}:{self.db_pass}@{self.db_host}:{self.db_port}/{self.db_name}"
+
 
 settings = Settings()
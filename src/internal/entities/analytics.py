@@ -2,9 +2,14 @@ from pydantic import BaseModel
 import uuid
 import datetime
 import decimal
+from typing import Literal
+
+Bucket = Literal["minute", "hour", "day"]
+UniqueMode = Literal["auto", "exact", "approx"]
 
 
 class CreateAnalytic(BaseModel):
+    id: uuid.UUID | None = None
     user_id: uuid.UUID
     stand_id: uuid.UUID
 
@@ -16,7 +21,33 @@ class Analytic(BaseModel):
     time: datetime.datetime
 
 
+class AnalyticsFilter(BaseModel):
+    time_from: datetime.datetime | None = None
+    time_to: datetime.datetime | None = None
+    stand_id: uuid.UUID | None = None
+    user_id: uuid.UUID | None = None
+    bucket: Bucket = "hour"
+
+
 class AnalyticGrouped(BaseModel):
+    bucket: datetime.datetime
     date: datetime.date
     hour: decimal.Decimal
-    count: int
\ No newline at end of file
+    count: int
+
+
+class UniqueVisitors(BaseModel):
+    bucket: datetime.datetime
+    visitors: int
+    exact: bool
+    error: float
+
+
+class LiveOccupancy(BaseModel):
+    stand_id: uuid.UUID
+    visitors: int
+    window_seconds: int
+
+
+class Error(BaseModel):
+    detail: str
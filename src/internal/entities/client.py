@@ -2,7 +2,6 @@ import pydantic
 import uuid
 
 from db.client import CreateClientParams, UpdateClientParams
-from ..infra.hash import hash_password
 
 
 class SignUpResp(pydantic.BaseModel):
@@ -21,13 +20,13 @@ class CreateClient(pydantic.BaseModel):
     image_url: str
     tg_username: str = ""
 
-    def to_params(self) -> CreateClientParams:
+    def to_params(self, password_hash: str) -> CreateClientParams:
         return CreateClientParams(
             email=self.email,
             name=self.name,
             surname=self.surname,
             image_url=self.image_url,
-            password_hash=hash_password(self.password),
+            password_hash=password_hash,
             tg_username=self.tg_username,
         )
 
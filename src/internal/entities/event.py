@@ -48,6 +48,26 @@ class Event(pydantic.BaseModel):
     stand_id: uuid.UUID | None
 
 
+class CompleteEvent(pydantic.BaseModel):
+    user_id: uuid.UUID
+
+
+class CompleteEventBatch(pydantic.BaseModel):
+    user_ids: list[uuid.UUID] = pydantic.Field(min_length=1)
+
+
+class EventCompletion(pydantic.BaseModel):
+    event_id: uuid.UUID
+    user_id: uuid.UUID
+    awarded: bool
+    total_points: int
+
+
+class EventCompletionBatch(pydantic.BaseModel):
+    items: list[EventCompletion]
+    skipped: int
+
+
 class CreateActiveEvent(pydantic.BaseModel):
     user_id: uuid.UUID
     event_id: uuid.UUID
@@ -1,7 +1,8 @@
+import datetime
 import pydantic
 import uuid
 
-from db.merch import UpdateMerchParams
+from db.merch import CreateMerchParams, UpdateMerchParams
 
 
 class Merch(pydantic.BaseModel):
@@ -10,6 +11,7 @@ class Merch(pydantic.BaseModel):
     info: str
     image_url: str
     points_needed: int
+    stock: int
 
 
 class CreateMerch(pydantic.BaseModel):
@@ -17,14 +19,16 @@ class CreateMerch(pydantic.BaseModel):
     info: str
     image_url: str
     points_needed: int
+    stock: int = pydantic.Field(0, ge=0)
 
-    def to_params(self) -> dict:
-        return {
-            "name": self.name,
-            "info": self.info,
-            "image_url": self.image_url,
-            "points_needed": self.points_needed,
-        }
+    def to_params(self) -> CreateMerchParams:
+        return CreateMerchParams(
+            name=self.name,
+            info=self.info,
+            image_url=self.image_url,
+            points_needed=self.points_needed,
+            stock=self.stock,
+        )
 
 
 class UpdateMerch(pydantic.BaseModel):
@@ -32,6 +36,7 @@ class UpdateMerch(pydantic.BaseModel):
     info: str | None
     image_url: str | None
     points_needed: int | None
+    stock: int | None = pydantic.Field(None, ge=0)
 
     def to_params(self, id: uuid.UUID) -> UpdateMerchParams:
         return UpdateMerchParams(
@@ -40,8 +45,29 @@ class UpdateMerch(pydantic.BaseModel):
             info=self.info,
             image_url=self.image_url,
             points_needed=self.points_needed,
+            stock=self.stock,
         )
 
 
+class AffordableMerch(pydantic.BaseModel):
+    total_points: int
+    items: list[Merch]
+    next_reward: Merch | None
+    points_to_next: int | None
+
+
+class RedeemMerch(pydantic.BaseModel):
+    user_id: uuid.UUID
+
+
+class Redemption(pydantic.BaseModel):
+    id: int
+    merch_id: uuid.UUID
+    user_id: uuid.UUID
+    points: int
+    total_points: int
+    created_at: datetime.datetime
+
+
 class Error(pydantic.BaseModel):
     detail: str
\ No newline at end of file
@@ -1,3 +1,4 @@
+import datetime
 import pydantic
 import uuid
 
@@ -5,6 +6,20 @@ import uuid
 class UpsertPoints(pydantic.BaseModel):
     user_id: uuid.UUID
     points: int
+    reason: str = "manual"
+    event_id: uuid.UUID | None = None
+    idempotency_key: str | None = None
+
+
+class PointsAward(pydantic.BaseModel):
+    user_id: uuid.UUID
+    points: int
+
+
+class UpsertPointsBatch(pydantic.BaseModel):
+    items: list[PointsAward] = pydantic.Field(min_length=1)
+    reason: str = "batch"
+    event_id: uuid.UUID | None = None
 
 
 class Point(pydantic.BaseModel):
@@ -12,5 +27,29 @@ class Point(pydantic.BaseModel):
     total_points: int
 
 
+class LedgerEntry(pydantic.BaseModel):
+    id: int
+    delta: int
+    reason: str
+    event_id: uuid.UUID | None
+    created_at: datetime.datetime
+
+
+class PointsHistory(pydantic.BaseModel):
+    items: list[LedgerEntry]
+    next_before: int | None
+
+
+class LeaderboardEntry(pydantic.BaseModel):
+    rank: int
+    user_id: uuid.UUID
+    total_points: int
+
+
+class Leaderboard(pydantic.BaseModel):
+    items: list[LeaderboardEntry]
+    participants: int
+
+
 class Error(pydantic.BaseModel):
-    detail: str
\ No newline at end of file
+    detail: str
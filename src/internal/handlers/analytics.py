@@ -1,19 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
+import datetime
+import json
+import uuid
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from internal.entities.analytics import CreateAnalytic, Analytic, AnalyticGrouped
-from internal.cases import analytics as c
+from internal.config import settings
+from internal.entities.analytics import (
+    CreateAnalytic, Analytic, AnalyticGrouped, AnalyticsFilter, Bucket, Error,
+    UniqueMode, UniqueVisitors, LiveOccupancy,
+)
+from internal.cases import analytics as c, live
+from internal.cases.idempotency import IdempotencyConflict
+from internal.infra import export
+from internal.infra.broadcast import TooManySubscribers
+from internal.infra.buffer import BufferFull
 from internal.infra.db import db_session
 
 router = APIRouter()
 
 
-@router.post("/analytics", response_model=Analytic)
+@router.post(
+    "/analytics",
+    response_model=Analytic,
+    responses={
+        202: {
+            "model": Analytic,
+            "description": (
+                "Queued for a batch insert. The flush can still skip the visit"
+                " (a repeat within the dedup window, an unknown user or stand,"
+                " or an id already stored), so the returned id is not"
+                " guaranteed to be stored."
+            ),
+        },
+        409: {"model": Error},
+        503: {"model": Error},
+    },
+)
 async def create_analytic(
     body: CreateAnalytic,
+    response: Response,
+    idempotency_key: str | None = Header(None),
     session: AsyncSession = Depends(db_session),
 ) -> Analytic:
-    dto = await c.create(session, body)
+    if settings.analytics_buffered:
+        try:
+            dto, queued = await c.enqueue(body, idempotency_key)
+        except BufferFull:
+            raise HTTPException(status_code=503, detail="Analytics buffer is full")
+        if queued:
+            response.status_code = 202
+    else:
+        try:
+            dto = await c.create(session, body, idempotency_key)
+        except IdempotencyConflict:
+            raise HTTPException(status_code=409, detail="Idempotency key is in use")
     if dto is None:
         raise HTTPException(status_code=400, detail="Failed to create analytic")
     return Analytic(
@@ -23,7 +67,112 @@ async def create_analytic(
 
 @router.get("/analytics/grouped", response_model=list[AnalyticGrouped])
 async def get_analytics_grouped(
+    time_from: datetime.datetime | None = Query(None, alias="from"),
+    time_to: datetime.datetime | None = Query(None, alias="to"),
+    stand_id: uuid.UUID | None = None,
+    user_id: uuid.UUID | None = None,
+    bucket: Bucket = "hour",
     session: AsyncSession = Depends(db_session),
 ) -> list[AnalyticGrouped]:
-    return await c.get_grouped(session)
+    return await c.get_grouped(session, AnalyticsFilter(
+        time_from=time_from, time_to=time_to,
+        stand_id=stand_id, user_id=user_id, bucket=bucket,
+    ))
+
+
+@router.get("/analytics/unique", response_model=list[UniqueVisitors])
+async def get_unique_visitors(
+    time_from: datetime.datetime | None = Query(None, alias="from"),
+    time_to: datetime.datetime | None = Query(None, alias="to"),
+    stand_id: uuid.UUID | None = None,
+    bucket: Bucket = "hour",
+    mode: UniqueMode = "auto",
+    session: AsyncSession = Depends(db_session),
+) -> list[UniqueVisitors]:
+    return await c.get_unique(session, AnalyticsFilter(
+        time_from=time_from, time_to=time_to, stand_id=stand_id, bucket=bucket,
+    ), mode)
+
+
+@router.get("/analytics/live", response_model=list[LiveOccupancy])
+async def get_live_occupancy() -> list[LiveOccupancy]:
+    return [
+        LiveOccupancy(stand_id=stand_id, visitors=visitors, window_seconds=live.window.seconds)
+        for stand_id, visitors in live.occupancy_all().items()
+    ]
+
+
+@router.get("/analytics/live/{stand_id}", response_model=LiveOccupancy)
+async def get_stand_occupancy(stand_id: uuid.UUID) -> LiveOccupancy:
+    return LiveOccupancy(
+        stand_id=stand_id, visitors=live.occupancy(stand_id), window_seconds=live.window.seconds
+    )
 
+
+@router.get(
+    "/analytics/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}, 503: {"model": Error}},
+)
+async def stream_live_occupancy(request: Request) -> StreamingResponse:
+    try:
+        sub = live.broadcaster.subscribe()
+    except TooManySubscribers:
+        raise HTTPException(status_code=503, detail="Too many stream subscribers")
+
+    async def events():
+        try:
+            yield f"retry: {int(settings.analytics_stream_interval * 1000)}\n\n"
+            while not await request.is_disconnected():
+                update = await sub.next(settings.analytics_stream_heartbeat)
+                if update is None:
+                    yield ": ping\n\n"
+                else:
+                    yield f"event: occupancy\ndata: {json.dumps(update)}\n\n"
+        finally:
+            live.broadcaster.unsubscribe(sub)
+
+    # the background task also covers a client that is gone before the
+    # body generator ever starts
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(live.broadcaster.unsubscribe, sub),
+    )
+
+
+EXPORT_COLUMNS = ["id", "user_id", "stand_id", "time"]
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@router.get(
+    "/analytics/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {t: {} for t in EXPORT_MEDIA_TYPES.values()}}},
+)
+async def export_analytics(
+    format: Literal["csv", "ndjson"] = "csv",
+    time_from: datetime.datetime | None = Query(None, alias="from"),
+    time_to: datetime.datetime | None = Query(None, alias="to"),
+    stand_names: bool = False,
+    gzip: bool = False,
+) -> StreamingResponse:
+    rows = c.export(time_from, time_to, stand_names)
+    chunk = settings.analytics_export_chunk
+    if format == "csv":
+        columns = EXPORT_COLUMNS + ["stand_name"] if stand_names else EXPORT_COLUMNS
+        body = export.csv_chunks(rows, columns, chunk)
+    else:
+        body = export.ndjson_chunks(rows, chunk)
+    filename = f"analytics.{format}"
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if gzip:
+        body = export.gzipped(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
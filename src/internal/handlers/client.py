@@ -1,9 +1,9 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, NoResultFound
 
-from ..infra import jwt
+from ..infra import hash, jwt
 from ..infra.db import db_session
 from ..cases import client
 from ..entities.client import (
@@ -21,7 +21,7 @@ router = APIRouter(prefix="/clients")
 SECRET = settings.jwt_secret
 
 
-@router.post("/sign-up", responses={400: {"model": Error}})
+@router.post("/sign-up", responses={400: {"model": Error}, 503: {"model": Error}})
 async def signup(
     body: CreateClient,
     session: AsyncSession = Depends(db_session),
@@ -32,16 +32,24 @@ async def signup(
         return SignUpResp(id=dto.id)
     except IntegrityError:
         raise HTTPException(status_code=400, detail="Client already exists")
+    except hash.HashQueueFull:
+        raise HTTPException(status_code=503, detail="Too many sign-ups, retry later")
 
 
-@router.post("/sign-in", responses={401: {"model": Error}})
+@router.post("/sign-in", responses={401: {"model": Error}, 503: {"model": Error}})
 async def signin(
     body: SignInClient,
+    background: BackgroundTasks,
     session: AsyncSession = Depends(db_session),
 ) -> SignInResp | None | Error:
-    dto = await client.signin(session, body)
+    try:
+        dto = await client.signin(session, body)
+    except hash.HashQueueFull:
+        raise HTTPException(status_code=503, detail="Too many sign-ins, retry later")
     if dto == None:
         raise HTTPException(status_code=401, detail="boo hoo")
+    if client.needs_rehash(dto):
+        background.add_task(client.rehash_later, dto, body.password)
     return SignInResp(id=dto.id)
 
 
@@ -1,17 +1,26 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, NoResultFound
 
+from ..config import settings
+from ..infra import conditional
 from ..infra.db import db_session
-from ..cases import event
+from ..cases import catalog, event, points
 from ..entities.event import (
     Event,
     CreateEvent,
     UpdateEvent,
+    CompleteEvent,
+    CompleteEventBatch,
+    EventCompletion,
+    EventCompletionBatch,
     Error,
 )
 
+_events_json = TypeAdapter(list[Event])
+
 router = APIRouter(prefix="/events")
 
 
@@ -35,10 +44,7 @@ async def create_event(
         raise HTTPException(status_code=400, detail="Event creation failed")
 
 
-@router.get("", response_model=list[Event])
-async def get_all_events(
-    session: AsyncSession = Depends(db_session),
-):
+async def _list_events(session: AsyncSession) -> list[Event]:
     events = []
     async for dto in event.get_all_events(session):
         events.append(Event(
@@ -52,22 +58,52 @@ async def get_all_events(
     return events
 
 
-@router.get("/{id}", responses={404: {"model": Error}})
+async def _render_events(session: AsyncSession) -> bytes:
+    return _events_json.dump_json(await _list_events(session))
+
+
+@router.get("", response_model=list[Event], responses={304: {}})
+async def get_all_events(
+    if_none_match: str | None = Header(None),
+    session: AsyncSession = Depends(db_session),
+):
+    body, etag = await catalog.rendered(
+        event.KIND, lambda: _render_events(session), store=settings.catalog_prerender
+    )
+    return conditional.json_response(
+        body, etag, if_none_match, settings.catalog_cache_control
+    )
+
+
+async def _render_event(session: AsyncSession, id: uuid.UUID) -> bytes | None:
+    dto = await event.get_event(session, id)
+    if dto is None:
+        return None
+    return Event(
+        id=dto.id,
+        name=dto.name,
+        info=dto.info,
+        image_url=dto.image_url,
+        points=dto.points,
+        stand_id=dto.stand_id,
+    ).model_dump_json().encode()
+
+
+@router.get("/{id}", responses={304: {}, 404: {"model": Error}})
 async def get_event(
     id: uuid.UUID,
+    if_none_match: str | None = Header(None),
     session: AsyncSession = Depends(db_session),
 ) -> Event | None:
     try:
-        dto = await event.get_event(session, id)
-        if dto is None:
+        item = await catalog.rendered(
+            event.KIND, lambda: _render_event(session, id), id, store=settings.catalog_prerender
+        )
+        if item is None:
             raise HTTPException(status_code=404, detail="Event not found")
-        return Event(
-            id=dto.id,
-            name=dto.name,
-            info=dto.info,
-            image_url=dto.image_url,
-            points=dto.points,
-            stand_id=dto.stand_id,
+        body, etag = item
+        return conditional.json_response(
+            body, etag, if_none_match, settings.catalog_cache_control
         )
     except NoResultFound:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -100,4 +136,59 @@ async def delete_event(
     if await event.delete_event(session, id):
         return Response(status_code=204)
     else:
-        raise HTTPException(status_code=404, detail="Event not found")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Event not found")
+
+
+@router.post("/{id}/complete", responses={400: {"model": Error}, 404: {"model": Error}})
+async def complete_event(
+    id: uuid.UUID,
+    body: CompleteEvent,
+    session: AsyncSession = Depends(db_session),
+) -> EventCompletion:
+    try:
+        result = await points.complete_event(session, id, body.user_id)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Failed to complete event")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    dto, awarded = result
+    return EventCompletion(
+        event_id=id,
+        user_id=dto.user_id,
+        awarded=awarded,
+        total_points=dto.total_points,
+    )
+
+
+@router.post(
+    "/{id}/complete/batch",
+    responses={400: {"model": Error}, 404: {"model": Error}, 413: {"model": Error}},
+)
+async def complete_event_batch(
+    id: uuid.UUID,
+    body: CompleteEventBatch,
+    session: AsyncSession = Depends(db_session),
+) -> EventCompletionBatch:
+    if len(body.user_ids) > settings.points_batch_max:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.points_batch_max} users per batch",
+        )
+    try:
+        dtos = await points.complete_event_batch(session, id, body.user_ids)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Failed to complete event")
+    if dtos is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return EventCompletionBatch(
+        items=[
+            EventCompletion(
+                event_id=id,
+                user_id=dto.user_id,
+                awarded=True,
+                total_points=dto.total_points,
+            )
+            for dto in dtos
+        ],
+        skipped=len(set(body.user_ids)) - len(dtos),
+    )
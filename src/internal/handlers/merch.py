@@ -1,17 +1,26 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, NoResultFound
 
+from ..config import settings
+from ..infra import conditional
 from ..infra.db import db_session
-from ..cases import merch
+from ..cases import catalog, merch
+from ..cases.merch import InsufficientPoints, OutOfStock
 from ..entities.merch import (
+    AffordableMerch,
     Merch,
     CreateMerch,
     Error,
+    RedeemMerch,
+    Redemption,
     UpdateMerch,
 )
 
+_merch_json = TypeAdapter(list[Merch])
+
 router = APIRouter(prefix="/merch")
 
 
@@ -29,15 +38,13 @@ async def create_merch(
             info=dto.info,
             image_url=dto.image_url,
             points_needed=dto.points_needed,
+            stock=dto.stock,
         )
     except IntegrityError:
         raise HTTPException(status_code=400, detail="Merch already exists")
 
 
-@router.get("/", responses={200: {"model": list[Merch]}})
-async def get_all_merch(
-    session: AsyncSession = Depends(db_session),
-) -> list[Merch]:
+async def _list_merch(session: AsyncSession) -> list[Merch]:
     dtos = await merch.get_all(session)
     return [
         Merch(
@@ -46,26 +53,96 @@ async def get_all_merch(
             info=dto.info,
             image_url=dto.image_url,
             points_needed=dto.points_needed,
+            stock=dto.stock,
         )
         for dto in dtos
     ]
 
 
-@router.get("/{id}", responses={404: {"model": Error}})
-async def get_merch(
-    id: uuid.UUID,
+async def _render_merch(session: AsyncSession) -> bytes:
+    return _merch_json.dump_json(await _list_merch(session))
+
+
+@router.get("/", response_model=list[Merch], responses={200: {"model": list[Merch]}, 304: {}})
+async def get_all_merch(
+    if_none_match: str | None = Header(None),
     session: AsyncSession = Depends(db_session),
-) -> Merch | None:
-    try:
-        dto = await merch.get(session, id)
-        if dto is None:
-            raise HTTPException(status_code=404, detail="Merch not found")
-        return Merch(
+):
+    body, etag = await catalog.rendered(
+        merch.KIND, lambda: _render_merch(session), store=settings.catalog_prerender
+    )
+    return conditional.json_response(
+        body, etag, if_none_match, settings.merch_cache_control
+    )
+
+
+@router.get("/affordable/{user_id}")
+async def get_affordable_merch(
+    user_id: uuid.UUID,
+    session: AsyncSession = Depends(db_session),
+) -> AffordableMerch:
+    total_points, dtos, next_dto = await merch.affordable(session, user_id)
+    items = [
+        Merch(
             id=dto.id,
             name=dto.name,
             info=dto.info,
             image_url=dto.image_url,
             points_needed=dto.points_needed,
+            stock=dto.stock,
+        )
+        for dto in dtos
+    ]
+    next_reward = None
+    if next_dto is not None:
+        next_reward = Merch(
+            id=next_dto.id,
+            name=next_dto.name,
+            info=next_dto.info,
+            image_url=next_dto.image_url,
+            points_needed=next_dto.points_needed,
+            stock=next_dto.stock,
+        )
+    return AffordableMerch(
+        total_points=total_points,
+        items=items,
+        next_reward=next_reward,
+        points_to_next=next_dto.points_needed - total_points if next_dto is not None else None,
+    )
+
+
+async def _render_merch_item(session: AsyncSession, id: uuid.UUID) -> bytes | None:
+    dto = await merch.get(session, id)
+    if dto is None:
+        return None
+    return Merch(
+        id=dto.id,
+        name=dto.name,
+        info=dto.info,
+        image_url=dto.image_url,
+        points_needed=dto.points_needed,
+        stock=dto.stock,
+    ).model_dump_json().encode()
+
+
+@router.get("/{id}", responses={304: {}, 404: {"model": Error}})
+async def get_merch(
+    id: uuid.UUID,
+    if_none_match: str | None = Header(None),
+    session: AsyncSession = Depends(db_session),
+) -> Merch | None:
+    try:
+        item = await catalog.rendered(
+            merch.KIND,
+            lambda: _render_merch_item(session, id),
+            id,
+            store=settings.catalog_prerender,
+        )
+        if item is None:
+            raise HTTPException(status_code=404, detail="Merch not found")
+        body, etag = item
+        return conditional.json_response(
+            body, etag, if_none_match, settings.merch_cache_control
         )
     except NoResultFound:
         raise HTTPException(status_code=404, detail="Merch not found")
@@ -86,6 +163,7 @@ async def update_merch(
         info=dto.info,
         image_url=dto.image_url,
         points_needed=dto.points_needed,
+        stock=dto.stock,
     )
 
 
@@ -95,4 +173,33 @@ async def delete_merch(
     session: AsyncSession = Depends(db_session),
 ) -> Response:
     await merch.delete(session, id)
-    return Response(status_code=204)
\ No newline at end of file
+    return Response(status_code=204)
+
+
+@router.post(
+    "/{id}/redeem",
+    responses={400: {"model": Error}, 404: {"model": Error}, 409: {"model": Error}},
+)
+async def redeem_merch(
+    id: uuid.UUID,
+    body: RedeemMerch,
+    session: AsyncSession = Depends(db_session),
+) -> Redemption:
+    try:
+        dto = await merch.redeem(session, id, body.user_id)
+    except OutOfStock:
+        raise HTTPException(status_code=409, detail="Merch is out of stock")
+    except InsufficientPoints:
+        raise HTTPException(status_code=409, detail="Not enough points")
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Failed to redeem merch")
+    if dto is None:
+        raise HTTPException(status_code=404, detail="Merch not found")
+    return Redemption(
+        id=dto.id,
+        merch_id=dto.merch_id,
+        user_id=dto.user_id,
+        points=dto.points,
+        total_points=dto.total_points,
+        created_at=dto.created_at,
+    )
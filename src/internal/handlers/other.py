@@ -1,8 +1,28 @@
 import fastapi
 
+from ..cases import analytics, catalog, idempotency, leaderboard, live, points
+from ..infra import db, hash
+from ..infra.listener import listener
+
 router = fastapi.APIRouter()
 
 
 @router.get("/ping")
 async def ping():
     return "pong"
+
+
+@router.get("/stats")
+async def stats():
+    return {
+        "hash": hash.stats(),
+        "db_pool": db.stats(),
+        "analytics_buffer": analytics.buffer.stats(),
+        "analytics_dedup": analytics.recent.stats(),
+        "listener": listener.stats(),
+        "analytics_stream": live.broadcaster.stats(),
+        "idempotency": idempotency.cache.stats(),
+        "leaderboard": leaderboard.stats(),
+        "points_coalescer": points.coalescer.stats(),
+        "catalog_cache": catalog.cache.stats(),
+    }
@@ -1,25 +1,95 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import settings
 from ..infra.db import db_session
-from ..cases import points
-from ..entities.points import Error, Point, UpsertPoints
+from ..cases import leaderboard, points
+from ..cases.idempotency import IdempotencyConflict
+from ..entities.points import (
+    Error,
+    Leaderboard,
+    LeaderboardEntry,
+    LedgerEntry,
+    Point,
+    PointsHistory,
+    UpsertPoints,
+    UpsertPointsBatch,
+)
 
 router = APIRouter(prefix="/points")
 
 
-@router.post("/upsert", responses={400: {"model": Error}})
+@router.post("/upsert", responses={400: {"model": Error}, 409: {"model": Error}})
 async def upsert_points(
     body: UpsertPoints,
+    idempotency_key: str | None = Header(None),
     session: AsyncSession = Depends(db_session),
 ) -> Point | None:
-    dto = await points.upsert_points(session, body.user_id, body.points)
+    try:
+        dto = await points.upsert_points(
+            session,
+            body.user_id,
+            body.points,
+            reason=body.reason,
+            event_id=body.event_id,
+            idempotency_key=idempotency_key or body.idempotency_key,
+        )
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Failed to upsert points")
+    except IdempotencyConflict:
+        raise HTTPException(status_code=409, detail="Idempotency key is in use")
     if dto is None:
         raise HTTPException(status_code=400, detail="Failed to upsert points")
     return Point(user_id=dto.user_id, total_points=dto.total_points)
 
 
+@router.post(
+    "/batch",
+    responses={400: {"model": Error}, 409: {"model": Error}, 413: {"model": Error}},
+)
+async def upsert_points_batch(
+    body: UpsertPointsBatch,
+    idempotency_key: str | None = Header(None),
+    session: AsyncSession = Depends(db_session),
+) -> list[Point]:
+    if len(body.items) > settings.points_batch_max:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.points_batch_max} items per batch",
+        )
+    try:
+        dtos = await points.upsert_points_batch(
+            session,
+            [(item.user_id, item.points) for item in body.items],
+            reason=body.reason,
+            event_id=body.event_id,
+            idempotency_key=idempotency_key,
+        )
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Failed to upsert points")
+    except IdempotencyConflict:
+        raise HTTPException(status_code=409, detail="Idempotency key is in use")
+    return [Point(user_id=dto.user_id, total_points=dto.total_points) for dto in dtos]
+
+
+# declared before /{user_id} so "leaderboard" is not parsed as an id
+@router.get("/leaderboard")
+async def get_leaderboard(
+    limit: int = Query(10, ge=1, le=settings.points_leaderboard_max),
+    session: AsyncSession = Depends(db_session),
+) -> Leaderboard:
+    rows = await leaderboard.top(session, limit)
+    return Leaderboard(
+        items=[
+            LeaderboardEntry(rank=rank, user_id=user_id, total_points=total_points)
+            for rank, user_id, total_points in rows
+        ],
+        participants=len(leaderboard.board),
+    )
+
+
 @router.get("/{user_id}", responses={404: {"model": Error}})
 async def get_points(
     user_id: uuid.UUID,
@@ -28,4 +98,39 @@ async def get_points(
     dto = await points.get_points(session, user_id)
     if dto is None:
         raise HTTPException(status_code=404, detail="Points not found")
-    return Point(user_id=dto.user_id, total_points=dto.total_points)
\ No newline at end of file
+    return Point(user_id=dto.user_id, total_points=dto.total_points)
+
+
+@router.get("/{user_id}/history")
+async def get_points_history(
+    user_id: uuid.UUID,
+    before: int | None = None,
+    page_size: int = Query(50, ge=1, le=500),
+    session: AsyncSession = Depends(db_session),
+) -> PointsHistory:
+    dtos = await points.get_history(session, user_id, before, page_size)
+    return PointsHistory(
+        items=[
+            LedgerEntry(
+                id=dto.id,
+                delta=dto.delta,
+                reason=dto.reason,
+                event_id=dto.event_id,
+                created_at=dto.created_at,
+            )
+            for dto in dtos
+        ],
+        next_before=dtos[-1].id if len(dtos) == page_size else None,
+    )
+
+
+@router.get("/{user_id}/rank", responses={404: {"model": Error}})
+async def get_points_rank(
+    user_id: uuid.UUID,
+    session: AsyncSession = Depends(db_session),
+) -> LeaderboardEntry:
+    found = await leaderboard.rank(session, user_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Points not found")
+    rank, total_points = found
+    return LeaderboardEntry(rank=rank, user_id=user_id, total_points=total_points)
@@ -1,10 +1,13 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, NoResultFound
 
+from ..config import settings
+from ..infra import conditional
 from ..infra.db import db_session
-from ..cases import stand
+from ..cases import catalog, stand
 from ..entities.stand import (
     Stand,
     CreateStand,
@@ -12,6 +15,8 @@ from ..entities.stand import (
     Error,
 )
 
+_stands_json = TypeAdapter(list[Stand])
+
 router = APIRouter(prefix="/stands")
 
 
@@ -34,10 +39,7 @@ async def create_stand(
         raise HTTPException(status_code=400, detail="Stand creation failed")
 
 
-@router.get("", response_model=list[Stand])
-async def get_all_stands(
-    session: AsyncSession = Depends(db_session),
-):
+async def _list_stands(session: AsyncSession) -> list[Stand]:
     stands = []
     async for dto in stand.get_all_stands(session):
         stands.append(Stand(
@@ -50,21 +52,51 @@ async def get_all_stands(
     return stands
 
 
-@router.get("/{id}", responses={404: {"model": Error}})
+async def _render_stands(session: AsyncSession) -> bytes:
+    return _stands_json.dump_json(await _list_stands(session))
+
+
+@router.get("", response_model=list[Stand], responses={304: {}})
+async def get_all_stands(
+    if_none_match: str | None = Header(None),
+    session: AsyncSession = Depends(db_session),
+):
+    body, etag = await catalog.rendered(
+        stand.KIND, lambda: _render_stands(session), store=settings.catalog_prerender
+    )
+    return conditional.json_response(
+        body, etag, if_none_match, settings.catalog_cache_control
+    )
+
+
+async def _render_stand(session: AsyncSession, id: uuid.UUID) -> bytes | None:
+    dto = await stand.get_stand(session, id)
+    if dto is None:
+        return None
+    return Stand(
+        id=dto.id,
+        name=dto.name,
+        info=dto.info,
+        location=dto.location,
+        image_url=dto.image_url,
+    ).model_dump_json().encode()
+
+
+@router.get("/{id}", responses={304: {}, 404: {"model": Error}})
 async def get_stand(
     id: uuid.UUID,
+    if_none_match: str | None = Header(None),
     session: AsyncSession = Depends(db_session),
 ) -> Stand | None:
     try:
-        dto = await stand.get_stand(session, id)
-        if dto is None:
+        item = await catalog.rendered(
+            stand.KIND, lambda: _render_stand(session, id), id, store=settings.catalog_prerender
+        )
+        if item is None:
             raise HTTPException(status_code=404, detail="Stand not found")
-        return Stand(
-            id=dto.id,
-            name=dto.name,
-            info=dto.info,
-            location=dto.location,
-            image_url=dto.image_url,
+        body, etag = item
+        return conditional.json_response(
+            body, etag, if_none_match, settings.catalog_cache_control
         )
     except NoResultFound:
         raise HTTPException(status_code=404, detail="Stand not found")
@@ -0,0 +1,71 @@
+import asyncio
+from collections.abc import Hashable
+from typing import Any
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    # pending updates are keyed, so a slow reader gets the latest value per
+    # key instead of a growing backlog; memory is bounded by the key count
+    def __init__(self):
+        self._pending: dict[Hashable, Any] = {}
+        self._ready = asyncio.Event()
+        self.coalesced = 0
+
+    def push(self, updates: dict[Hashable, Any]) -> None:
+        for key, value in updates.items():
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = value
+        if self._pending:
+            self._ready.set()
+
+    async def next(self, timeout: float) -> dict[Hashable, Any] | None:
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except TimeoutError:
+            return None
+        self._ready.clear()
+        pending, self._pending = self._pending, {}
+        return pending
+
+
+class Broadcaster:
+    def __init__(self, max_subscribers: int):
+        self._max_subscribers = max_subscribers
+        self._subscribers: set[Subscription] = set()
+        self._state: dict[Hashable, Any] = {}
+        self.published = 0
+
+    def publish(self, state: dict[Hashable, Any], default: Any = None) -> None:
+        # fan out only what changed; keys that vanished are sent as `default`
+        changes = {k: v for k, v in state.items() if self._state.get(k) != v}
+        changes.update({k: default for k in self._state if k not in state})
+        self._state = dict(state)
+        if not changes:
+            return
+        self.published += 1
+        for sub in self._subscribers:
+            sub.push(changes)
+
+    def subscribe(self) -> Subscription:
+        if len(self._subscribers) >= self._max_subscribers:
+            raise TooManySubscribers()
+        sub = Subscription()
+        sub.push(self._state)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "max_subscribers": self._max_subscribers,
+            "published": self.published,
+            "keys": len(self._state),
+        }
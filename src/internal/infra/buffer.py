@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+_STOP: Any = object()
+
+
+class BufferFull(Exception):
+    pass
+
+
+class WriteBuffer(Generic[T]):
+    def __init__(
+        self,
+        flush: Callable[[list[T]], Awaitable[Any]],
+        max_size: int,
+        max_batch: int,
+        interval: float,
+        put_timeout: float,
+        attempts: int = 3,
+    ):
+        self._flush = flush
+        self._max_size = max_size
+        self._max_batch = max_batch
+        self._interval = interval
+        self._put_timeout = put_timeout
+        self._attempts = attempts
+        self._queue: asyncio.Queue[T] | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self.flushed = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self._max_size)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping = True
+        assert self._queue is not None
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def put(self, item: T) -> None:
+        if self._queue is None or self._stopping:
+            raise BufferFull()
+        try:
+            await asyncio.wait_for(self._queue.put(item), self._put_timeout)
+        except TimeoutError:
+            raise BufferFull()
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while not self._stopping or not self._queue.empty():
+            batch = await self._collect()
+            if batch:
+                await self._write(batch)
+
+    async def _collect(self) -> list[T]:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._interval
+        batch: list[T] = []
+        while len(batch) < self._max_batch:
+            if self._stopping and self._queue.empty():
+                break
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except TimeoutError:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        return batch
+
+    async def _write(self, batch: list[T]) -> None:
+        for attempt in range(1, self._attempts + 1):
+            try:
+                await self._flush(batch)
+            except Exception:
+                logger.exception(
+                    "flush of %d rows failed (attempt %d/%d)",
+                    len(batch), attempt, self._attempts,
+                )
+                if attempt < self._attempts:
+                    await asyncio.sleep(self._interval * attempt)
+            else:
+                self.flushed += len(batch)
+                return
+        self.dropped += len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self._max_size,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+        }
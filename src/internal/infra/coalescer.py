@@ -0,0 +1,77 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+# Collects items submitted within one tick and hands them to `flush` as a
+# single batch. flush returns one result per item, in order; an exception
+# in that list fails only its own caller.
+class Coalescer(Generic[T, R]):
+    def __init__(
+        self,
+        flush: Callable[[list[T]], Awaitable[list[R | BaseException]]],
+        interval: float,
+        max_batch: int,
+    ):
+        self._flush = flush
+        self._interval = interval
+        self._max_batch = max_batch
+        self._items: list[T] = []
+        self._futures: list[asyncio.Future] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append(item)
+        self._futures.append(future)
+        if len(self._items) >= self._max_batch:
+            self._fire()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._interval, self._fire)
+        return await future
+
+    def _fire(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._items:
+            return
+        items, futures = self._items, self._futures
+        self._items, self._futures = [], []
+        task = asyncio.create_task(self._run(items, futures))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, items: list[T], futures: list[asyncio.Future]) -> None:
+        self.batches += 1
+        self.items += len(items)
+        try:
+            results = await self._flush(items)
+        except Exception as e:
+            results = [e] * len(items)
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def stop(self) -> None:
+        self._fire()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending": len(self._items),
+            "batches": self.batches,
+            "items": self.items,
+        }
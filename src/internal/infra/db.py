@@ -1,18 +1,100 @@
+import asyncio
+import logging
+import time
 from collections.abc import AsyncGenerator
 from typing import Any
 
+import sqlalchemy
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncSession,
     AsyncEngine,
     async_sessionmaker,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import queue as sqla_queue
 
 from internal.config import settings
 
 DATABASE_URL = settings.DB_URL
 
-engine: AsyncEngine = create_async_engine(DATABASE_URL, echo=True)
+logger = logging.getLogger(__name__)
+
+
+class _Checkouts:
+    count = 0
+    wait_total = 0.0
+    wait_max = 0.0
+    timeouts = 0
+    connects = 0
+    connect_total = 0.0
+
+
+# Only time spent waiting on the pool's queue counts as checkout wait, and
+# only when a connection came out of it. Checkouts that time out and time
+# spent opening new connections are counted separately.
+class _TimedQueue(sqla_queue.AsyncAdaptedQueue):
+    def get(self, block: bool = True, timeout: float | None = None):
+        start = time.perf_counter()
+        try:
+            entry = super().get(block, timeout)
+        except sqla_queue.Empty:
+            if block:
+                _Checkouts.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        _Checkouts.count += 1
+        _Checkouts.wait_total += waited
+        _Checkouts.wait_max = max(_Checkouts.wait_max, waited)
+        return entry
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    _queue_class = _TimedQueue
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        record = super()._create_connection()
+        _Checkouts.connects += 1
+        _Checkouts.connect_total += time.perf_counter() - start
+        return record
+
+
+def _connect_args() -> dict:
+    server_settings = {}
+    if settings.db_statement_timeout_ms > 0:
+        server_settings["statement_timeout"] = str(settings.db_statement_timeout_ms)
+    return {"server_settings": server_settings}
+
+
+def pool_limits() -> tuple[int, int]:
+    # DB_POOL_SIZE=0 splits DB_CONNECTION_BUDGET evenly across the workers,
+    # keeping one connection per worker for the LISTEN connection, and
+    # halves each share between the pool and its overflow
+    if settings.db_pool_size > 0:
+        return settings.db_pool_size, settings.db_max_overflow
+    share = min(20, max(2, settings.db_connection_budget // settings.WORKERS - 1))
+    return share // 2, share - share // 2
+
+
+def connections_needed() -> int:
+    size, overflow = pool_limits()
+    return settings.WORKERS * (size + overflow + 1)
+
+
+pool_size, max_overflow = pool_limits()
+
+engine: AsyncEngine = create_async_engine(
+    DATABASE_URL,
+    echo=settings.db_echo,
+    poolclass=TimedQueuePool,
+    pool_size=pool_size,
+    max_overflow=max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_recycle=settings.db_pool_recycle,
+    connect_args=_connect_args(),
+)
 
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
@@ -20,3 +102,59 @@ SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 async def db_session() -> AsyncGenerator[AsyncSession, Any]:
     async with SessionLocal() as session:
         yield session
+
+
+async def check_connections() -> None:
+    async with engine.connect() as conn:
+        available = await conn.scalar(sqlalchemy.text(
+            "select current_setting('max_connections')::int"
+            " - current_setting('superuser_reserved_connections')::int"
+        ))
+    needed = connections_needed()
+    if needed > available:
+        logger.warning(
+            "%d workers may open up to %d connections, but the server allows %d;"
+            " lower DB_CONNECTION_BUDGET or DB_POOL_SIZE/DB_MAX_OVERFLOW",
+            settings.WORKERS, needed, available,
+        )
+
+
+async def warmup() -> None:
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(sqlalchemy.text("select 1"))
+
+    await check_connections()
+    await asyncio.gather(*(ping() for _ in range(pool_size)))
+
+
+async def dispose() -> None:
+    await engine.dispose()
+
+
+def reset_stats() -> None:
+    _Checkouts.count = 0
+    _Checkouts.wait_total = 0.0
+    _Checkouts.wait_max = 0.0
+    _Checkouts.timeouts = 0
+    _Checkouts.connects = 0
+    _Checkouts.connect_total = 0.0
+
+
+def stats() -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkouts": _Checkouts.count,
+        "checkout_wait_avg_ms": (
+            _Checkouts.wait_total / _Checkouts.count * 1000 if _Checkouts.count else 0.0
+        ),
+        "checkout_wait_max_ms": _Checkouts.wait_max * 1000,
+        "checkout_timeouts": _Checkouts.timeouts,
+        "connects": _Checkouts.connects,
+        "connect_avg_ms": (
+            _Checkouts.connect_total / _Checkouts.connects * 1000 if _Checkouts.connects else 0.0
+        ),
+    }
@@ -0,0 +1,46 @@
+import csv
+import io
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
+
+from pydantic import BaseModel
+
+
+async def csv_chunks(
+    rows: AsyncIterable[BaseModel], columns: Sequence[str], chunk_rows: int
+) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    pending = 0
+    async for row in rows:
+        writer.writerow(row.model_dump(mode="json"))
+        pending += 1
+        if pending >= chunk_rows:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    yield buf.getvalue().encode()
+
+
+async def ndjson_chunks(
+    rows: AsyncIterable[BaseModel], chunk_rows: int
+) -> AsyncIterator[bytes]:
+    lines: list[str] = []
+    async for row in rows:
+        lines.append(row.model_dump_json())
+        if len(lines) >= chunk_rows:
+            yield ("\n".join(lines) + "\n").encode()
+            lines.clear()
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def gzipped(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    z = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
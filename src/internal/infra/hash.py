@@ -1,15 +1,78 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
+
+from internal.config import settings
+
+# argon2-cffi releases the GIL while hashing, so a small thread pool is
+# enough to keep the event loop free without pickling work to processes.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.hash_workers, thread_name_prefix="hash"
+)
+_pending = 0
+
+_hasher = PasswordHasher(
+    time_cost=settings.argon2_time_cost,
+    memory_cost=settings.argon2_memory_cost,
+    parallelism=settings.argon2_parallelism,
+)
+
+
+class HashQueueFull(Exception):
+    pass
 
 
 def hash_password(plain_password: str) -> str:
-    ph = PasswordHasher()
-    return ph.hash(plain_password)
+    return _hasher.hash(plain_password)
 
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
-    ph = PasswordHasher()
     try:
-        return ph.verify(password_hash, plain_password)
+        return _hasher.verify(password_hash, plain_password)
     except VerifyMismatchError:
         return False
+
+
+def needs_rehash(password_hash: str) -> bool:
+    try:
+        return _hasher.check_needs_rehash(password_hash)
+    except InvalidHashError:
+        return False
+
+
+async def _submit(fn, *args):
+    global _pending
+    if _pending >= settings.hash_queue_limit:
+        raise HashQueueFull()
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(plain_password: str) -> str:
+    return await _submit(hash_password, plain_password)
+
+
+async def verify_password_async(plain_password: str, password_hash: str) -> bool:
+    return await _submit(verify_password, plain_password, password_hash)
+
+
+def stats() -> dict:
+    return {
+        "workers": settings.hash_workers,
+        "pending": _pending,
+        "queued": max(0, _pending - settings.hash_workers),
+        "queue_limit": settings.hash_queue_limit,
+        "time_cost": _hasher.time_cost,
+        "memory_cost": _hasher.memory_cost,
+        "parallelism": _hasher.parallelism,
+    }
+
+
+def shutdown() -> None:
+    _executor.shutdown(wait=True)
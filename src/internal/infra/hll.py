@@ -0,0 +1,23 @@
+import math
+from collections.abc import Sequence
+
+# Registers are filled in Postgres (hll_add / hll_union, migration 011):
+# 2^12 registers, so the relative standard error is 1.04 / sqrt(4096) ~ 1.6%
+# and roughly 95% of estimates fall within 2 * ERROR of the true count.
+P = 12
+M = 1 << P
+ERROR = 1.04 / math.sqrt(M)
+
+_ALPHA = 0.7213 / (1 + 1.079 / M)
+
+
+def estimate(registers: Sequence[int] | None) -> int:
+    if not registers:
+        return 0
+    z = sum(2.0 ** -r for r in registers)
+    e = _ALPHA * M * M / z
+    zeros = registers.count(0)
+    # linear counting is more accurate while many registers are still empty
+    if e <= 2.5 * M and zeros:
+        e = M * math.log(M / zeros)
+    return round(e)
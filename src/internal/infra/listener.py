@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import secrets
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+
+import asyncpg
+
+from internal.config import settings
+
+logger = logging.getLogger(__name__)
+
+# pg_notify payloads are capped at 8000 bytes
+PAYLOAD_LIMIT = 7000
+
+
+# A dedicated LISTEN connection that reconnects on loss. on_connect hooks
+# run after every (re)connect once the channels are subscribed, so state
+# that may have missed notifications can resync; on_disconnect hooks run
+# as soon as the connection is lost.
+#
+# Payloads are newline-separated lines headed by this worker's token;
+# subscribers get the lines of other workers' notifications only.
+# Notifications sent inside a write transaction are delivered on commit.
+class Listener:
+    def __init__(self, dsn: str, retry: float, ping: float):
+        self._dsn = dsn
+        self._retry = retry
+        self._ping = ping
+        self._channels: dict[str, list[Callable[[list[str]], None]]] = {}
+        self._on_connect: list[Callable[[], Awaitable[None]]] = []
+        self._on_disconnect: list[Callable[[], None]] = []
+        self._task: asyncio.Task | None = None
+        self.connected = False
+        self.reconnects = 0
+        self.token = secrets.token_hex(8)
+
+    def subscribe(
+        self,
+        channel: str,
+        callback: Callable[[list[str]], None],
+        on_connect: Callable[[], Awaitable[None]] | None = None,
+        on_disconnect: Callable[[], None] | None = None,
+    ) -> None:
+        self._channels.setdefault(channel, []).append(callback)
+        if on_connect is not None:
+            self._on_connect.append(on_connect)
+        if on_disconnect is not None:
+            self._on_disconnect.append(on_disconnect)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def payloads(self, lines: Iterable[str]) -> Iterator[str]:
+        chunk: list[str] = []
+        size = len(self.token)
+        for line in lines:
+            if chunk and size + len(line) + 1 > PAYLOAD_LIMIT:
+                yield "\n".join([self.token, *chunk])
+                chunk, size = [], len(self.token)
+            chunk.append(line)
+            size += len(line) + 1
+        if chunk:
+            yield "\n".join([self.token, *chunk])
+
+    async def notify(
+        self, send: Callable[..., Awaitable[None]], lines: Iterable[str]
+    ) -> None:
+        for payload in self.payloads(lines):
+            await send(payload=payload)
+
+    def _dispatch(self, conn, pid, channel: str, payload: str) -> None:
+        token, *lines = payload.split("\n")
+        if token == self.token:
+            return
+        for callback in self._channels.get(channel, ()):
+            try:
+                callback(lines)
+            except Exception:
+                logger.exception("listener callback for %s failed", channel)
+
+    async def _run(self) -> None:
+        # nothing but cancellation may end this loop: a dead listener would
+        # leave every subscriber without notifications for good
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self._dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                for channel in self._channels:
+                    await conn.add_listener(channel, self._dispatch)
+                self.connected = True
+                for hook in self._on_connect:
+                    try:
+                        await hook()
+                    except Exception:
+                        logger.exception("listener on_connect hook failed")
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), self._ping)
+                    except TimeoutError:
+                        # a half-open connection never reports loss; a ping
+                        # that does not come back in time counts as one
+                        await asyncio.wait_for(conn.fetchval("select 1"), self._ping)
+            except Exception:
+                logger.exception("listener connection lost")
+            finally:
+                if self.connected:
+                    self.connected = False
+                    for hook in self._on_disconnect:
+                        try:
+                            hook()
+                        except Exception:
+                            logger.exception("listener on_disconnect hook failed")
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+            self.reconnects += 1
+            await asyncio.sleep(self._retry)
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "channels": sorted(self._channels),
+        }
+
+
+listener = Listener(settings.PG_DSN, settings.listener_retry, settings.listener_ping)
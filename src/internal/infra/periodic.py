@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class Periodic:
+    def __init__(self, fn: Callable[[], Awaitable[Any]], interval: float):
+        self._fn = fn
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+        self.runs = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._fn()
+            except Exception:
+                self.failures += 1
+                logger.exception("periodic %s failed", getattr(self._fn, "__name__", self._fn))
+            else:
+                self.runs += 1
+            await asyncio.sleep(self._interval)
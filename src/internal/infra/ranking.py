@@ -0,0 +1,43 @@
+import bisect
+from collections.abc import Hashable, Iterable
+from typing import Any
+
+
+# scores kept sorted high to low, ties broken by key; rank() counts strictly
+# higher scores, so equal scores share a rank
+class Ranking:
+    def __init__(self):
+        self._scores: dict[Hashable, int] = {}
+        self._order: list[tuple[int, Any]] = []
+
+    def set(self, key: Hashable, score: int) -> None:
+        old = self._scores.get(key)
+        if old == score:
+            return
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, (-old, key))]
+        self._scores[key] = score
+        bisect.insort(self._order, (-score, key))
+
+    def replace(self, items: Iterable[tuple[Hashable, int]]) -> None:
+        self._scores = dict(items)
+        self._order = sorted((-score, key) for key, score in self._scores.items())
+
+    def score(self, key: Hashable) -> int | None:
+        return self._scores.get(key)
+
+    def rank(self, key: Hashable) -> int | None:
+        score = self._scores.get(key)
+        if score is None:
+            return None
+        return bisect.bisect_left(self._order, (-score,)) + 1
+
+    def top(self, n: int) -> list[tuple[int, Hashable, int]]:
+        out: list[tuple[int, Hashable, int]] = []
+        for i, (neg, key) in enumerate(self._order[:n]):
+            rank = out[-1][0] if out and out[-1][2] == -neg else i + 1
+            out.append((rank, key, -neg))
+        return out
+
+    def __len__(self) -> int:
+        return len(self._scores)
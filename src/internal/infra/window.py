@@ -0,0 +1,48 @@
+import heapq
+import time
+from collections.abc import Callable, Hashable
+
+
+# distinct members seen per key within the last `seconds`
+class SlidingWindow:
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.time):
+        self.seconds = seconds
+        self._clock = clock
+        self._seen: dict[Hashable, dict[Hashable, float]] = {}
+        # (seen_at, member) min-heaps; entries superseded by a later sighting
+        # are skipped on expiry, so out-of-order adds stay correct
+        self._expiry: dict[Hashable, list[tuple[float, Hashable]]] = {}
+
+    def add(self, key: Hashable, member: Hashable, at: float | None = None) -> None:
+        at = self._clock() if at is None else at
+        seen = self._seen.setdefault(key, {})
+        if at <= seen.get(member, float("-inf")):
+            return
+        seen[member] = at
+        heapq.heappush(self._expiry.setdefault(key, []), (at, member))
+        self._expire(key)
+
+    def count(self, key: Hashable) -> int:
+        self._expire(key)
+        return len(self._seen.get(key, ()))
+
+    def counts(self) -> dict[Hashable, int]:
+        return {key: self.count(key) for key in list(self._seen)}
+
+    def clear(self) -> None:
+        self._seen.clear()
+        self._expiry.clear()
+
+    def _expire(self, key: Hashable) -> None:
+        heap = self._expiry.get(key)
+        if not heap:
+            return
+        seen = self._seen[key]
+        cutoff = self._clock() - self.seconds
+        while heap and heap[0][0] < cutoff:
+            at, member = heapq.heappop(heap)
+            if seen.get(member) == at:
+                del seen[member]
+        if not heap:
+            del self._expiry[key]
+            del self._seen[key]
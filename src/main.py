@@ -1,7 +1,13 @@
+from contextlib import asynccontextmanager
+
 import fastapi
 import uvicorn
 
 from internal.config import settings
+from internal.cases import analytics as analytics_cases, idempotency, leaderboard, live
+from internal.cases import points as points_cases
+from internal.infra import db, hash
+from internal.infra.listener import listener
 from internal.handlers import other
 from internal.handlers import client
 from internal.handlers import analytics
@@ -11,7 +17,31 @@ from internal.handlers import event
 from internal.handlers import stand
 from internal.handlers import points
 
-app = fastapi.FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: fastapi.FastAPI):
+    await db.warmup()
+    analytics_cases.buffer.start()
+    analytics_cases.maintenance.start()
+    analytics_cases.sketcher.start()
+    idempotency.cleanup.start()
+    listener.start()
+    live.ticker.start()
+    leaderboard.resyncer.start()
+    yield
+    await leaderboard.resyncer.stop()
+    await live.ticker.stop()
+    await listener.stop()
+    await idempotency.cleanup.stop()
+    await analytics_cases.sketcher.stop()
+    await analytics_cases.maintenance.stop()
+    await analytics_cases.buffer.stop()
+    await points_cases.coalescer.stop()
+    await db.dispose()
+    hash.shutdown()
+
+
+app = fastapi.FastAPI(lifespan=lifespan)
 app.include_router(other.router, tags=["Check"])
 app.include_router(client.router, tags=["Client"])
 app.include_router(analytics.router, tags=["Analytics"])
@@ -22,7 +52,21 @@ app.include_router(points.router, tags=["Points"])
 
 
 def main():
-    uvicorn.run("main:app", host=settings.app_host, port=settings.app_port, reload=True)
+    if settings.app_reload:
+        uvicorn.run("main:app", host=settings.app_host, port=settings.app_port, reload=True)
+        return
+    # loop/http "auto" pick uvloop and httptools when they are installed
+    uvicorn.run(
+        "main:app",
+        host=settings.app_host,
+        port=settings.app_port,
+        workers=settings.WORKERS,
+        loop="auto",
+        http="auto",
+        backlog=settings.app_backlog,
+        timeout_keep_alive=settings.app_keepalive,
+        timeout_graceful_shutdown=settings.app_graceful_timeout,
+    )
 
 
 if __name__ == "__main__":
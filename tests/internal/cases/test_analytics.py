@@ -0,0 +1,538 @@
+import datetime
+import decimal
+import uuid
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.internal.cases.analytics import (
+    create, create_many, get_grouped, get_unique, rebuild_hourly, maintain_partitions
+)
+from src.internal.cases import analytics as analytics_cases
+from src.internal.entities.analytics import CreateAnalytic, AnalyticGrouped, AnalyticsFilter
+from src.db import analytics as a, models as m
+from internal.cases import idempotency
+
+
+@pytest.fixture
+def mock_session():
+    """Mock AsyncSession for testing."""
+    session = AsyncMock(spec=AsyncSession)
+    session.begin.return_value.__aenter__ = AsyncMock()
+    session.begin.return_value.__aexit__ = AsyncMock(return_value=None)
+    return session
+
+
+@pytest.fixture
+def sample_analytic():
+    """Sample analytic row for testing."""
+    return m.Analytic(
+        id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        stand_id=uuid.uuid4(),
+        time=datetime.datetime(2025, 10, 1, 12, 30),
+    )
+
+
+class TestCreateAnalytic:
+    @pytest.mark.asyncio
+    async def test_create_analytic(self, mock_session, sample_analytic):
+        # Arrange
+        ent = CreateAnalytic(user_id=sample_analytic.user_id, stand_id=sample_analytic.stand_id)
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class, \
+                patch('src.internal.cases.analytics._now', return_value=sample_analytic.time):
+            mock_querier = AsyncMock()
+            mock_querier.create_analytics.return_value = sample_analytic
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await create(mock_session, ent)
+
+            # Assert
+            assert result == sample_analytic
+            mock_querier.create_analytics.assert_called_once_with(
+                id=None, time=sample_analytic.time, user_id=ent.user_id, stand_id=ent.stand_id
+            )
+            mock_querier.increment_analytics_hourly_count.assert_called_once_with(
+                bucket=datetime.datetime(2025, 10, 1, 12),
+                stand_id=sample_analytic.stand_id,
+                count=1,
+            )
+            mock_querier.increment_analytics_hourly.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_create_retry_returns_stored_visit(self, mock_session, sample_analytic):
+        # Arrange
+        ent = CreateAnalytic(
+            id=sample_analytic.id, user_id=sample_analytic.user_id, stand_id=sample_analytic.stand_id
+        )
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.create_analytics.return_value = None
+            mock_querier.get_analytic.return_value = sample_analytic
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await create(mock_session, ent)
+
+            # Assert
+            assert result == sample_analytic
+            mock_querier.get_analytic.assert_called_once_with(id=sample_analytic.id)
+            mock_querier.increment_analytics_hourly.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_create_many(self, mock_session, sample_analytic):
+        # Arrange
+        rows = [
+            sample_analytic,
+            sample_analytic.model_copy(update={"id": uuid.uuid4()}),
+            sample_analytic.model_copy(
+                update={"id": uuid.uuid4(), "time": datetime.datetime(2025, 10, 1, 13, 5)}
+            ),
+        ]
+        params = []
+
+        async def mock_async_iter(arg):
+            params.append(arg)
+            for row in rows:
+                yield row
+
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.create_analytics_batch = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await create_many(mock_session, rows)
+
+            # Assert
+            assert result == 3
+            assert params[0].ids == [row.id for row in rows]
+            assert params[0].times == [row.time for row in rows]
+            assert params[0].dedup_seconds == 0
+            mock_querier.lock_analytics_visits.assert_not_called()
+            increments = [
+                c.kwargs for c in mock_querier.increment_analytics_hourly.call_args_list
+            ]
+            assert increments == [
+                {"bucket": datetime.datetime(2025, 10, 1, 12), "stand_id": sample_analytic.stand_id, "count": 2,
+                 "user_ids": [sample_analytic.user_id, sample_analytic.user_id]},
+                {"bucket": datetime.datetime(2025, 10, 1, 13), "stand_id": sample_analytic.stand_id, "count": 1,
+                 "user_ids": [sample_analytic.user_id]},
+            ]
+
+
+class TestIdempotency:
+    @pytest.fixture(autouse=True)
+    def clear_keys(self):
+        idempotency.cache.clear()
+        yield
+        idempotency.cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_create_many_skips_keys_claimed_elsewhere(self, mock_session, sample_analytic):
+        # Arrange
+        other = sample_analytic.model_copy(update={"id": uuid.uuid4()})
+        inserted = []
+
+        async def claim(**kwargs):
+            yield "fresh"
+
+        async def insert(arg):
+            inserted.extend(arg.ids)
+            for row in (sample_analytic, other):
+                if row.id in arg.ids:
+                    yield row
+
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class, \
+                patch('internal.cases.idempotency.i.AsyncQuerier') as mock_keys_class, \
+                patch('internal.cases.live.publish', AsyncMock()):
+            mock_querier = AsyncMock()
+            mock_querier.create_analytics_batch = insert
+            mock_querier_class.return_value = mock_querier
+            mock_keys = AsyncMock()
+            mock_keys.claim_idempotency_keys = claim
+            mock_keys_class.return_value = mock_keys
+
+            # Act
+            result = await create_many(
+                mock_session, [sample_analytic, other], ["fresh", "taken"]
+            )
+
+            # Assert
+            assert result == 1
+            assert inserted == [sample_analytic.id]
+            kwargs = mock_keys.save_idempotency_responses.call_args.kwargs
+            assert kwargs["keys"] == ["fresh"]
+
+    @pytest.mark.asyncio
+    async def test_create_many_writes_repeated_key_once(self, mock_session, sample_analytic):
+        # Arrange
+        repeat = sample_analytic.model_copy()
+        inserted = []
+
+        async def claim(**kwargs):
+            assert kwargs["keys"] == ["k"]
+            yield "k"
+
+        async def insert(arg):
+            inserted.extend(arg.ids)
+            yield sample_analytic
+
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class, \
+                patch('internal.cases.idempotency.i.AsyncQuerier') as mock_keys_class, \
+                patch('internal.cases.live.publish', AsyncMock()):
+            mock_querier = AsyncMock()
+            mock_querier.create_analytics_batch = insert
+            mock_querier_class.return_value = mock_querier
+            mock_keys = AsyncMock()
+            mock_keys.claim_idempotency_keys = claim
+            mock_keys_class.return_value = mock_keys
+
+            # Act
+            result = await create_many(mock_session, [sample_analytic, repeat], ["k", "k"])
+
+            # Assert
+            assert result == 1
+            assert inserted == [sample_analytic.id]
+
+    @pytest.mark.asyncio
+    async def test_enqueue_replays_remembered_key(self, sample_analytic):
+        # Arrange
+        ent = CreateAnalytic(user_id=sample_analytic.user_id, stand_id=sample_analytic.stand_id)
+        with patch.object(analytics_cases.buffer, 'put', AsyncMock()) as put, \
+                patch('internal.cases.live.record'):
+            # Act
+            first, queued = await analytics_cases.enqueue(ent, "k1")
+            again, queued_again = await analytics_cases.enqueue(ent, "k1")
+
+            # Assert
+            assert (queued, queued_again) == (True, False)
+            assert again.model_dump() == first.model_dump()
+            put.assert_awaited_once()
+
+
+class TestDedup:
+    @pytest.fixture(autouse=True)
+    def dedup_window(self):
+        with patch('internal.config.settings.analytics_dedup_seconds', 10):
+            analytics_cases.recent.clear()
+            yield
+            analytics_cases.recent.clear()
+
+    @pytest.mark.asyncio
+    async def test_create_returns_recent_visit_from_db(self, mock_session, sample_analytic):
+        # Arrange
+        ent = CreateAnalytic(user_id=sample_analytic.user_id, stand_id=sample_analytic.stand_id)
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_recent_analytic.return_value = sample_analytic
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await create(mock_session, ent)
+
+            # Assert
+            assert result == sample_analytic
+            mock_querier.lock_analytics_visits.assert_called_once_with(
+                user_ids=[ent.user_id], stand_ids=[ent.stand_id]
+            )
+            mock_querier.create_analytics.assert_not_called()
+            mock_querier.increment_analytics_hourly.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_create_repeat_scan_served_from_memory(self, mock_session, sample_analytic):
+        # Arrange
+        row = sample_analytic.model_copy(
+            update={"time": datetime.datetime.now(datetime.UTC).replace(tzinfo=None)}
+        )
+        ent = CreateAnalytic(user_id=row.user_id, stand_id=row.stand_id)
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_recent_analytic.return_value = None
+            mock_querier.create_analytics.return_value = row
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            first = await create(mock_session, ent)
+            second = await create(mock_session, ent)
+
+            # Assert
+            assert first == second == row
+            mock_querier.create_analytics.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_create_many_drops_duplicates_within_window(self, mock_session, sample_analytic):
+        # Arrange
+        rows = [
+            sample_analytic,
+            sample_analytic.model_copy(update={
+                "id": uuid.uuid4(), "time": sample_analytic.time + datetime.timedelta(seconds=3),
+            }),
+            sample_analytic.model_copy(update={
+                "id": uuid.uuid4(), "time": sample_analytic.time + datetime.timedelta(seconds=30),
+            }),
+        ]
+        params = []
+
+        async def mock_async_iter(arg):
+            params.append(arg)
+            yield rows[2]
+
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.create_analytics_batch = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await create_many(mock_session, rows)
+
+            # Assert
+            assert result == 1
+            assert params[0].ids == [rows[0].id, rows[2].id]
+            assert params[0].dedup_seconds == 10
+            mock_querier.lock_analytics_visits.assert_called_once()
+            mock_querier.increment_analytics_hourly.assert_called_once_with(
+                bucket=datetime.datetime(2025, 10, 1, 12),
+                stand_id=sample_analytic.stand_id,
+                count=1,
+                user_ids=[sample_analytic.user_id],
+            )
+
+
+class TestGetGrouped:
+    @pytest.mark.asyncio
+    async def test_get_grouped(self, mock_session):
+        # Arrange
+        async def mock_async_iter(**kwargs):
+            yield a.GetAnalyticsHourlyRangeRow(
+                bucket=datetime.datetime(2025, 10, 1, 12), count=3
+            )
+
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_analytics_hourly_range = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await get_grouped(mock_session)
+
+            # Assert
+            assert [row.model_dump() for row in result] == [
+                AnalyticGrouped(
+                    bucket=datetime.datetime(2025, 10, 1, 12),
+                    date=datetime.date(2025, 10, 1),
+                    hour=decimal.Decimal(12),
+                    count=3,
+                ).model_dump()
+            ]
+
+    @pytest.mark.asyncio
+    async def test_get_grouped_minutes_by_stand(self, mock_session):
+        # Arrange
+        stand_id = uuid.uuid4()
+        calls = []
+
+        async def mock_async_iter(arg):
+            calls.append(arg)
+            yield a.GetAnalyticsBucketedByStandRow(
+                bucket=datetime.datetime(2025, 10, 1, 12, 30), count=2
+            )
+
+        f = AnalyticsFilter(
+            time_from=datetime.datetime(2025, 10, 1, 15, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=3))),
+            stand_id=stand_id,
+            bucket="minute",
+        )
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_analytics_bucketed_by_stand = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await get_grouped(mock_session, f)
+
+            # Assert
+            assert [row.count for row in result] == [2]
+            assert calls[0].time_from == datetime.datetime(2025, 10, 1, 12, 0)
+            assert calls[0].time_to == datetime.datetime.max
+            assert calls[0].stand_id == stand_id
+            assert calls[0].user_id is None
+
+    @pytest.mark.asyncio
+    async def test_get_grouped_unaligned_range_reads_raw(self, mock_session):
+        # Arrange
+        calls = []
+
+        async def mock_async_iter(**kwargs):
+            calls.append(kwargs)
+            return
+            yield
+
+        f = AnalyticsFilter(time_from=datetime.datetime(2025, 10, 1, 12, 30))
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_analytics_bucketed = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await get_grouped(mock_session, f)
+
+            # Assert
+            assert result == []
+            assert calls == [{
+                "bucket_size": "hour",
+                "time_from": datetime.datetime(2025, 10, 1, 12, 30),
+                "time_to": datetime.datetime.max,
+            }]
+
+
+class TestGetUnique:
+    @pytest.mark.asyncio
+    async def test_get_unique_small_range_is_exact(self, mock_session):
+        # Arrange
+        async def mock_async_iter(**kwargs):
+            yield a.GetUniqueVisitorsExactRow(bucket=datetime.datetime(2025, 10, 1, 12), visitors=7)
+
+        f = AnalyticsFilter(
+            time_from=datetime.datetime(2025, 10, 1, 10),
+            time_to=datetime.datetime(2025, 10, 1, 14),
+        )
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_unique_visitors_exact = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await get_unique(mock_session, f)
+
+            # Assert
+            assert [(row.visitors, row.exact, row.error) for row in result] == [(7, True, 0.0)]
+
+    @pytest.mark.asyncio
+    async def test_get_unique_unbounded_range_uses_sketch(self, mock_session):
+        # Arrange
+        async def mock_async_iter(**kwargs):
+            yield a.GetUniqueVisitorsSketchRow(bucket=datetime.datetime(2025, 10, 1), visitors=[0] * 4096)
+
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_unique_visitors_sketch = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await get_unique(mock_session, AnalyticsFilter(bucket="day"))
+
+            # Assert
+            assert len(result) == 1
+            assert result[0].visitors == 0
+            assert result[0].exact is False
+            assert 0.01 < result[0].error < 0.02
+
+
+class TestRebuildHourly:
+    @pytest.mark.asyncio
+    async def test_rebuild_hourly(self, mock_session):
+        # Arrange
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.rebuild_analytics_hourly.return_value = 5
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await rebuild_hourly(mock_session)
+
+            # Assert
+            assert result == 5
+            mock_querier.lock_analytics_hourly.assert_called_once()
+            mock_querier.delete_analytics_hourly.assert_called_once_with(
+                since=datetime.datetime.min
+            )
+            mock_querier.rebuild_analytics_hourly.assert_called_once_with(
+                since=datetime.datetime.min
+            )
+
+    @pytest.mark.asyncio
+    async def test_rebuild_hourly_with_retention(self, mock_session):
+        # Arrange
+        since = datetime.datetime.combine(
+            datetime.datetime.now(datetime.UTC).date() - datetime.timedelta(days=3), datetime.time()
+        )
+        with patch('internal.config.settings.analytics_retention_days', 3), \
+                patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            await rebuild_hourly(mock_session)
+
+            # Assert
+            mock_querier.delete_analytics_hourly.assert_called_once_with(since=since)
+            mock_querier.rebuild_analytics_hourly.assert_called_once_with(since=since)
+
+
+class TestMaintainPartitions:
+    @pytest.mark.asyncio
+    async def test_maintain_partitions_without_retention(self, mock_session):
+        # Arrange
+        with patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.ensure_analytics_partitions.return_value = 2
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await maintain_partitions(mock_session)
+
+            # Assert
+            assert result == (2, [])
+            mock_querier.ensure_analytics_partitions.assert_called_once_with(
+                today=datetime.datetime.now(datetime.UTC).date(), days_ahead=7
+            )
+            mock_querier.drop_analytics_partitions.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_maintain_partitions_drops_expired(self, mock_session):
+        # Arrange
+        async def mock_async_iter(**kwargs):
+            assert kwargs == {
+                "cutoff": datetime.datetime.now(datetime.UTC).date() - datetime.timedelta(days=30)
+            }
+            yield "analytics_p20250901"
+
+        with patch('internal.config.settings.analytics_retention_days', 30), \
+                patch('internal.cases.analytics.a.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.ensure_analytics_partitions.return_value = 0
+            mock_querier.drop_analytics_partitions = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await maintain_partitions(mock_session)
+
+            # Assert
+            assert result == (0, ["analytics_p20250901"])
+
+
+class TestFlush:
+    @pytest.mark.asyncio
+    async def test_integrity_error_retries_rows_one_by_one(self, sample_analytic):
+        # Arrange
+        bad = sample_analytic.model_copy(update={"id": uuid.uuid4()})
+        written = []
+
+        async def create_many_mock(session, rows, keys):
+            if bad in rows:
+                raise IntegrityError("insert", {}, Exception())
+            written.extend(rows)
+            return len(rows)
+
+        with patch('src.internal.cases.analytics.SessionLocal'), \
+                patch('src.internal.cases.analytics.create_many', create_many_mock), \
+                patch.object(analytics_cases.buffer, 'dropped', 0):
+            # Act
+            await analytics_cases._flush([(sample_analytic, None), (bad, "k")])
+
+            # Assert
+            assert written == [sample_analytic]
+            assert analytics_cases.buffer.dropped == 1
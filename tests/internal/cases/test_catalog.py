@@ -0,0 +1,122 @@
+import uuid
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from src.internal.cases import catalog
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog():
+    catalog.clear()
+    yield
+    catalog.clear()
+
+
+class TestCatalog:
+    def test_put_then_get(self):
+        value, version = catalog.get("stand", "a")
+        catalog.put("stand", "a", ["x"], version)
+
+        assert catalog.get("stand", "a")[0] == ["x"]
+        assert catalog.get("merch", "a")[0] is None
+
+    def test_invalidate_drops_entry_and_list(self):
+        _, version = catalog.get("stand", "a")
+        catalog.put("stand", "a", "one", version)
+        catalog.put("stand", catalog.ALL, ["one"], version)
+
+        catalog.invalidate("stand", "a")
+
+        assert catalog.get("stand", "a")[0] is None
+        assert catalog.get("stand", catalog.ALL)[0] is None
+
+    def test_read_started_before_write_is_not_stored(self):
+        _, version = catalog.get("event", catalog.ALL)
+        catalog.invalidate("event")
+
+        catalog.put("event", catalog.ALL, ["stale"], version)
+
+        assert catalog.get("event", catalog.ALL)[0] is None
+
+    def test_write_to_one_kind_keeps_fills_of_others(self):
+        _, version = catalog.get("event", catalog.ALL)
+        catalog.invalidate("merch", uuid.uuid4())
+
+        catalog.put("event", catalog.ALL, ["fresh"], version)
+
+        assert catalog.get("event", catalog.ALL)[0] == ["fresh"]
+
+    def test_clear_drops_fills_of_every_kind(self):
+        _, version = catalog.get("stand", catalog.ALL)
+        catalog.clear()
+
+        catalog.put("stand", catalog.ALL, ["stale"], version)
+
+        assert catalog.get("stand", catalog.ALL)[0] is None
+
+    def test_missing_rows_are_not_cached(self):
+        _, version = catalog.get("merch", "a")
+        catalog.put("merch", "a", None, version)
+
+        assert len(catalog.cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_notifications_from_other_workers_evict(self):
+        id = uuid.uuid4()
+        _, version = catalog.get("event", id)
+        catalog.put("event", id, "cached", version)
+        conn = AsyncMock()
+
+        await catalog.publish(conn, "event", id)
+        payload = conn.execute.call_args.args[1]["p1"]
+        catalog.listener._dispatch(None, None, catalog.CHANNEL, payload)
+        assert catalog.get("event", id)[0] == "cached"
+
+        catalog.listener._dispatch(
+            None, None, catalog.CHANNEL, payload.replace(catalog.listener.token, "other", 1)
+        )
+        assert catalog.get("event", id)[0] is None
+
+    def test_nothing_is_cached_while_listener_is_down(self):
+        with patch.object(catalog.listener, "_task", Mock(**{"done.return_value": False})), \
+                patch.object(catalog.listener, "connected", False):
+            _, version = catalog.get("stand", "a")
+            catalog.put("stand", "a", "one", version)
+
+        assert catalog.get("stand", "a")[0] is None
+
+    @pytest.mark.asyncio
+    async def test_rendered_once_until_invalidated(self):
+        renders = []
+
+        async def render():
+            renders.append(1)
+            return b'[{"id": %d}]' % len(renders)
+
+        body, etag = await catalog.rendered("merch", render)
+        again = await catalog.rendered("merch", render)
+        catalog.invalidate("merch", uuid.uuid4())
+        changed = await catalog.rendered("merch", render)
+
+        assert again == (body, etag)
+        assert body == b'[{"id": 1}]'
+        assert etag.startswith('"') and etag.endswith('"')
+        assert changed[0] == b'[{"id": 2}]' and changed[1] != etag
+        assert len(renders) == 2
+
+    @pytest.mark.asyncio
+    async def test_rendered_item_is_evicted_with_its_key_only(self):
+        a, b = uuid.uuid4(), uuid.uuid4()
+        render = AsyncMock(side_effect=[b"a1", b"b1", b"a2"])
+
+        first = await catalog.rendered("event", render, a)
+        await catalog.rendered("event", render, b)
+        catalog.invalidate("event", b)
+        assert await catalog.rendered("event", render, a) == first
+
+        catalog.invalidate("event", a)
+        assert (await catalog.rendered("event", render, a))[0] == b"a2"
+
+    @pytest.mark.asyncio
+    async def test_missing_item_is_not_rendered(self):
+        assert await catalog.rendered("event", AsyncMock(return_value=None), uuid.uuid4()) is None
@@ -3,8 +3,9 @@ import pytest
 from unittest.mock import AsyncMock, patch
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.internal.cases.client import create, signin, get, update, delete
+from src.internal.cases.client import create, signin, get, update, delete, rehash, rehash_later
 from src.internal.entities.client import CreateClient, SignInClient, UpdateClient
+from src.internal.infra.hash import HashQueueFull
 from src.db import models as m
 
 
@@ -164,6 +165,23 @@ class TestSignInClient:
                 email=signin_client_data.email
             )
 
+    @pytest.mark.asyncio
+    async def test_signin_hash_queue_full(
+        self, mock_session, sample_client, signin_client_data
+    ):
+        # Arrange
+        with (
+            patch("internal.cases.client.c.AsyncQuerier") as mock_querier_class,
+            patch("internal.config.settings.hash_queue_limit", 0),
+        ):
+            mock_querier = AsyncMock()
+            mock_querier.get_client_by_email.return_value = sample_client
+            mock_querier_class.return_value = mock_querier
+
+            # Act / Assert
+            with pytest.raises(HashQueueFull):
+                await signin(mock_session, signin_client_data)
+
 
 class TestGetClient:
     @pytest.mark.asyncio
@@ -277,3 +295,47 @@ class TestDeleteClient:
             assert result is False
             mock_querier.delete_client.assert_called_once_with(id=client_id)
 
+
+class TestRehashClient:
+    @pytest.mark.asyncio
+    async def test_rehash_success(self, mock_session, sample_client):
+        # Arrange
+        with patch("internal.cases.client.c.AsyncQuerier") as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.update_client_password_hash.return_value = 1
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await rehash(mock_session, sample_client, "password123")
+
+            # Assert
+            assert result is True
+            kwargs = mock_querier.update_client_password_hash.call_args.kwargs
+            assert kwargs["id"] == sample_client.id
+            assert kwargs["old_hash"] == sample_client.password_hash
+            assert kwargs["new_hash"].startswith("$argon2id$")
+
+    @pytest.mark.asyncio
+    async def test_rehash_hash_changed_concurrently(self, mock_session, sample_client):
+        # Arrange
+        with patch("internal.cases.client.c.AsyncQuerier") as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.update_client_password_hash.return_value = 0
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await rehash(mock_session, sample_client, "password123")
+
+            # Assert
+            assert result is False
+
+    @pytest.mark.asyncio
+    async def test_rehash_later_swallows_errors(self, sample_client):
+        # Arrange
+        with patch("src.internal.cases.client.SessionLocal"), \
+                patch("src.internal.cases.client.rehash", AsyncMock(side_effect=RuntimeError("db down"))) as mock_rehash:
+            # Act
+            await rehash_later(sample_client, "password123")
+
+            # Assert
+            mock_rehash.assert_awaited_once()
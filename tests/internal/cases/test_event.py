@@ -6,6 +6,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.internal.cases.event import create_event, get_event, get_all_events, update_event, delete_event
 from src.internal.entities.event import CreateEvent, UpdateEvent
 from src.db import models as m
+from src.internal.cases import catalog
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog():
+    catalog.clear()
+    yield
+    catalog.clear()
 
 
 @pytest.fixture
@@ -164,6 +172,50 @@ class TestGetAllEvents:
             assert result == []
 
 
+class TestEventCache:
+    @pytest.mark.asyncio
+    async def test_get_all_events_is_cached_until_update(self, mock_session, sample_event, update_event_data):
+        # Arrange
+        calls = []
+
+        async def mock_async_iter():
+            calls.append(1)
+            yield sample_event
+
+        with patch('internal.cases.event.e.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_all_events = mock_async_iter
+            mock_querier.update_event.return_value = sample_event
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            first = [event async for event in get_all_events(mock_session)]
+            second = [event async for event in get_all_events(mock_session)]
+            await update_event(mock_session, sample_event.id, update_event_data)
+            third = [event async for event in get_all_events(mock_session)]
+
+            # Assert
+            assert first == second == third == [sample_event]
+            assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_get_event_is_cached(self, mock_session, sample_event):
+        # Arrange
+        with patch('internal.cases.event.e.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_event_by_id.return_value = sample_event
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            await get_event(mock_session, sample_event.id)
+            result = await get_event(mock_session, sample_event.id)
+
+            # Assert
+            assert result == sample_event
+            mock_querier.get_event_by_id.assert_awaited_once()
+            assert catalog.cache.stats()["hits"] >= 1
+
+
 class TestUpdateEvent:
     @pytest.mark.asyncio
     async def test_update_event_success(self, mock_session, sample_event, update_event_data):
@@ -0,0 +1,104 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.internal.cases import idempotency
+from src.internal.cases.idempotency import IdempotencyConflict
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    idempotency.cache.clear()
+    yield
+    idempotency.cache.clear()
+
+
+class TestClaim:
+    @pytest.mark.asyncio
+    async def test_claim_many_returns_inserted_keys(self):
+        # Arrange
+        calls = []
+
+        async def claim(**kwargs):
+            calls.append(kwargs)
+            yield "a"
+
+        with patch('internal.cases.idempotency.i.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.claim_idempotency_keys = claim
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            claimed = await idempotency.claim_many(AsyncMock(), "points", ["a", "b"])
+
+            # Assert
+            assert claimed == {"a"}
+            assert calls == [{"scope": "points", "keys": ["a", "b"]}]
+
+
+class TestStored:
+    @pytest.mark.asyncio
+    async def test_stored_response_is_remembered(self):
+        # Arrange
+        with patch('internal.cases.idempotency.i.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_idempotency_response.return_value = json.dumps({"total_points": 5})
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            response = await idempotency.stored(AsyncMock(), "points", "k1")
+
+            # Assert
+            assert response == {"total_points": 5}
+            assert idempotency.cached("points", "k1") == {"total_points": 5}
+            assert idempotency.cached("analytics", "k1") is None
+
+    @pytest.mark.asyncio
+    async def test_claimed_key_without_response_conflicts(self):
+        # Arrange
+        with patch('internal.cases.idempotency.i.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_idempotency_response.return_value = None
+            mock_querier_class.return_value = mock_querier
+
+            # Act / Assert
+            with pytest.raises(IdempotencyConflict):
+                await idempotency.stored(AsyncMock(), "points", "k1")
+
+
+class TestSave:
+    @pytest.mark.asyncio
+    async def test_save_serializes_responses(self):
+        # Arrange
+        with patch('internal.cases.idempotency.i.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            await idempotency.save(AsyncMock(), "analytics", {"a": {"id": 1}, "b": {"id": 2}})
+            await idempotency.save(AsyncMock(), "analytics", {})
+
+            # Assert
+            mock_querier.save_idempotency_responses.assert_awaited_once_with(
+                keys=["a", "b"], responses=['{"id": 1}', '{"id": 2}'], scope="analytics"
+            )
+
+
+class TestDeleteExpired:
+    @pytest.mark.asyncio
+    async def test_expiry_is_left_to_the_database_clock(self):
+        # Arrange
+        session = AsyncMock()
+        session.begin = lambda: AsyncMock()
+        with patch('internal.config.settings.idempotency_ttl', 3600), \
+                patch('internal.cases.idempotency.i.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.delete_expired_idempotency_keys.return_value = 2
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await idempotency.delete_expired(session)
+
+            # Assert
+            assert result == 2
+            mock_querier.delete_expired_idempotency_keys.assert_called_once_with(ttl_seconds=3600)
@@ -0,0 +1,71 @@
+import uuid
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.internal.cases import leaderboard
+from src.db import models as m
+
+
+@pytest.fixture
+def mock_session():
+    """Mock AsyncSession for testing."""
+    session = AsyncMock(spec=AsyncSession)
+    session.begin.return_value.__aenter__ = AsyncMock()
+    session.begin.return_value.__aexit__ = AsyncMock(return_value=None)
+    return session
+
+
+@pytest.fixture(autouse=True)
+def clear_board():
+    leaderboard.board.replace([])
+    leaderboard._loaded = False
+    yield
+    leaderboard.board.replace([])
+    leaderboard._loaded = False
+
+
+class TestLeaderboard:
+    @pytest.mark.asyncio
+    async def test_first_read_loads_board(self, mock_session):
+        # Arrange
+        first, second = uuid.uuid4(), uuid.uuid4()
+        calls = []
+
+        async def mock_async_iter(**kwargs):
+            calls.append(kwargs)
+            yield m.Point(user_id=first, total_points=50)
+            yield m.Point(user_id=second, total_points=20)
+
+        with patch('internal.cases.leaderboard.p.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.list_points_ranked = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            top = await leaderboard.top(mock_session, 10)
+            rank = await leaderboard.rank(mock_session, second)
+
+            # Assert
+            assert top == [(1, first, 50), (2, second, 20)]
+            assert rank == (2, 20)
+            assert calls == [{"page_size": None}]
+
+    @pytest.mark.asyncio
+    async def test_publish_and_apply_updates(self):
+        # Arrange
+        user_id = uuid.uuid4()
+        mock_querier = AsyncMock()
+
+        # Act
+        await leaderboard.publish(mock_querier, [m.Point(user_id=user_id, total_points=7)])
+        payload = mock_querier.notify_points.call_args.kwargs["payload"]
+        leaderboard.listener._dispatch(None, None, leaderboard.CHANNEL, payload)
+        leaderboard.listener._dispatch(
+            None, None, leaderboard.CHANNEL, payload.replace(leaderboard.listener.token, "other", 1)
+        )
+
+        # Assert
+        assert payload.split("\n")[1] == f"{user_id},7"
+        assert leaderboard.board.rank(user_id) == 1
+        assert leaderboard.board.score(user_id) == 7
@@ -0,0 +1,64 @@
+import datetime
+import uuid
+import pytest
+from unittest.mock import AsyncMock
+
+from src.internal.cases import live
+from src.db import models as m
+
+
+@pytest.fixture(autouse=True)
+def clear_window():
+    live.window.clear()
+    yield
+    live.window.clear()
+
+
+def visit(stand_id, user_id, seconds_ago=0):
+    return m.Analytic(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        stand_id=stand_id,
+        time=datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        - datetime.timedelta(seconds=seconds_ago),
+    )
+
+
+class TestLive:
+    def test_record_and_occupancy(self):
+        stand_id = uuid.uuid4()
+        live.record([
+            visit(stand_id, uuid.uuid4()),
+            visit(stand_id, uuid.uuid4()),
+            visit(stand_id, uuid.uuid4(), seconds_ago=live.window.seconds + 60),
+        ])
+
+        assert live.occupancy(stand_id) == 2
+        assert live.occupancy_all() == {stand_id: 2}
+
+    @pytest.mark.asyncio
+    async def test_publish_chunks_payloads(self):
+        stand_id = uuid.uuid4()
+        rows = [visit(stand_id, uuid.uuid4()) for _ in range(200)]
+        q = AsyncMock()
+
+        await live.publish(q, rows)
+
+        payloads = [c.kwargs["payload"] for c in q.notify_analytics_visits.call_args_list]
+        assert len(payloads) > 1
+        assert all(len(p) <= 8000 for p in payloads)
+        assert sum(len(p.split("\n")) - 1 for p in payloads) == 200
+
+    @pytest.mark.asyncio
+    async def test_notifications_from_other_workers(self):
+        stand_id = uuid.uuid4()
+        rows = [visit(stand_id, uuid.uuid4()) for _ in range(3)]
+        q = AsyncMock()
+        await live.publish(q, rows)
+        payload = q.notify_analytics_visits.call_args.kwargs["payload"]
+
+        live.listener._dispatch(None, None, live.CHANNEL, payload)
+        assert live.occupancy(stand_id) == 0
+
+        live.listener._dispatch(None, None, live.CHANNEL, "other" + payload[payload.index("\n"):])
+        assert live.occupancy(stand_id) == 3
@@ -1,11 +1,23 @@
+import datetime
 import uuid
 import pytest
 from unittest.mock import AsyncMock, patch
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.internal.cases.merch import create, get, get_all, update, delete
+from src.internal.cases.merch import (
+    create, get, get_all, update, delete, redeem, affordable, InsufficientPoints, OutOfStock
+)
+from src.db import merch as c
 from src.internal.entities.merch import CreateMerch, UpdateMerch
 from src.db import models as m
+from src.internal.cases import catalog
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog():
+    catalog.clear()
+    yield
+    catalog.clear()
 
 
 @pytest.fixture
@@ -25,7 +37,8 @@ def sample_merch():
         name="Sample Merch",
         info="This is a sample merch item",
         image_url="http://example.com/merch.jpg",
-        points_needed=100
+        points_needed=100,
+        stock=3,
     )
 
 
@@ -167,7 +180,8 @@ class TestUpdateMerch:
             name="Updated Merch",
             info=sample_merch.info,
             image_url="http://example.com/updated_merch.jpg",
-            points_needed=150
+            points_needed=150,
+            stock=sample_merch.stock,
         )
         with patch('internal.cases.merch.c.AsyncQuerier') as mock_querier_class:
             mock_querier = AsyncMock()
@@ -213,4 +227,125 @@ class TestDeleteMerch:
 
             # Assert
             assert result is True
-            mock_querier.delete_merch.assert_called_once_with(id=merch_id)
\ No newline at end of file
+            mock_querier.delete_merch.assert_called_once_with(id=merch_id)
+
+
+class TestAffordableMerch:
+    @pytest.mark.asyncio
+    async def test_affordable_splits_items_and_next_reward(self, mock_session, sample_merch):
+        # Arrange
+        user_id = uuid.uuid4()
+        pricey = sample_merch.model_copy(update={"id": uuid.uuid4(), "points_needed": 300})
+
+        async def mock_async_iter(**kwargs):
+            for item, ok in ((sample_merch, True), (pricey, False)):
+                yield c.GetAffordableMerchRow(**item.model_dump(), total_points=120, affordable=ok)
+
+        with patch('internal.cases.merch.c.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_affordable_merch = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            total_points, items, next_reward = await affordable(mock_session, user_id)
+
+            # Assert
+            assert total_points == 120
+            assert [item.model_dump() for item in items] == [sample_merch.model_dump()]
+            assert next_reward.model_dump() == pricey.model_dump()
+
+    @pytest.mark.asyncio
+    async def test_affordable_without_matching_merch(self, mock_session):
+        # Arrange
+        async def mock_async_iter(**kwargs):
+            yield c.GetAffordableMerchRow(
+                id=None, name=None, info=None, image_url=None, points_needed=None,
+                stock=None, total_points=40, affordable=None,
+            )
+
+        with patch('internal.cases.merch.c.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_affordable_merch = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await affordable(mock_session, uuid.uuid4())
+
+            # Assert
+            assert result == (40, [], None)
+
+
+class TestRedeemMerch:
+    @pytest.mark.asyncio
+    async def test_redeem_spends_points_then_takes_stock(self, mock_session, sample_merch):
+        # Arrange
+        user_id = uuid.uuid4()
+        spent = c.SpendPointsOnMerchRow(
+            id=1, merch_id=sample_merch.id, user_id=user_id, points=100,
+            total_points=20, created_at=datetime.datetime(2025, 10, 1, 12, 0),
+        )
+        with patch('internal.cases.merch.c.AsyncQuerier') as mock_querier_class, \
+                patch('internal.cases.merch.p.AsyncQuerier') as mock_points_class:
+            mock_querier = AsyncMock()
+            mock_querier.spend_points_on_merch.return_value = spent
+            mock_querier.take_merch_stock.return_value = 2
+            mock_querier_class.return_value = mock_querier
+            mock_points_class.return_value = AsyncMock()
+
+            # Act
+            result = await redeem(mock_session, sample_merch.id, user_id)
+
+            # Assert
+            assert result == spent
+            mock_querier.spend_points_on_merch.assert_awaited_once_with(
+                user_id=user_id, merch_id=sample_merch.id
+            )
+            mock_querier.take_merch_stock.assert_awaited_once_with(id=sample_merch.id)
+            mock_querier.get_merch_by_id.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_redeem_loses_race_for_last_item(self, mock_session, sample_merch):
+        # Arrange
+        spent = c.SpendPointsOnMerchRow(
+            id=1, merch_id=sample_merch.id, user_id=uuid.uuid4(), points=100,
+            total_points=20, created_at=datetime.datetime(2025, 10, 1, 12, 0),
+        )
+        with patch('internal.cases.merch.c.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.spend_points_on_merch.return_value = spent
+            mock_querier.take_merch_stock.return_value = None
+            mock_querier_class.return_value = mock_querier
+
+            # Act / Assert
+            with pytest.raises(OutOfStock):
+                await redeem(mock_session, sample_merch.id, spent.user_id)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stock, error", [(0, OutOfStock), (3, InsufficientPoints)])
+    async def test_redeem_explains_refusal(self, mock_session, sample_merch, stock, error):
+        # Arrange
+        with patch('internal.cases.merch.c.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.spend_points_on_merch.return_value = None
+            mock_querier.get_merch_by_id.return_value = sample_merch.model_copy(update={"stock": stock})
+            mock_querier_class.return_value = mock_querier
+
+            # Act / Assert
+            with pytest.raises(error):
+                await redeem(mock_session, sample_merch.id, uuid.uuid4())
+            mock_querier.take_merch_stock.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_redeem_unknown_merch(self, mock_session):
+        # Arrange
+        with patch('internal.cases.merch.c.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.spend_points_on_merch.return_value = None
+            mock_querier.get_merch_by_id.return_value = None
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await redeem(mock_session, uuid.uuid4(), uuid.uuid4())
+
+            # Assert
+            assert result is None
@@ -0,0 +1,354 @@
+import asyncio
+import datetime
+import uuid
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.internal.cases.points import (
+    upsert_points, upsert_points_batch, complete_event, complete_event_batch,
+    get_history, reconcile
+)
+from src.internal.cases import points as points_cases
+from src.db import models as m, points as p
+from internal.cases import idempotency
+
+
+@pytest.fixture(autouse=True)
+def clear_idempotency():
+    idempotency.cache.clear()
+    yield
+    idempotency.cache.clear()
+
+
+@pytest.fixture
+def mock_session():
+    """Mock AsyncSession for testing."""
+    session = AsyncMock(spec=AsyncSession)
+    session.begin.return_value.__aenter__ = AsyncMock()
+    session.begin.return_value.__aexit__ = AsyncMock(return_value=None)
+    return session
+
+
+class TestUpsertPoints:
+    @pytest.mark.asyncio
+    async def test_upsert_points(self, mock_session):
+        # Arrange
+        user_id = uuid.uuid4()
+        point = m.Point(user_id=user_id, total_points=15)
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.award_points.return_value = point
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await upsert_points(mock_session, user_id, 5)
+
+            # Assert
+            assert result == point
+            arg = mock_querier.award_points.call_args.args[0]
+            assert (arg.user_id, arg.delta, arg.reason) == (user_id, 5, "manual")
+            mock_querier.get_points_by_user_id.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_upsert_points_replayed_key(self, mock_session):
+        # Arrange
+        user_id = uuid.uuid4()
+        point = m.Point(user_id=user_id, total_points=15)
+
+        async def claim(**kwargs):
+            for key in kwargs["keys"]:
+                yield key
+
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class, \
+                patch('internal.cases.idempotency.i.AsyncQuerier') as mock_keys_class:
+            mock_querier = AsyncMock()
+            mock_querier.award_points.return_value = None
+            mock_querier.get_points_by_user_id.return_value = point
+            mock_querier_class.return_value = mock_querier
+            mock_keys = AsyncMock()
+            mock_keys.claim_idempotency_keys = claim
+            mock_keys_class.return_value = mock_keys
+
+            # Act
+            result = await upsert_points(mock_session, user_id, 5, idempotency_key="k1")
+
+            # Assert
+            assert result == point
+            assert mock_querier.award_points.call_args.args[0].idempotency_key == "k1"
+
+    @pytest.mark.asyncio
+    async def test_upsert_points_claimed_key_replays_response(self, mock_session):
+        # Arrange
+        user_id = uuid.uuid4()
+
+        async def claim(**kwargs):
+            return
+            yield
+
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class, \
+                patch('internal.cases.idempotency.i.AsyncQuerier') as mock_keys_class:
+            mock_querier = AsyncMock()
+            mock_querier_class.return_value = mock_querier
+            mock_keys = AsyncMock()
+            mock_keys.claim_idempotency_keys = claim
+            mock_keys.get_idempotency_response.return_value = (
+                '{"user_id": "%s", "total_points": 15}' % user_id
+            )
+            mock_keys_class.return_value = mock_keys
+
+            # Act
+            result = await upsert_points(mock_session, user_id, 5, idempotency_key="k1")
+            again = await upsert_points(mock_session, user_id, 5, idempotency_key="k1")
+
+            # Assert
+            assert result.model_dump() == {"user_id": user_id, "total_points": 15}
+            assert again.model_dump() == result.model_dump()
+            mock_querier.award_points.assert_not_called()
+            mock_keys.get_idempotency_response.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_upsert_points_batch(self, mock_session):
+        # Arrange
+        first, second = uuid.uuid4(), uuid.uuid4()
+        calls = []
+
+        async def mock_async_iter(**kwargs):
+            calls.append(kwargs)
+            yield m.Point(user_id=first, total_points=130)
+            yield m.Point(user_id=second, total_points=105)
+
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.award_points_batch = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await upsert_points_batch(
+                mock_session, [(first, 10), (second, 5), (first, 20)]
+            )
+
+            # Assert
+            assert calls == [{
+                "reason": "batch",
+                "event_id": None,
+                "user_ids": [first, second, first],
+                "deltas": [10, 5, 20],
+            }]
+            assert {row.user_id: row.total_points for row in result} == {first: 130, second: 105}
+
+
+class TestCoalescing:
+    @pytest.mark.asyncio
+    async def test_concurrent_awards_share_one_statement(self, mock_session):
+        # Arrange
+        hot, other = uuid.uuid4(), uuid.uuid4()
+        calls = []
+
+        async def mock_async_iter(**kwargs):
+            calls.append(kwargs)
+            yield m.Point(user_id=hot, total_points=30)
+            yield m.Point(user_id=other, total_points=5)
+
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class, \
+                patch('src.internal.cases.points.SessionLocal', return_value=mock_session), \
+                patch('internal.config.settings.points_coalesce_ms', 5), \
+                patch.object(points_cases.coalescer, '_interval', 0.005):
+            mock_session.__aenter__.return_value = mock_session
+            mock_querier = AsyncMock()
+            mock_querier.award_points_batch = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            results = await asyncio.gather(
+                upsert_points(mock_session, hot, 10),
+                upsert_points(mock_session, hot, 20),
+                upsert_points(mock_session, other, 5),
+            )
+
+            # Assert
+            assert [r.total_points for r in results] == [30, 30, 5]
+            assert calls == [{
+                "reason": "manual",
+                "event_id": None,
+                "user_ids": [hot, hot, other],
+                "deltas": [10, 20, 5],
+            }]
+            mock_querier.award_points.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_retries_awards_one_by_one(self, mock_session):
+        # Arrange
+        known, unknown = uuid.uuid4(), uuid.uuid4()
+
+        async def mock_async_iter(**kwargs):
+            if unknown in kwargs["user_ids"]:
+                raise IntegrityError("insert", {}, Exception("fk"))
+            yield m.Point(user_id=known, total_points=10)
+
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class, \
+                patch('src.internal.cases.points.SessionLocal', return_value=mock_session):
+            mock_session.__aenter__.return_value = mock_session
+            mock_querier = AsyncMock()
+            mock_querier.award_points_batch = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            results = await points_cases.flush_awards([
+                (known, 10, "manual", None),
+                (unknown, 10, "manual", None),
+            ])
+
+            # Assert
+            assert results[0].total_points == 10
+            assert isinstance(results[1], IntegrityError)
+
+    @pytest.mark.asyncio
+    async def test_failed_group_does_not_fail_committed_groups(self, mock_session):
+        # Arrange
+        user_id, event_id = uuid.uuid4(), uuid.uuid4()
+
+        async def mock_async_iter(**kwargs):
+            if kwargs["event_id"] == event_id:
+                raise ConnectionError("lost")
+            yield m.Point(user_id=user_id, total_points=10)
+
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class, \
+                patch('src.internal.cases.points.SessionLocal', return_value=mock_session):
+            mock_session.__aenter__.return_value = mock_session
+            mock_querier = AsyncMock()
+            mock_querier.award_points_batch = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            results = await points_cases.flush_awards([
+                (user_id, 10, "manual", None),
+                (user_id, 5, "event", event_id),
+            ])
+
+            # Assert
+            assert results[0].total_points == 10
+            assert isinstance(results[1], ConnectionError)
+
+
+class TestCompleteEvent:
+    @pytest.mark.asyncio
+    async def test_complete_event_awards_once(self, mock_session):
+        # Arrange
+        event_id, user_id = uuid.uuid4(), uuid.uuid4()
+        point = m.Point(user_id=user_id, total_points=40)
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.complete_event.side_effect = [point, None]
+            mock_querier.event_exists.return_value = True
+            mock_querier.get_points_by_user_id.return_value = point
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            first = await complete_event(mock_session, event_id, user_id)
+            second = await complete_event(mock_session, event_id, user_id)
+
+            # Assert
+            assert first == (point, True)
+            assert second == (point, False)
+            mock_querier.complete_event.assert_awaited_with(user_id=user_id, event_id=event_id)
+            mock_querier.notify_points.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_complete_event_unknown_event(self, mock_session):
+        # Arrange
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.complete_event.return_value = None
+            mock_querier.event_exists.return_value = False
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await complete_event(mock_session, uuid.uuid4(), uuid.uuid4())
+
+            # Assert
+            assert result is None
+            mock_querier.get_points_by_user_id.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_complete_event_batch(self, mock_session):
+        # Arrange
+        event_id, first, second = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        calls = []
+
+        async def mock_async_iter(**kwargs):
+            calls.append(kwargs)
+            yield m.Point(user_id=first, total_points=40)
+
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.complete_event_batch = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await complete_event_batch(mock_session, event_id, [first, second])
+
+            # Assert
+            assert result == [m.Point(user_id=first, total_points=40)]
+            assert calls == [{"user_ids": [first, second], "event_id": event_id}]
+            mock_querier.event_exists.assert_not_called()
+
+
+class TestHistory:
+    @pytest.mark.asyncio
+    async def test_get_history_defaults_to_newest(self, mock_session):
+        # Arrange
+        user_id = uuid.uuid4()
+        calls = []
+
+        async def mock_async_iter(**kwargs):
+            calls.append(kwargs)
+            yield m.PointsLedger(
+                id=7, user_id=user_id, delta=5, reason="manual", event_id=None,
+                idempotency_key=None, created_at=datetime.datetime(2025, 10, 1),
+            )
+
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.get_points_history = mock_async_iter
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            result = await get_history(mock_session, user_id, None, 20)
+
+            # Assert
+            assert [entry.id for entry in result] == [7]
+            assert calls == [{"user_id": user_id, "before": 2**63 - 1, "page_size": 20}]
+
+
+class TestReconcile:
+    @pytest.mark.asyncio
+    async def test_reconcile_walks_keyset_batches(self, mock_session):
+        # Arrange
+        ids = sorted(uuid.uuid4() for _ in range(3))
+        seen_after = []
+
+        async def list_ids(after, batch_size):
+            seen_after.append(after)
+            for user_id in [i for i in ids if i > after][:batch_size]:
+                yield user_id
+
+        async def reconcile_rows(user_ids):
+            if ids[1] in user_ids:
+                yield p.ReconcilePointsRow(user_id=ids[1], old_total=10, total_points=7)
+
+        with patch('internal.cases.points.p.AsyncQuerier') as mock_querier_class:
+            mock_querier = AsyncMock()
+            mock_querier.list_points_user_ids = list_ids
+            mock_querier.reconcile_points = reconcile_rows
+            mock_querier_class.return_value = mock_querier
+
+            # Act
+            checked, fixed = await reconcile(mock_session, 2)
+
+            # Assert
+            assert checked == 3
+            assert [row.user_id for row in fixed] == [ids[1]]
+            assert seen_after == [uuid.UUID(int=0), ids[1], ids[2]]
+            assert mock_querier.lock_points.call_count == 2
@@ -6,6 +6,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.internal.cases.stand import create_stand, get_stand, get_all_stands, update_stand, delete_stand
 from src.internal.entities.stand import CreateStand, UpdateStand
 from src.db import models as m
+from src.internal.cases import catalog
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog():
+    catalog.clear()
+    yield
+    catalog.clear()
 
 
 @pytest.fixture
@@ -0,0 +1,106 @@
+import uuid
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.internal.cases import catalog
+from src.internal.handlers import event, merch
+from src.internal.infra.db import db_session
+from src.db import models as m
+
+
+@pytest.fixture(autouse=True)
+def prerender():
+    catalog.clear()
+    with patch('src.internal.config.settings.catalog_prerender', True):
+        yield
+    catalog.clear()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(event.router)
+    app.include_router(merch.router)
+    app.dependency_overrides[db_session] = lambda: None
+    return TestClient(app)
+
+
+@pytest.fixture
+def sample_event():
+    return m.Event(
+        id=uuid.uuid4(), name="Talk", info="", image_url="", points=5, stand_id=None
+    )
+
+
+@pytest.fixture
+def sample_merch():
+    return m.Merch(
+        id=uuid.uuid4(), name="Shirt", info="", image_url="", points_needed=10, stock=3
+    )
+
+
+class TestConditionalGet:
+    def test_item_revalidates_without_reading_again(self, client, sample_event):
+        with patch('src.internal.cases.event.get_event', AsyncMock(return_value=sample_event)) as get:
+            first = client.get(f"/events/{sample_event.id}")
+            again = client.get(
+                f"/events/{sample_event.id}", headers={"If-None-Match": first.headers["etag"]}
+            )
+
+        assert first.status_code == 200
+        assert first.json()["id"] == str(sample_event.id)
+        assert first.headers["cache-control"] == "public, max-age=60"
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == first.headers["etag"]
+        get.assert_awaited_once()
+
+    def test_stale_tag_gets_the_body(self, client, sample_event):
+        with patch('src.internal.cases.event.get_event', AsyncMock(return_value=sample_event)):
+            response = client.get(f"/events/{sample_event.id}", headers={"If-None-Match": '"old"'})
+
+        assert response.status_code == 200
+        assert response.json()["name"] == "Talk"
+
+    def test_missing_item_is_404(self, client):
+        with patch('src.internal.cases.event.get_event', AsyncMock(return_value=None)):
+            response = client.get(f"/events/{uuid.uuid4()}", headers={"If-None-Match": "*"})
+
+        assert response.status_code == 404
+
+    def test_list_revalidates(self, client, sample_event):
+        async def get_all(session):
+            yield sample_event
+
+        with patch('src.internal.cases.event.get_all_events', get_all):
+            first = client.get("/events")
+            again = client.get("/events", headers={"If-None-Match": first.headers["etag"]})
+
+        assert first.json()[0]["id"] == str(sample_event.id)
+        assert again.status_code == 304
+
+    def test_merch_must_revalidate(self, client, sample_merch):
+        with patch('src.internal.cases.merch.get', AsyncMock(return_value=sample_merch)):
+            first = client.get(f"/merch/{sample_merch.id}")
+            again = client.get(
+                f"/merch/{sample_merch.id}", headers={"If-None-Match": first.headers["etag"]}
+            )
+
+        assert first.headers["cache-control"] == "no-cache"
+        assert again.status_code == 304
+        assert again.headers["cache-control"] == "no-cache"
+
+    def test_revalidates_without_prerender(self, client, sample_event):
+        with patch('src.internal.config.settings.catalog_prerender', False), \
+                patch('src.internal.cases.event.get_event', AsyncMock(return_value=sample_event)) as get:
+            first = client.get(f"/events/{sample_event.id}")
+            again = client.get(
+                f"/events/{sample_event.id}", headers={"If-None-Match": first.headers["etag"]}
+            )
+
+        assert first.json()["id"] == str(sample_event.id)
+        assert again.status_code == 304
+        assert get.await_count == 2
+        assert len(catalog.cache) == 0
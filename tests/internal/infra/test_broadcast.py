@@ -0,0 +1,41 @@
+import pytest
+
+from src.internal.infra.broadcast import Broadcaster, TooManySubscribers
+
+
+class TestBroadcaster:
+    @pytest.mark.asyncio
+    async def test_new_subscriber_gets_snapshot_then_changes(self):
+        b = Broadcaster(10)
+        b.publish({"a": 1, "b": 2})
+        sub = b.subscribe()
+
+        assert await sub.next(0.1) == {"a": 1, "b": 2}
+
+        b.publish({"a": 1, "b": 3})
+        assert await sub.next(0.1) == {"b": 3}
+
+        b.publish({"a": 1}, default=0)
+        assert await sub.next(0.1) == {"b": 0}
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_coalesces(self):
+        b = Broadcaster(10)
+        sub = b.subscribe()
+        for i in range(100):
+            b.publish({"a": i})
+
+        assert await sub.next(0.1) == {"a": 99}
+        assert sub.coalesced == 99
+        assert await sub.next(0.01) is None
+
+    @pytest.mark.asyncio
+    async def test_subscriber_limit(self):
+        b = Broadcaster(1)
+        sub = b.subscribe()
+        with pytest.raises(TooManySubscribers):
+            b.subscribe()
+
+        b.unsubscribe(sub)
+        b.subscribe()
+        assert b.stats()["subscribers"] == 1
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+
+from src.internal.infra.buffer import BufferFull, WriteBuffer
+
+
+class TestWriteBuffer:
+    @pytest.mark.asyncio
+    async def test_flushes_full_batches(self):
+        # Arrange
+        batches = []
+
+        async def flush(rows):
+            batches.append(rows)
+
+        buffer = WriteBuffer(flush, max_size=10, max_batch=2, interval=10, put_timeout=1)
+        buffer.start()
+
+        # Act
+        for i in range(4):
+            await buffer.put(i)
+        await asyncio.sleep(0.01)
+
+        # Assert
+        assert batches == [[0, 1], [2, 3]]
+        await buffer.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_queue(self):
+        # Arrange
+        batches = []
+
+        async def flush(rows):
+            batches.append(rows)
+
+        buffer = WriteBuffer(flush, max_size=10, max_batch=100, interval=0.05, put_timeout=1)
+        buffer.start()
+        for i in range(3):
+            await buffer.put(i)
+
+        # Act
+        await buffer.stop()
+
+        # Assert
+        assert sum(batches, []) == [0, 1, 2]
+        assert buffer.stats()["flushed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_put_times_out_when_full(self):
+        # Arrange
+        release = asyncio.Event()
+
+        async def flush(rows):
+            await release.wait()
+
+        buffer = WriteBuffer(flush, max_size=1, max_batch=1, interval=10, put_timeout=0.01)
+        buffer.start()
+        await buffer.put(0)
+        await asyncio.sleep(0.01)
+        await buffer.put(1)
+
+        # Act / Assert
+        with pytest.raises(BufferFull):
+            await buffer.put(2)
+        release.set()
+        await buffer.stop()
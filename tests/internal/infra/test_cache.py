@@ -0,0 +1,54 @@
+from src.internal.infra.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    def test_get_set_and_expiry(self):
+        clock = Clock()
+        cache = TTLCache(10, 5, clock)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        clock.now = 5
+        assert cache.get("a") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_per_item_ttl(self):
+        clock = Clock()
+        cache = TTLCache(10, 5, clock)
+        cache.set("a", 1, ttl=1)
+        cache.set("b", 2, ttl=0)
+
+        clock.now = 2
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+
+    def test_lru_eviction(self):
+        cache = TTLCache(2, 60, Clock())
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_pop_and_clear(self):
+        cache = TTLCache(10, 60, Clock())
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+
+from src.internal.infra.coalescer import Coalescer
+
+
+class TestCoalescer:
+    @pytest.mark.asyncio
+    async def test_merges_items_within_a_tick(self):
+        batches = []
+
+        async def flush(items):
+            batches.append(items)
+            return [item * 10 for item in items]
+
+        c = Coalescer(flush, interval=0.01, max_batch=100)
+        results = await asyncio.gather(*(c.submit(i) for i in range(5)))
+
+        assert results == [0, 10, 20, 30, 40]
+        assert batches == [[0, 1, 2, 3, 4]]
+        assert c.stats() == {"pending": 0, "batches": 1, "items": 5}
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_early(self):
+        batches = []
+
+        async def flush(items):
+            batches.append(items)
+            return items
+
+        c = Coalescer(flush, interval=10, max_batch=2)
+        results = await asyncio.wait_for(asyncio.gather(c.submit("a"), c.submit("b")), 1)
+
+        assert results == ["a", "b"]
+        assert batches == [["a", "b"]]
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_their_callers(self):
+        async def flush(items):
+            return [ValueError(item) if item == "bad" else item for item in items]
+
+        c = Coalescer(flush, interval=0.01, max_batch=100)
+        good, bad = await asyncio.gather(c.submit("ok"), c.submit("bad"), return_exceptions=True)
+
+        assert good == "ok"
+        assert isinstance(bad, ValueError)
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_fails_the_batch(self):
+        async def flush(items):
+            raise RuntimeError("down")
+
+        c = Coalescer(flush, interval=0.01, max_batch=100)
+        with pytest.raises(RuntimeError):
+            await c.submit(1)
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending(self):
+        async def flush(items):
+            return items
+
+        c = Coalescer(flush, interval=10, max_batch=100)
+        pending = asyncio.ensure_future(c.submit(1))
+        await asyncio.sleep(0)
+        await c.stop()
+
+        assert await pending == 1
@@ -0,0 +1,28 @@
+from src.internal.infra.conditional import json_response, not_modified
+
+ETAG = '"abc"'
+
+
+class TestConditional:
+    def test_not_modified(self):
+        assert not not_modified(None, ETAG)
+        assert not not_modified('"other"', ETAG)
+        assert not_modified(ETAG, ETAG)
+        assert not_modified('"other", W/"abc"', ETAG)
+        assert not_modified("*", ETAG)
+
+    def test_matching_tag_gets_empty_304(self):
+        response = json_response(b"[]", ETAG, ETAG, "public, max-age=60")
+
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == ETAG
+        assert response.headers["cache-control"] == "public, max-age=60"
+
+    def test_stale_tag_gets_body(self):
+        response = json_response(b"[]", ETAG, '"old"', "")
+
+        assert response.status_code == 200
+        assert response.body == b"[]"
+        assert response.headers["content-type"] == "application/json"
+        assert "cache-control" not in response.headers
@@ -0,0 +1,25 @@
+from unittest.mock import patch
+
+from src.internal.infra import db
+
+
+class TestPoolLimits:
+    def test_budget_is_split_across_workers(self):
+        with patch('internal.config.settings.db_pool_size', 0), \
+             patch('internal.config.settings.db_connection_budget', 80), \
+             patch('internal.config.settings.app_workers', 16):
+            assert db.pool_limits() == (2, 2)
+            assert db.connections_needed() <= 80
+
+    def test_share_is_capped_for_few_workers(self):
+        with patch('internal.config.settings.db_pool_size', 0), \
+             patch('internal.config.settings.db_connection_budget', 80), \
+             patch('internal.config.settings.app_workers', 1):
+            assert db.pool_limits() == (10, 10)
+
+    def test_explicit_pool_size_wins(self):
+        with patch('internal.config.settings.db_pool_size', 5), \
+             patch('internal.config.settings.db_max_overflow', 3), \
+             patch('internal.config.settings.app_workers', 4):
+            assert db.pool_limits() == (5, 3)
+            assert db.connections_needed() == 4 * 9
@@ -0,0 +1,51 @@
+import datetime
+import gzip
+import json
+import uuid
+import pytest
+
+from src.internal.infra.export import csv_chunks, ndjson_chunks, gzipped
+from src.db import models as m
+
+
+async def rows(n):
+    for i in range(n):
+        yield m.Analytic(
+            id=uuid.UUID(int=i),
+            user_id=None,
+            stand_id=uuid.UUID(int=100 + i),
+            time=datetime.datetime(2025, 10, 1, 12, i),
+        )
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+class TestExport:
+    @pytest.mark.asyncio
+    async def test_csv_chunks(self):
+        chunks = await collect(csv_chunks(rows(3), ["id", "user_id", "time"], 2))
+
+        assert len(chunks) == 2
+        lines = b"".join(chunks).decode().splitlines()
+        assert lines[0] == "id,user_id,time"
+        assert lines[1] == f"{uuid.UUID(int=0)},,2025-10-01T12:00:00"
+        assert len(lines) == 4
+
+    @pytest.mark.asyncio
+    async def test_ndjson_chunks(self):
+        chunks = await collect(ndjson_chunks(rows(3), 2))
+
+        assert len(chunks) == 2
+        lines = b"".join(chunks).decode().splitlines()
+        assert [json.loads(line)["stand_id"] for line in lines] == [
+            str(uuid.UUID(int=100 + i)) for i in range(3)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_gzipped(self):
+        plain = b"".join(await collect(ndjson_chunks(rows(5), 2)))
+        packed = b"".join(await collect(gzipped(ndjson_chunks(rows(5), 2))))
+
+        assert gzip.decompress(packed) == plain
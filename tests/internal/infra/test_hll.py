@@ -0,0 +1,29 @@
+import hashlib
+import uuid
+
+from src.internal.infra import hll
+
+
+def sketch(n):
+    # same split as hll_registers (any 64-bit hash will do for the estimator)
+    registers = [0] * hll.M
+    for i in range(n):
+        h = int.from_bytes(hashlib.blake2b(uuid.UUID(int=i).bytes, digest_size=8).digest(), "big")
+        idx = h >> (64 - hll.P)
+        w = h & ((1 << (64 - hll.P)) - 1)
+        rank = (64 - hll.P) - w.bit_length() + 1
+        registers[idx] = max(registers[idx], rank)
+    return registers
+
+
+class TestEstimate:
+    def test_empty(self):
+        assert hll.estimate(None) == 0
+        assert hll.estimate([0] * hll.M) == 0
+
+    def test_small_counts_are_near_exact(self):
+        assert abs(hll.estimate(sketch(100)) - 100) <= 2
+
+    def test_large_counts_within_error_bound(self):
+        n = 50_000
+        assert abs(hll.estimate(sketch(n)) - n) <= 3 * hll.ERROR * n
@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from src.internal.infra.listener import Listener
+
+
+class FakeConnection:
+    def __init__(self, hang: bool = False):
+        self.hang = hang
+        self.closed = False
+        self.channels = []
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    async def add_listener(self, channel, callback):
+        self.channels.append(channel)
+
+    async def fetchval(self, query):
+        if self.hang:
+            await asyncio.sleep(3600)
+        return 1
+
+    def is_closed(self):
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+
+
+async def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+class TestListener:
+    @pytest.mark.asyncio
+    async def test_unanswered_ping_reconnects(self):
+        half_open, healthy = FakeConnection(hang=True), FakeConnection()
+        listener = Listener("dsn", retry=0, ping=0.01)
+        listener.subscribe("catalog", lambda lines: None)
+        with patch('asyncpg.connect', side_effect=[half_open, healthy]):
+            listener.start()
+            try:
+                await wait_for(lambda: listener.reconnects == 1 and listener.connected)
+            finally:
+                await listener.stop()
+
+        assert half_open.closed
+        assert healthy.channels == ["catalog"]
+
+    @pytest.mark.asyncio
+    async def test_failing_on_connect_hook_keeps_listener_running(self):
+        first, second = FakeConnection(), FakeConnection()
+        calls = []
+
+        async def resync():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("resync failed")
+
+        listener = Listener("dsn", retry=0, ping=30)
+        listener.subscribe("catalog", lambda lines: None, on_connect=resync)
+        with patch('asyncpg.connect', side_effect=[first, second]):
+            listener.start()
+            try:
+                await wait_for(lambda: listener.connected)
+                assert listener.running
+                first.on_terminate(first)
+                await wait_for(lambda: listener.reconnects == 1 and listener.connected)
+
+                assert listener.running
+                assert len(calls) == 2
+            finally:
+                await listener.stop()
+
+    @pytest.mark.asyncio
+    async def test_finished_task_is_not_running(self):
+        listener = Listener("dsn", retry=0, ping=30)
+        listener._task = asyncio.create_task(asyncio.sleep(0))
+        await listener._task
+
+        assert not listener.running
+
+    def test_payloads_reach_other_workers_only(self):
+        sender, receiver = Listener("dsn", retry=0, ping=30), Listener("dsn", retry=0, ping=30)
+        received = []
+        for listener in (sender, receiver):
+            listener.subscribe("points", received.extend)
+        lines = [f"{i:064d}" for i in range(300)]
+
+        payloads = list(sender.payloads(lines))
+        for payload in payloads:
+            sender._dispatch(None, None, "points", payload)
+            receiver._dispatch(None, None, "points", payload)
+
+        assert len(payloads) > 1
+        assert all(len(p) <= 8000 for p in payloads)
+        assert received == lines
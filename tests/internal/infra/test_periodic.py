@@ -0,0 +1,37 @@
+import asyncio
+import pytest
+
+from src.internal.infra.periodic import Periodic
+
+
+class TestPeriodic:
+    @pytest.mark.asyncio
+    async def test_runs_until_stopped(self):
+        calls = []
+
+        async def tick():
+            calls.append(1)
+
+        p = Periodic(tick, 0.01)
+        p.start()
+        await asyncio.sleep(0.05)
+        await p.stop()
+        count = len(calls)
+        await asyncio.sleep(0.03)
+
+        assert count >= 2
+        assert len(calls) == count
+        assert p.runs == count
+
+    @pytest.mark.asyncio
+    async def test_keeps_running_after_failure(self):
+        async def tick():
+            raise RuntimeError("boom")
+
+        p = Periodic(tick, 0.01)
+        p.start()
+        await asyncio.sleep(0.035)
+        await p.stop()
+
+        assert p.failures >= 2
+        assert p.runs == 0
@@ -0,0 +1,35 @@
+from src.internal.infra.ranking import Ranking
+
+
+class TestRanking:
+    def test_ranks_high_to_low_with_shared_ties(self):
+        r = Ranking()
+        r.set("a", 10)
+        r.set("b", 30)
+        r.set("c", 10)
+        r.set("d", 20)
+
+        assert r.top(10) == [(1, "b", 30), (2, "d", 20), (3, "a", 10), (3, "c", 10)]
+        assert [r.rank(k) for k in "abcd"] == [3, 1, 3, 2]
+        assert r.rank("missing") is None
+
+    def test_set_moves_existing_key(self):
+        r = Ranking()
+        r.set("a", 10)
+        r.set("b", 20)
+
+        r.set("a", 25)
+
+        assert r.top(2) == [(1, "a", 25), (2, "b", 20)]
+        assert len(r) == 2
+        assert r.score("a") == 25
+
+    def test_replace_resets_everything(self):
+        r = Ranking()
+        r.set("a", 10)
+
+        r.replace([("b", 5), ("c", 7)])
+
+        assert r.top(1) == [(1, "c", 7)]
+        assert r.rank("a") is None
+        assert len(r) == 2
@@ -0,0 +1,57 @@
+from src.internal.infra.window import SlidingWindow
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSlidingWindow:
+    def test_counts_distinct_members(self):
+        clock = Clock()
+        w = SlidingWindow(60, clock)
+
+        w.add("a", "u1")
+        w.add("a", "u1")
+        w.add("a", "u2")
+        w.add("b", "u1")
+
+        assert w.count("a") == 2
+        assert w.count("b") == 1
+        assert w.count("c") == 0
+
+    def test_expires_after_window(self):
+        clock = Clock()
+        w = SlidingWindow(60, clock)
+        w.add("a", "u1")
+        clock.now += 30
+        w.add("a", "u2")
+
+        clock.now += 31
+        assert w.count("a") == 1
+        clock.now += 30
+        assert w.count("a") == 0
+        assert w.counts() == {}
+
+    def test_later_sighting_extends_presence(self):
+        clock = Clock()
+        w = SlidingWindow(60, clock)
+        w.add("a", "u1")
+        clock.now += 50
+        w.add("a", "u1")
+
+        clock.now += 20
+        assert w.count("a") == 1
+
+    def test_out_of_order_adds(self):
+        clock = Clock()
+        w = SlidingWindow(60, clock)
+        w.add("a", "u1", at=clock.now)
+        w.add("a", "u2", at=clock.now - 50)
+        w.add("a", "u1", at=clock.now - 40)
+
+        clock.now += 15
+        assert w.count("a") == 1